@@ -0,0 +1,5 @@
+@ECHO OFF
+SET THISDIR=%~DP0
+FOR %%X IN (python3.exe) DO (SET FOUND=%%~$PATH:X)
+IF DEFINED FOUND python3 "%THISDIR%\jasy-bench" %1 %2 %3 %4 %5 %6 %7 %8 %9
+IF NOT DEFINED FOUND python "%THISDIR%\jasy-bench" %1 %2 %3 %4 %5 %6 %7 %8 %9
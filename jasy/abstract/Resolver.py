@@ -45,6 +45,9 @@ class Resolver():
         # Included classes after dependency calculation
         self.__included = []
 
+        # Shared dependency graph of all items (created on demand)
+        self.__graph = None
+
 
     def add(self, nameOrItem, prepend=False):
         """Adds an item by its name or via the item instance."""
@@ -109,9 +112,17 @@ class Resolver():
         if self.__included:
             return self.__included
 
-        collection = set()
-        for item in self.__required:
-            self.__resolveDependencies(item, collection)
+        # Parse all items which are not cached yet in parallel instead of one by one while resolving
+        self.profile.getSession().warmup(self.items.values())
+
+        collection = set(self.__required)
+        pending = list(collection)
+
+        while pending:
+            for dependency in self.getItemDependencies(pending.pop()):
+                if dependency not in collection:
+                    collection.add(dependency)
+                    pending.append(dependency)
 
         # Filter excluded classes
         for item in self.__excluded:
@@ -123,12 +134,16 @@ class Resolver():
         return self.__included
 
 
-    def __resolveDependencies(self, item, collection):
-        """Internal resolver engine which works recursively through all dependencies."""
+    def getGraph(self):
+        """
+        Returns the dependency graph of all available items.
+
+        The graph is shared with other resolvers (and sorters) of the session using the same items. Required
+        items which are not part of the graph (e.g. virtual items) are resolved by the graph on demand.
+
+        """
 
-        collection.add(item)
-        dependencies = self.getItemDependencies(item)
+        if self.__graph is None:
+            self.__graph = self.profile.getSession().getDependencyGraph(self.items)
 
-        for depObj in dependencies:
-            if depObj not in collection:
-                self.__resolveDependencies(depObj, collection)
+        return self.__graph
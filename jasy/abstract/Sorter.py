@@ -35,8 +35,13 @@ class AbstractSorter:
         self.items = dict([(item.getId(), item) for item in items])
 
         # Initialize fields
-        self.__loadDeps = {}
+        self.__nodes = None
+        self.__positions = None
+        self.__closures = None
+        self.__sizes = None
         self.__circularDeps = {}
+        self.__added = None
+        self.__addedMask = 0
         self.__sorted = []
 
 
@@ -47,13 +52,16 @@ class AbstractSorter:
             Console.debug("Sorting items...")
             Console.indent()
 
-            for itemId in self.items:
-                self.__getLoadDeps(self.items[itemId])
+            if self.__nodes is None:
+                self.__computeLoadDeps()
 
             result = []
+            self.__added = set()
+            self.__addedMask = 0
+
             required = self.resolver.getRequired()
             for item in required:
-                if item not in result:
+                if item not in self.__added:
                     # Console.debug("Start adding with: %s", item)
                     self.__addSorted(item, result)
 
@@ -63,104 +71,207 @@ class AbstractSorter:
         return self.__sorted
 
 
-    def __addSorted(self, item, result, postponed=False):
-        """Adds a single item and its dependencies to the sorted result list."""
+    def __addSorted(self, item, result):
+        """
+        Adds a single item and its dependencies to the sorted result list.
 
-        loadDeps = self.__getLoadDeps(item)
+        Works like a recursion through all load time dependencies using an explicit stack. Circular
+        dependencies (breaks) are inserted as soon as possible after the item itself.
 
-        for depObj in loadDeps:
-            if depObj not in result:
-                self.__addSorted(depObj, result)
+        """
 
-        if item in result:
-            return
+        added = self.__added
+        pending = [(item, self.__getPendingDeps(item), False)]
 
-        # Console.debug("Adding item: %s", item)
-        result.append(item)
+        while pending:
+            current, deps, circular = pending[-1]
 
-        # Insert circular dependencies as soon as possible
-        if item in self.__circularDeps:
-            circularDeps = self.__circularDeps[item]
-            for depObj in circularDeps:
-                if depObj not in result:
-                    self.__addSorted(depObj, result, True)
+            for depObj in deps:
+                if depObj not in added:
+                    pending.append((depObj, self.__getPendingDeps(depObj), False))
+                    break
 
+            else:
+                pending.pop()
 
-    def __getLoadDeps(self, item):
-        """Returns load time dependencies of given item."""
+                if circular or current in added:
+                    continue
 
-        if not item in self.__loadDeps:
-            self.__getLoadDepsRecurser(item, [])
+                # Console.debug("Adding item: %s", current)
+                added.add(current)
+                self.__addedMask |= 1 << self.__positions[current]
+                result.append(current)
 
-        return self.__loadDeps[item]
+                # Insert circular dependencies as soon as possible
+                if current in self.__circularDeps:
+                    pending.append((current, iter(self.__circularDeps[current]), True))
 
 
-    def __getLoadDepsRecurser(self, item, stack):
+    def __getPendingDeps(self, item):
         """
-        This is the main routine which tries to control over a system of unsorted items. It directly tries to fullfil
-        every dependency a item have, but has some kind of exception based loop protection to prevent circular
-        dependencies from breaking the build.
-
-        It respects break information given by file specific meta data, but
-        also adds custom hints where it found recursions. This lead to a valid
-        sort, but might lead to problems between exeactly the two affected items.
-        Without doing an exact execution it's not possible to whether found out
-        which of two each-other referencing items needs to be loaded first.
-        This is basically only interesting in cases where one item needs another
-        during the definition phase which is not the case that often.
+        Returns an iterator over the load time dependencies of the given item which are not added yet.
+
+        Dependencies with fewer dependencies on their own come first (ordered by ID otherwise). This is a
+        topological order as every dependency has less dependencies than the items depending on it.
 
         """
 
-        if item in stack:
-            stack.append(item)
-            msg = " >> ".join([x.getId() for x in stack[stack.index(item):]])
-            raise SorterError("Circular Dependency: %s" % msg)
+        nodes = self.__nodes
+        sizes = self.__sizes
+
+        positions = getBits(self.__closures[self.__positions[item]] & ~self.__addedMask)
+        positions.sort(key=lambda position: sizes[position])
 
-        stack.append(item)
+        return iter([nodes[position] for position in positions])
 
-        itemDeps = self.getItemDependencies(item)
-        itemBreaks = self.getItemBreaks(item)
 
-        result = set()
-        circular = set()
+    def __computeLoadDeps(self):
+        """
+        Computes the load time dependencies of all items.
+
+        Uses Tarjan's algorithm (without recursion) for finding strongly connected components of the graph of
+        load time dependencies. Every component with more than one item is a circular dependency which can not
+        be solved. All of them are reported at once. Components are found in reverse topological order which
+        allows computing the transitive dependencies of every item (stored as bit sets of positions) in the
+        same pass.
 
-        # Respect manually defined breaks
-        # Breaks are dependencies which are down-priorized to break
-        # circular dependencies between items.
-        for breakObj in itemBreaks:
-            if breakObj.getId() in self.items:
-                circular.add(breakObj)
+        """
 
-        # Now process the deps of the given item
-        loadDeps = self.__loadDeps
-        for depObj in itemDeps:
-            if depObj is item:
+        # Collect all items including required ones and dependencies which are not part of the included items
+        known = set(self.items.values())
+        known.update(self.resolver.getRequired())
+        queue = list(known)
+        edges = {}
+
+        while queue:
+            item = queue.pop()
+            itemDeps = self.getItemDependencies(item)
+            itemBreaks = self.getItemBreaks(item)
+
+            # Respect manually defined breaks
+            # Breaks are dependencies which are down-priorized to break
+            # circular dependencies between items.
+            circular = [breakObj for breakObj in itemBreaks if breakObj.getId() in self.items]
+            if circular:
+                self.__circularDeps[item] = sorted(circular, key=lambda breakObj: breakObj.getId())
+
+            loadDeps = []
+            for depObj in itemDeps:
+                if depObj is item:
+                    continue
+
+                if depObj in itemBreaks:
+                    Console.debug("Manual Break: %s => %s" % (item, depObj))
+                    continue
+
+                loadDeps.append(depObj)
+                if depObj not in known:
+                    known.add(depObj)
+                    queue.append(depObj)
+
+            edges[item] = loadDeps
+
+        # Positions follow the IDs for a stable order of items with the same number of dependencies
+        nodes = sorted(known, key=lambda item: item.getId())
+        positions = dict((item, position) for position, item in enumerate(nodes))
+        targets = [sorted([positions[depObj] for depObj in edges[item]]) for item in nodes]
+
+        count = len(nodes)
+        closures = [0] * count
+        index = [None] * count
+        lowlink = [0] * count
+        onStack = [False] * count
+        stack = []
+        counter = 0
+        cycles = []
+
+        for root in range(count):
+            if index[root] is not None:
                 continue
 
-            depName = depObj.getId()
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack[root] = True
+            work = [(root, iter(targets[root]))]
 
-            if depObj in itemBreaks:
-                Console.debug("Manual Break: %s => %s" % (item, depObj))
-                pass
+            while work:
+                node, children = work[-1]
 
-            elif depObj in loadDeps:
-                result.update(loadDeps[depObj])
-                result.add(depObj)
+                for child in children:
+                    if index[child] is None:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        onStack[child] = True
+                        work.append((child, iter(targets[child])))
+                        break
+
+                    elif onStack[child] and index[child] < lowlink[node]:
+                        lowlink[node] = index[child]
+
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if lowlink[node] < lowlink[parent]:
+                            lowlink[parent] = lowlink[node]
+
+                    if lowlink[node] != index[node]:
+                        continue
+
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onStack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+
+                    if len(component) > 1:
+                        cycles.append(self.__getCycle(component, targets, nodes))
+                        continue
+
+                    # All dependencies are in earlier components
+                    closure = 0
+                    for child in targets[node]:
+                        closure |= closures[child] | (1 << child)
+
+                    closures[node] = closure
+
+        if cycles:
+            raise SorterError("Circular Dependency: %s" % ", ".join(sorted(cycles)))
+
+        self.__nodes = nodes
+        self.__positions = positions
+        self.__closures = closures
+        self.__sizes = [bin(closure).count("1") for closure in closures]
+
+
+    def __getCycle(self, component, targets, nodes):
+        """Returns a readable path through a circular dependency of the given strongly connected component."""
+
+        members = set(component)
+        path = [min(component)]
+        visited = {}
+
+        while path[-1] not in visited:
+            visited[path[-1]] = len(path) - 1
+            path.append(min([child for child in targets[path[-1]] if child in members]))
+
+        return " >> ".join([nodes[position].getId() for position in path[visited[path[-1]]:]])
 
-            else:
-                current = self.__getLoadDepsRecurser(depObj, stack[:])
 
-                result.update(current)
-                result.add(depObj)
 
-        # Sort dependencies by number of other dependencies
-        # For performance reasions we access the __loadDeps
-        # dict directly as this data is already stored
-        result = sorted(result, key=lambda depObj: len(self.__loadDeps[depObj]))
+def getBits(value):
+    """Returns the list of positions of all set bits of the given number (ascending)."""
 
-        loadDeps[item] = result
+    bits = bin(value)[:1:-1]
+    result = []
 
-        if circular:
-            self.__circularDeps[item] = circular
+    position = bits.find("1")
+    while position != -1:
+        result.append(position)
+        position = bits.find("1", position + 1)
 
-        return result
+    return result
@@ -4,7 +4,6 @@
 #
 
 import os
-import fnmatch
 import re
 import json
 
@@ -12,6 +11,7 @@ from jasy import UserError
 
 import jasy.core.Console as Console
 import jasy.core.File as File
+import jasy.core.IdIndex as IdIndex
 import jasy.core.Util as Util
 
 RE_URL_PARAMS = re.compile("^([^?#]*)(.*)$")
@@ -29,9 +29,13 @@ class AssetManager():
         # The set of assets to copy during deployment
         self.__copylist = set()
 
+        # Index of all asset IDs for matching asset hints (created on demand)
+        self.__index = None
+
 
     def addProject(self, project):
         self.__assets.update(project.getAssets())
+        self.__index = None
 
 
     def getAssetUrl(self, fileId):
@@ -375,10 +379,7 @@ class AssetManager():
         assetPath = os.path.join(self.__profile.getDestinationPath(), self.__profile.getAssetOutputFolder())
 
         result = {}
-        filterExpr = self.__compileFilterExpr(items) if items else None
-        for fileId in assets:
-            if filterExpr and not filterExpr.match(fileId):
-                continue
+        for fileId in self.__filterAssets(items) if items else assets:
 
             entry = {}
             # t = file type
@@ -460,16 +461,22 @@ class AssetManager():
         return root
 
 
-    def __compileFilterExpr(self, classes):
-        """Returns the regular expression object to use for filtering."""
+    def __filterAssets(self, classes):
+        """Returns the sorted list of the IDs of all assets matching the asset hints of the given classes."""
 
         # Merge asset hints from all classes and remove duplicates
         hints = set()
         for classObj in classes:
             hints.update(classObj.getMetaData(self.__profile.getCurrentPermutation()).assets)
 
-        # Compile filter expressions
-        matcher = "^%s$" % "|".join(["(?:%s)" % fnmatch.translate(hint) for hint in hints])
-        Console.debug("Compiled asset matcher: %s" % matcher)
+        if self.__index is None:
+            self.__index = IdIndex.IdIndex(self.__assets)
+
+        # Only assets sharing the literal prefix of a hint are tested
+        result = set()
+        for hint in hints:
+            result.update(self.__index.match(hint))
+
+        Console.debug("Matched %s assets using %s hints", len(result), len(hints))
 
-        return re.compile(matcher)
+        return sorted(result)
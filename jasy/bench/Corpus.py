@@ -0,0 +1,173 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Generator for a synthetic but reproducible corpus of JavaScript classes and stylesheets.
+
+The same seed and scale always produce the same sources so that benchmark results
+of different commits can be compared.
+"""
+
+import random
+
+
+__all__ = ("generateScripts", "generateStyles")
+
+
+words = ("value", "item", "config", "entry", "result", "node", "offset", "width", "height", "index", "label", "count",
+         "source", "target", "layout", "child", "parent", "event", "handler", "data")
+
+colors = ("red", "blue", "#333", "#f0f0f0", "rgb(10,20,30)", "white", "black", "#ccc")
+
+units = ("px", "em", "%")
+
+
+
+def __name(rnd, capitalize=False):
+    name = rnd.choice(words) + rnd.choice(words).capitalize()
+    return name.capitalize() if capitalize else name
+
+
+def __docComment(rnd, indent, params):
+    lines = [
+        "/**",
+        " * Returns the computed %s based on the given `%s`. See {%s} for details." % (__name(rnd), __name(rnd), __name(rnd)),
+        " *",
+        " * Uses a **cached** version when the %s did not change:" % __name(rnd),
+        " *",
+        " * - first %s" % __name(rnd),
+        " * - second %s" % __name(rnd),
+        " *"
+    ]
+
+    for param in params:
+        lines.append(" * @param %s {%s} The %s" % (param, rnd.choice(("String", "Number", "Map", "Boolean")), __name(rnd)))
+
+    lines.append(" * @return {%s} The result" % rnd.choice(("String", "Number", "Map")))
+    lines.append(" */")
+
+    return "".join(["%s%s\n" % (indent, line) for line in lines])
+
+
+def __statements(rnd, depth, indent, variables):
+    """Returns a block of statements with nested control flow up to the given depth."""
+
+    code = ""
+    for pos in range(rnd.randint(2, 3)):
+        kind = rnd.randint(0, 5)
+        name = rnd.choice(variables)
+
+        if kind == 0:
+            code += "%s// Update %s of %s\n" % (indent, __name(rnd), name)
+            code += "%s%s = %s * %s + %s - (%s.%s || 0);\n" % (indent, name, name, rnd.randint(1, 99) / 10, rnd.randint(0, 255), name, __name(rnd))
+
+        elif kind == 1 and depth > 0:
+            code += "%sif (%s != null && typeof %s.%s === \"%s\") {\n" % (indent, name, name, __name(rnd), rnd.choice(("number", "string", "object")))
+            code += __statements(rnd, depth - 1, indent + "  ", variables)
+            code += "%s} else {\n" % indent
+            code += __statements(rnd, depth - 1, indent + "  ", variables)
+            code += "%s}\n" % indent
+
+        elif kind == 2 and depth > 0:
+            code += "%sfor (var i%s = 0, l = %s.length; i%s < l; i%s++) {\n" % (indent, depth, name, depth, depth)
+            code += __statements(rnd, depth - 1, indent + "  ", variables + ["i%s" % depth])
+            code += "%s}\n" % indent
+
+        elif kind == 3 and depth > 0:
+            code += "%s%s.forEach(function(%s) {\n" % (indent, name, "entry%s" % depth)
+            code += __statements(rnd, depth - 1, indent + "  ", variables + ["entry%s" % depth])
+            code += "%s}, this);\n" % indent
+
+        elif kind == 4:
+            code += "%s/* %s */\n" % (indent, " ".join([__name(rnd) for word in range(6)]))
+            code += "%s%s = \"%s\" + %s + '%s';\n" % (indent, name, __name(rnd), name, __name(rnd))
+
+        else:
+            code += "%s%s = this.%s(%s, %s) ? %s : [%s, %s];\n" % (indent, name, __name(rnd), name, rnd.randint(0, 9), name, rnd.randint(0, 9), 0x10)
+
+    return code
+
+
+def generateScripts(count=20, members=20, depth=3, seed=1):
+    """
+    Returns a dictionary of class name to source code.
+
+    - count: Number of classes
+    - members: Number of members per class
+    - depth: Maximum nesting depth of control flow in member functions
+
+    """
+
+    rnd = random.Random(seed)
+    result = {}
+
+    for classNo in range(count):
+        className = "bench.%s%s" % (__name(rnd, True), classNo)
+
+        code = "/**\n * #require(bench.Base)\n * #asset(bench/*)\n *\n * Synthetic class %s.\n */\n" % className
+        code += "core.Class(\"%s\", {\n  members: {\n" % className
+
+        for memberNo in range(members):
+            params = ["config", "defaultValue"]
+            code += "\n" + __docComment(rnd, "    ", params)
+            code += "    %s%s: function(%s) {\n" % (__name(rnd), memberNo, ", ".join(params))
+            code += "      var %s = config.%s;\n" % (__name(rnd), __name(rnd))
+            code += __statements(rnd, depth, "      ", params)
+
+            if rnd.random() < 0.3:
+                code += "      if (jasy.Env.isSet(\"debug\")) {\n        this.log(\"%s\");\n      }\n" % __name(rnd)
+
+            code += "      return defaultValue;\n    },\n"
+
+        code += "\n    __last: null\n  }\n});\n"
+        result[className] = code
+
+    return result
+
+
+def generateStyles(count=10, mixins=20, rules=60, seed=1):
+    """
+    Returns a dictionary of stylesheet name to source code.
+
+    - count: Number of stylesheets
+    - mixins: Number of (parametrized) mixins per stylesheet
+    - rules: Number of rules per stylesheet, each using some of the mixins
+
+    """
+
+    rnd = random.Random(seed)
+    result = {}
+
+    for styleNo in range(count):
+        styleName = "bench.%s%s" % (__name(rnd, True), styleNo)
+
+        code = "/* Synthetic stylesheet %s */\n\n" % styleName
+        code += "$baseSize = %s%s;\n$baseColor = %s;\n\n" % (rnd.randint(10, 20), "px", rnd.choice(colors))
+
+        for mixinNo in range(mixins):
+            if mixinNo % 2:
+                code += "$mixin%s($size){\n  font-size: @expr($baseSize * $size);\n  line-height: @expr(1.2 * $size);\n  color: $baseColor;\n}\n\n" % mixinNo
+            else:
+                code += "$mixin%s{\n  margin: %s%s %s%s;\n  padding: 0;\n  border: 1px solid %s;\n}\n\n" % (mixinNo, rnd.randint(0, 20), rnd.choice(units), rnd.randint(0, 20), rnd.choice(units), rnd.choice(colors))
+
+        for ruleNo in range(rules):
+            code += ".%s-%s{\n" % (__name(rnd), ruleNo)
+
+            for usage in range(rnd.randint(1, 3)):
+                mixinNo = rnd.randint(0, mixins - 1)
+                if mixinNo % 2:
+                    code += "  $mixin%s(%s);\n" % (mixinNo, rnd.randint(1, 4))
+                else:
+                    code += "  $mixin%s;\n" % mixinNo
+
+            code += "  width: %s%s;\n" % (rnd.randint(1, 100), rnd.choice(units))
+            code += "  &:hover{\n    color: %s;\n  }\n" % rnd.choice(colors)
+            code += "  .%s{\n    background: %s;\n  }\n" % (__name(rnd), rnd.choice(colors))
+            code += "}\n\n"
+
+        code += "@media print{\n  .%s{\n    display: none;\n  }\n}\n" % __name(rnd)
+        result[styleName] = code
+
+    return result
@@ -0,0 +1,175 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Times the processing phases of scripts and stylesheets on the synthetic corpus.
+
+Results are plain dictionaries which are stable to serialize as JSON and to
+compare between different commits.
+"""
+
+import copy
+import time
+import platform
+
+import jasy
+import jasy.bench.Corpus as Corpus
+
+import jasy.script.tokenize.Tokenizer as ScriptTokenizer
+import jasy.script.parse.Parser as ScriptParser
+import jasy.script.parse.ScopeScanner as ScriptScopeScanner
+import jasy.script.clean.DeadCode
+import jasy.script.clean.Unused
+import jasy.script.clean.Permutate
+import jasy.script.output.Optimization as ScriptOptimization
+import jasy.script.output.Compressor as ScriptCompressor
+
+import jasy.style.Engine as StyleEngine
+import jasy.style.parse.ScopeScanner as StyleScopeScanner
+
+from jasy.core.Permutation import Permutation
+
+
+__all__ = ("run", "compare")
+
+
+def measure(prepare, execute, repeat):
+    """
+    Runs execute() on the result of prepare() for the given number of times.
+
+    Only the execution is timed. Returns a dictionary with min, median and all timings (in seconds).
+
+    """
+
+    runs = []
+    for pos in range(repeat):
+        data = prepare()
+        start = time.perf_counter()
+        execute(data)
+        runs.append(time.perf_counter() - start)
+
+    ordered = sorted(runs)
+    return {
+        "min" : ordered[0],
+        "median" : ordered[len(ordered) // 2],
+        "runs" : runs
+    }
+
+
+
+def tokenizeScript(source, fileId):
+    tokenizer = ScriptTokenizer.createTokenizer(source, fileId)
+    while tokenizer.get() != "end":
+        pass
+
+
+def optimizeScript(tree):
+    jasy.script.clean.Permutate.patch(tree, Permutation({"debug": False}))
+    jasy.script.clean.DeadCode.cleanup(tree)
+    ScriptScopeScanner.scan(tree)
+    jasy.script.clean.Unused.cleanup(tree)
+    ScriptOptimization.Optimization("declarations", "blocks", "variables", "privates").apply(tree)
+
+
+def tokenizeStyle(source, fileId):
+    tokenizer = StyleEngine.getTokenizer(source, fileId)
+    while tokenizer.get() != "end":
+        pass
+
+
+
+def benchScripts(sources, repeat):
+    """Times all phases of processing the given scripts."""
+
+    parsed = {fileId: ScriptParser.parse(sources[fileId], fileId) for fileId in sources}
+    scanned = copy.deepcopy(parsed)
+    for tree in scanned.values():
+        ScriptScopeScanner.scan(tree)
+
+    optimized = copy.deepcopy(scanned)
+    for tree in optimized.values():
+        optimizeScript(tree)
+
+    return {
+        "tokenize" : measure(lambda: sources, lambda data: [tokenizeScript(data[fileId], fileId) for fileId in data], repeat),
+        "parse" : measure(lambda: sources, lambda data: [ScriptParser.parse(data[fileId], fileId) for fileId in data], repeat),
+        "scope" : measure(lambda: copy.deepcopy(parsed), lambda data: [ScriptScopeScanner.scan(tree) for tree in data.values()], repeat),
+        "optimize" : measure(lambda: copy.deepcopy(scanned), lambda data: [optimizeScript(tree) for tree in data.values()], repeat),
+        "compress" : measure(lambda: optimized, lambda data: [ScriptCompressor.Compressor().compress(tree) for tree in data.values()], repeat)
+    }
+
+
+def benchStyles(sources, repeat):
+    """Times all phases of processing the given stylesheets."""
+
+    parsed = {fileId: StyleEngine.getTree(sources[fileId], fileId) for fileId in sources}
+    reduced = copy.deepcopy(parsed)
+    for tree in reduced.values():
+        StyleEngine.reduceTree(tree)
+
+    return {
+        "tokenize" : measure(lambda: sources, lambda data: [tokenizeStyle(data[fileId], fileId) for fileId in data], repeat),
+        "parse" : measure(lambda: sources, lambda data: [StyleEngine.getTree(data[fileId], fileId) for fileId in data], repeat),
+        "scope" : measure(lambda: copy.deepcopy(parsed), lambda data: [StyleScopeScanner.scan(tree) for tree in data.values()], repeat),
+        "optimize" : measure(lambda: copy.deepcopy(parsed), lambda data: [StyleEngine.reduceTree(tree) for tree in data.values()], repeat),
+        "compress" : measure(lambda: reduced, lambda data: [StyleEngine.compressTree(tree) for tree in data.values()], repeat)
+    }
+
+
+
+def run(scale=1, repeat=3, seed=1, suites=("script", "style")):
+    """
+    Generates the corpus and times all phases.
+
+    - scale: Multiplier for the number of classes and stylesheets in the corpus
+    - repeat: Number of timed runs per phase
+    - seed: Seed of the corpus generator
+
+    """
+
+    result = {
+        "jasy" : jasy.__version__,
+        "python" : platform.python_version(),
+        "implementation" : platform.python_implementation(),
+        "corpus" : {
+            "scale" : scale,
+            "seed" : seed
+        },
+        "repeat" : repeat,
+        "results" : {}
+    }
+
+    if "script" in suites:
+        sources = Corpus.generateScripts(count=4 * scale, seed=seed)
+        result["corpus"]["scripts"] = {"files" : len(sources), "bytes" : sum([len(code) for code in sources.values()])}
+        result["results"]["script"] = benchScripts(sources, repeat)
+
+    if "style" in suites:
+        sources = Corpus.generateStyles(count=4 * scale, seed=seed)
+        result["corpus"]["styles"] = {"files" : len(sources), "bytes" : sum([len(code) for code in sources.values()])}
+        result["results"]["style"] = benchStyles(sources, repeat)
+
+    return result
+
+
+
+def compare(previous, current):
+    """Returns a list of (suite, phase, previous median, current median, ratio) for all phases measured in both results."""
+
+    changes = []
+
+    for suite in sorted(current["results"]):
+        if suite not in previous.get("results", {}):
+            continue
+
+        for phase in sorted(current["results"][suite]):
+            if phase not in previous["results"][suite]:
+                continue
+
+            before = previous["results"][suite][phase]["median"]
+            after = current["results"][suite][phase]["median"]
+            changes.append((suite, phase, before, after, after / before if before else None))
+
+    return changes
@@ -8,6 +8,7 @@ import os
 
 import jasy
 import jasy.core.Console as Console
+import jasy.core.SourceMap as SourceMap
 
 from jasy.item.Script import ScriptError
 from jasy.item.Script import ScriptItem
@@ -114,7 +115,15 @@ class ScriptBuilder:
         return sortedScripts
 
 
-    def __compressScripts(self, items):
+    def __compressScripts(self, items, withMaps=False):
+        """
+        Returns the list of code fragments of the compressed items as tuples of code and SourceMap.
+
+        Source maps are only generated when requested. The fragments are written to the output
+        file one by one without joining them first.
+
+        """
+
         try:
             profile = self.__profile
             session = self.__session
@@ -122,17 +131,39 @@ class ScriptBuilder:
             result = []
 
             for item in items:
-                compressed = item.getCompressed(profile)
+                if withMaps:
+                    compressed, sourceMap = item.getCompressedWithMap(profile)
+                else:
+                    compressed, sourceMap = item.getCompressed(profile), None
 
                 if self.__addDividers:
-                    result.append("// FILE ID: %s\n%s\n\n" % (item.getId(), compressed))
+                    result.append(("// FILE ID: %s\n" % item.getId(), None))
+                    result.append((compressed, sourceMap))
+                    result.append(("\n\n", None))
                 else:
-                    result.append(compressed)
+                    result.append((compressed, sourceMap))
 
         except ScriptError as error:
             raise jasy.UserError("Error during script compression! %s" % error)
 
-        return "".join(result)
+        return result
+
+
+    def __storeScript(self, fileName, fragments):
+        """Writes the given fragments (see __compressScripts()) and the stitched source map when enabled."""
+
+        fileName = self.__profile.expandFileName(os.path.join(self.__outputPath, fileName))
+        code = [fragment[0] for fragment in fragments]
+
+        if self.__profile.getSourceMaps():
+            mapName = fileName + ".map"
+            sourceMap = SourceMap.stitch(fragments)
+            SourceMap.linkItems(sourceMap, self.__session.getScriptByName, os.path.dirname(mapName))
+
+            self.__fileManager.writeFile(mapName, sourceMap.export(fileName))
+            code.append(SourceMap.getComment(os.path.basename(mapName)))
+
+        self.__fileManager.writeFile(fileName, code)
 
 
     def __generateScriptLoader(self, items):
@@ -161,7 +192,7 @@ class ScriptBuilder:
                 compress.append("core.io.Script")
 
             compressedList = self.__sortScriptItems(compress, filterBy=self.__kernelScripts)
-            code += self.__compressScripts(compressedList)
+            code += "".join([fragment[0] for fragment in self.__compressScripts(compressedList)])
 
         main = self.__session.getMain()
         files = []
@@ -242,8 +273,7 @@ class ScriptBuilder:
 
         # Sort and compress
         sortedScripts = self.__sortScriptItems(items, bootCode, inlineTranslations=True)
-        compressedCode = self.__compressScripts(sortedScripts)
-        self.__fileManager.writeFile(os.path.join(self.__outputPath, fileName), compressedCode)
+        self.__storeScript(fileName, self.__compressScripts(sortedScripts, self.__profile.getSourceMaps()))
         self.__kernelScripts = sortedScripts
 
         Console.outdent()
@@ -267,7 +297,6 @@ class ScriptBuilder:
         Console.indent()
 
         sortedScripts = self.__sortScriptItems(items, bootCode, filterBy=self.__kernelScripts, inlineTranslations=True)
-        compressedCode = self.__compressScripts(sortedScripts)
-        self.__fileManager.writeFile(os.path.join(self.__outputPath, fileName), compressedCode)
+        self.__storeScript(fileName, self.__compressScripts(sortedScripts, self.__profile.getSourceMaps()))
 
         Console.outdent()
@@ -8,6 +8,7 @@ import os
 
 import jasy
 import jasy.core.Console as Console
+import jasy.core.SourceMap as SourceMap
 
 from jasy.item.Style import StyleError
 from jasy.item.Style import StyleItem
@@ -32,23 +33,30 @@ class StyleBuilder:
         self.__outputPath = os.path.join(profile.getDestinationPath(), profile.getCssOutputFolder())
 
 
-    def __compressStyles(self, styles):
+    def __compressStyles(self, styles, withMaps=False):
+        """Returns the list of code fragments of the compressed styles as tuples of code and SourceMap (when requested)."""
+
         try:
             profile = self.__profile
             result = []
 
             for styleObj in styles:
-                compressed = styleObj.getCompressed(profile)
+                if withMaps:
+                    compressed, sourceMap = styleObj.getCompressedWithMap(profile)
+                else:
+                    compressed, sourceMap = styleObj.getCompressed(profile), None
 
                 if profile.getFormattingLevel() > 0:
-                    result.append("/* FILE ID: %s */\n%s\n\n" % (styleObj.getId(), compressed))
+                    result.append(("/* FILE ID: %s */\n" % styleObj.getId(), None))
+                    result.append((compressed, sourceMap))
+                    result.append(("\n\n", None))
                 else:
-                    result.append(compressed)
+                    result.append((compressed, sourceMap))
 
         except StyleError as error:
             raise jasy.UserError("Error during stylesheet compression! %s" % error)
 
-        return "".join(result)
+        return result
 
 
 
@@ -93,7 +101,18 @@ class StyleBuilder:
         fileName = self.__profile.expandFileName(fileName)
         relativeToMain = self.__session.getMain().toRelativeUrl(fileName)
 
-        compressedCode = self.__compressStyles(styles)
-        self.__fileManager.writeFile(os.path.join(self.__outputPath, fileName), compressedCode)
+        withMaps = self.__profile.getSourceMaps()
+        fragments = self.__compressStyles(styles, withMaps)
+        code = [fragment[0] for fragment in fragments]
+
+        if withMaps:
+            fullName = os.path.join(self.__outputPath, fileName)
+            sourceMap = SourceMap.stitch(fragments)
+            SourceMap.linkItems(sourceMap, self.__session.getStyleByName, os.path.dirname(fullName))
+
+            self.__fileManager.writeFile(fullName + ".map", sourceMap.export(fullName))
+            code.append(SourceMap.getComment(os.path.basename(fullName) + ".map", style=True))
+
+        self.__fileManager.writeFile(os.path.join(self.__outputPath, fileName), code)
 
         Console.outdent()
@@ -11,63 +11,349 @@ import os.path
 import sys
 import pickle
 import dbm
+import sqlite3
 import uuid
 import hashlib
 import atexit
 import glob
+import collections
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
 
 import jasy
 import jasy.core.Util
 import jasy.core.Console as Console
+import jasy.parse.AbstractNode as AbstractNode
+import jasy.parse.CompactTree as CompactTree
+import jasy.parse.TreeCodec as TreeCodec
+
+from jasy import UserError
 
 hostId = uuid.getnode()
 
+# Namespaces of cache keys which are holding syntax trees.
+# These are managed in a separate pool of the in-memory layer.
+treeNamespaces = ("script:tree", "script:opt-tree", "style:tree", "style:permutated")
+
+# Default limits of the in-memory layer per pool: maximum number of entries and maximum estimated size in bytes
+memoryLimits = {
+    "tree" : {
+        "entries" : 10000,
+        "size" : 1024 * 1024 * 1024
+    },
+    "default" : {
+        "entries" : 100000,
+        "size" : 256 * 1024 * 1024
+    }
+}
+
+# Format of stored values. Caches using another format are recreated.
+storageFormat = 7
+
+# Compression method of stored values per namespace: "zlib", "lzma" or None (never compressed).
+# Values of other namespaces are compressed using the default method.
+compressionPolicy = {
+    "script:api" : "lzma",
+    "script:highlighted" : "lzma",
+    "script:meta" : None,
+    "script:fields" : None,
+    "script:scope" : None,
+    "style:meta" : None,
+    "style:fields" : None,
+    "style:includes" : None,
+    "item:digest" : None
+}
+
+defaultCompression = "zlib"
+
+# Serialized values smaller than this number of bytes are never compressed
+compressionThreshold = 4096
+
+
+def encode(value, compression=defaultCompression):
+    """
+    Serializes the given value using the highest pickle protocol available.
 
-class Cache:
+    Syntax trees are serialized using jasy.parse.TreeCodec instead. Compresses the result with the given compression
+    method when exceeding the size threshold. The first byte of the result marks the method used (upper case for trees).
 
     """
-    A cache class based on shelve feature of Python.
 
-    Supports transient in-memory
-    storage, too. Uses memory storage for caching requests to DB as well for
-    improved performance. Uses keys for identification of entries like a normal
-    hash table / dictionary.
+    if isinstance(value, (AbstractNode.AbstractNode, CompactTree.CompactTree)):
+        data = TreeCodec.encode(value)
+        markers = (b"X", b"Z", b"P")
+    else:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        markers = (b"x", b"z", b"p")
+
+    if compression is not None and len(data) >= compressionThreshold:
+        if compression == "lzma" and lzma is not None:
+            return markers[0] + lzma.compress(data, preset=1)
+        else:
+            return markers[1] + zlib.compress(data, 6)
+
+    return markers[2] + data
+
+
+def decode(data):
+    """Restores the value from the given data as being produced by encode()."""
+
+    marker = data[:1]
+    if marker in (b"z", b"Z"):
+        data = zlib.decompress(data[1:])
+    elif marker in (b"x", b"X"):
+        data = lzma.decompress(data[1:])
+    else:
+        data = data[1:]
+
+    if marker.isupper():
+        return TreeCodec.decode(data)
+
+    return pickle.loads(data)
+
+
+# Usage statistics per namespace (shared by all cache instances)
+statistics = {}
+
+statisticFields = ("reads", "memoryHits", "diskHits", "misses", "stores", "bytesRead", "bytesWritten", "serializeTime")
+
+
+def getCounters(key):
+    """Returns the statistic counters of the namespace of the given key."""
+
+    namespace = getNamespace(key)
+    if namespace == key:
+        namespace = "other"
+
+    counters = statistics.get(namespace)
+    if counters is None:
+        counters = statistics[namespace] = dict.fromkeys(statisticFields, 0)
 
+    return counters
+
+
+def printStatistics():
+    """Prints a table with the usage statistics of all caches per namespace."""
+
+    if not statistics:
+        Console.info("No cache usage recorded.")
+        return
+
+    layout = "%-24s %8s %8s %8s %8s %8s %10s %10s %10s"
+    Console.info(layout, "Namespace", "Reads", "Memory", "Disk", "Misses", "Stores", "Read KB", "Write KB", "Pickle ms")
+
+    totals = dict.fromkeys(statisticFields, 0)
+    for namespace in sorted(statistics):
+        counters = statistics[namespace]
+        for field in statisticFields:
+            totals[field] += counters[field]
+
+        Console.info(layout, namespace, counters["reads"], counters["memoryHits"], counters["diskHits"], counters["misses"], counters["stores"],
+            counters["bytesRead"] // 1024, counters["bytesWritten"] // 1024, int(counters["serializeTime"] * 1000))
+
+    Console.info(layout, "Total", totals["reads"], totals["memoryHits"], totals["diskHits"], totals["misses"], totals["stores"],
+        totals["bytesRead"] // 1024, totals["bytesWritten"] // 1024, int(totals["serializeTime"] * 1000))
+
+
+# Rough estimation of the memory used by a single syntax tree node (including its slots and attribute values)
+nodeSize = 700
+
+
+def getNamespace(key):
+    """Returns the namespace of the given cache key e.g. "script:tree" for "script:tree[core.Main]"."""
+
+    pos = key.find("[")
+    if pos == -1:
+        return key
+
+    return key[:pos]
+
+
+def estimateSize(value):
     """
+    Returns a cheap estimation of the memory size of the given value in bytes.
 
-    __shelve = None
+    Syntax trees are estimated based on their number of nodes, compact trees based on their arrays. Containers are only inspected one level deep.
 
-    def __init__(self, path, filename="jasycache", hashkeys=False):
-        self.__transient = {}
-        self.__file = os.path.join(path, filename)
-        self.__hashkeys = hashkeys
+    """
 
-        self.open()
+    if isinstance(value, AbstractNode.AbstractNode):
+        count = 0
+        stack = [value]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend([child for child in node if child is not None])
 
-        # Be sure to correctly write down and close cache file on exit
-        atexit.register(self.close)
+        return count * nodeSize
 
+    if isinstance(value, CompactTree.CompactTree):
+        return value.getSize()
 
-    def open(self):
-        """Opens a cache file in the given path."""
+    size = sys.getsizeof(value)
 
-        try:
-            self.__shelve = shelve.open(self.__file, flag="c")
+    if isinstance(value, dict):
+        for key in value:
+            size += sys.getsizeof(key) + sys.getsizeof(value[key])
+
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for entry in value:
+            size += sys.getsizeof(entry)
+
+    elif hasattr(value, "__dict__"):
+        size += sys.getsizeof(value.__dict__)
+
+    return size
+
+
+
+class LruStore:
+
+    """
+    In-memory key/value store with least-recently-used eviction.
+
+    Limits the number of entries and the estimated size of all entries. Keeps
+    track of hits, misses and evictions.
+
+    """
+
+    def __init__(self, maxEntries=None, maxSize=None):
+        self.maxEntries = maxEntries
+        self.maxSize = maxSize
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = collections.OrderedDict()
+
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+
+    def __len__(self):
+        return len(self.__entries)
 
-            storedVersion = jasy.core.Util.getKey(self.__shelve, "jasy-version")
-            storedHost = jasy.core.Util.getKey(self.__shelve, "jasy-host")
 
-            if storedVersion == jasy.__version__ and storedHost == hostId:
-                return
+    def get(self, key, default=None, countMiss=True):
+        """
+        Returns the value of the given key (and marks it as recently used) or the given default.
+
+        Callers falling back to another storage can disable counting the miss and use addMiss() later on.
+
+        """
+
+        entry = self.__entries.get(key)
+        if entry is None:
+            if countMiss:
+                self.misses += 1
+            return default
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+
+    def addMiss(self):
+        """Counts a miss of a previous get() which had counting the miss disabled."""
+
+        self.misses += 1
+
 
-            if storedVersion is not None or storedHost is not None:
-                Console.debug("Jasy version or host has been changed. Recreating cache...")
+    def set(self, key, value, size=None):
+        """Stores the given value and evicts the least recently used entries when exceeding the limits."""
 
-            self.clear()
+        if size is None:
+            size = estimateSize(value)
 
-            self.__shelve = shelve.open(self.__file, flag="n")
-            self.__shelve["jasy-version"] = jasy.__version__
-            self.__shelve["jasy-host"] = hostId
+        previous = self.__entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+
+        self.__entries[key] = (value, size)
+        self.size += size
+
+        # Always keep the most recent entry, even if it exceeds the limits on its own
+        entries = self.__entries
+        while len(entries) > 1 and ((self.maxEntries is not None and len(entries) > self.maxEntries) or (self.maxSize is not None and self.size > self.maxSize)):
+            evictedKey, evicted = entries.popitem(last=False)
+            self.size -= evicted[1]
+            self.evictions += 1
+
+
+    def keys(self):
+        """Returns a list of all keys (least recently used first)."""
+
+        return list(self.__entries)
+
+
+    def remove(self, key):
+        """Removes the given key."""
+
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+    def clear(self):
+        """Removes all entries."""
+
+        self.__entries.clear()
+        self.size = 0
+
+
+    def getStatistics(self):
+        """Returns a dictionary with the current usage and the hit/miss/eviction counters."""
+
+        return {
+            "entries" : len(self.__entries),
+            "size" : self.size,
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "evictions" : self.evictions
+        }
+
+engines = {}
+
+
+def addEngine(name, engine):
+    """Registers the given storage engine class under the given name."""
+
+    engines[name] = engine
+
+
+
+class ShelveEngine:
+
+    """
+    Storage engine based on the shelve feature of Python.
+
+    Uses whatever dbm implementation is available on the system. Stores the
+    validator of every entry under a separate key with a "-timestamp" postfix.
+    Access time and size of all entries are tracked in an index stored under "jasy-index".
+
+    """
+
+    __shelve = None
+
+    def __init__(self, fileName):
+        self.__file = fileName
+        self.__index = None
+        self.__indexModified = False
+
+
+    def open(self):
+        """Opens the shelve file."""
+
+        try:
+            self.__shelve = shelve.open(self.__file, flag="c", protocol=pickle.HIGHEST_PROTOCOL)
 
         except dbm.error as dbmerror:
             errno = None
@@ -76,32 +362,446 @@ class Cache:
             except:
                 pass
 
-            if errno is 35:
+            if errno == 35:
                 raise IOError("Cache file is locked by another process!")
 
             elif "type could not be determined" in str(dbmerror):
                 Console.error("Could not detect cache file format: %s" % self.__file)
                 Console.warn("Recreating cache database...")
-                self.clear()
+                self.recreate()
 
             elif "module is not available" in str(dbmerror):
                 Console.error("Unsupported cache file format: %s" % self.__file)
                 Console.warn("Recreating cache database...")
-                self.clear()
+                self.recreate()
 
             else:
                 raise dbmerror
 
+        self.__index = jasy.core.Util.getKey(self.__shelve, "jasy-index", {})
+        self.__indexModified = False
 
-    def clear(self):
-        """Clears the cache file(s)"""
 
+    def recreate(self):
+        """Removes all files of the shelve and creates a new empty one."""
+
+        self.close()
+        for fileName in glob.glob("%s*" % self.__file):
+            os.remove(fileName)
+
+        self.__shelve = shelve.open(self.__file, flag="n", protocol=pickle.HIGHEST_PROTOCOL)
+
+
+    def read(self, key):
+        """Returns a tuple of data and validator for the given key or None when the key is unknown."""
+
+        if key in self.__shelve:
+            return self.__shelve[key], jasy.core.Util.getKey(self.__shelve, key + "-timestamp")
+
+        return None
+
+
+    def readValidator(self, key):
+        """Returns the validator of the given key (without loading the data) or None when the key is unknown."""
+
+        if key in self.__shelve:
+            return jasy.core.Util.getKey(self.__shelve, key + "-timestamp")
+
+        return None
+
+
+    def write(self, key, data, validator=None):
+        """Stores the given (serialized) data and its validator under the given key."""
+
+        if validator is not None:
+            self.__shelve[key + "-timestamp"] = validator
+
+        self.__shelve[key] = data
+
+        self.__index[key] = [int(time.time()), len(data)]
+        self.__indexModified = True
+
+
+    def touch(self, key):
+        """Updates the access time of the given key."""
+
+        entry = self.__index.get(key)
+        if entry is not None:
+            entry[0] = int(time.time())
+            self.__indexModified = True
+
+
+    def entries(self):
+        """Returns a list of tuples with key, access time and size of all entries."""
+
+        return [(key, entry[0], entry[1]) for key, entry in self.__index.items()]
+
+
+    def remove(self, keys):
+        """Removes all given keys."""
+
+        for key in keys:
+            self.__index.pop(key, None)
+            for name in (key, key + "-timestamp"):
+                if name in self.__shelve:
+                    del self.__shelve[name]
+
+        self.__indexModified = True
+
+
+    def compact(self):
+        """Gives free space back to the file system (when supported by the dbm implementation)."""
+
+        self.sync()
+
+        reorganize = getattr(getattr(self.__shelve, "dict", None), "reorganize", None)
+        if reorganize is not None:
+            reorganize()
+
+
+    def sync(self):
         if self.__shelve is not None:
-            Console.debug("Closing cache file %s..." % self.__file)
+            if self.__indexModified:
+                self.__shelve["jasy-index"] = self.__index
+                self.__indexModified = False
+
+            self.__shelve.sync()
+
 
+    def close(self):
+        if self.__shelve is not None:
+            self.sync()
             self.__shelve.close()
             self.__shelve = None
 
+
+
+class SqliteEngine:
+
+    """
+    Storage engine based on SQLite.
+
+    Stores value, validator, size and access time of each entry in one row. Uses the WAL journal mode so that
+    multiple Jasy processes are able to read the same cache concurrently. Writes are collected in memory and
+    written in small batches (and on sync/close). The write lock of the database is only held while writing
+    such a batch so that other processes are not blocked between these batches.
+
+    """
+
+    __connection = None
+
+    # Number of writes collected before writing them in one transaction
+    batchSize = 50
+
+    # Seconds after which collected writes are written even when the batch is not full
+    batchTime = 1
+
+    # Seconds to wait for locks held by other processes when opening the database
+    timeout = 60
+
+    # Seconds to wait for other processes writing their batches
+    writeTimeout = 5
+
+    def __init__(self, fileName):
+        self.__file = fileName + ".sqlite"
+        self.__pending = {}
+        self.__pendingSince = None
+        self.__touched = set()
+
+
+    def open(self, recreate=True):
+        """
+        Opens the database and creates the entry table when required.
+
+        Broken databases are recreated once. Raises an IOError when the recreated database can't be opened either.
+
+        """
+
+        try:
+            # Projects are scanned on worker threads (each cache is only used by one thread at a time).
+            # Transactions are controlled by the engine (see __execute()).
+            self.__connection = sqlite3.connect(self.__file, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, validator BLOB, size INTEGER, accessed INTEGER)")
+            self.__connection.execute("PRAGMA busy_timeout=%i" % (self.writeTimeout * 1000))
+
+        except sqlite3.DatabaseError as dberror:
+            if "locked" in str(dberror):
+                raise IOError("Cache file is locked by another process!")
+
+            if not recreate:
+                self.close()
+                raise IOError("Could not create cache database: %s (%s)" % (self.__file, dberror))
+
+            Console.error("Could not open cache database: %s (%s)" % (self.__file, dberror))
+            Console.warn("Recreating cache database...")
+            self.recreate()
+
+
+    def recreate(self):
+        """Removes all files of the database and creates a new empty one."""
+
+        self.close()
+        for fileName in glob.glob("%s*" % self.__file):
+            os.remove(fileName)
+
+        self.open(recreate=False)
+
+
+    def read(self, key):
+        """Returns a tuple of data and validator for the given key or None when the key is unknown."""
+
+        pending = self.__pending.get(key)
+        if pending is not None:
+            return pending
+
+        self.__syncExpired()
+
+        row = self.__connection.execute("SELECT value, validator FROM entries WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        return row[0], pickle.loads(row[1])
+
+
+    def readValidator(self, key):
+        """Returns the validator of the given key (without loading the data) or None when the key is unknown."""
+
+        pending = self.__pending.get(key)
+        if pending is not None:
+            return pending[1]
+
+        row = self.__connection.execute("SELECT validator FROM entries WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        return pickle.loads(row[0])
+
+
+    def write(self, key, data, validator=None):
+        """Stores the given (serialized) data and its validator under the given key."""
+
+        self.__pending[key] = (data, validator)
+        self.__touched.discard(key)
+
+        if self.__pendingSince is None:
+            self.__pendingSince = time.time()
+
+        if len(self.__pending) >= self.batchSize:
+            self.sync()
+        else:
+            self.__syncExpired()
+
+
+    def touch(self, key):
+        """Updates the access time of the given key (written on next sync)."""
+
+        self.__touched.add(key)
+
+
+    def entries(self):
+        """Returns a list of tuples with key, access time and size of all entries."""
+
+        self.sync()
+        return self.__connection.execute("SELECT key, accessed, size FROM entries").fetchall()
+
+
+    def remove(self, keys):
+        """Removes all given keys."""
+
+        for key in keys:
+            self.__pending.pop(key, None)
+
+        self.__touched.difference_update(keys)
+        self.sync()
+
+        self.__execute([("DELETE FROM entries WHERE key=?", [(key,) for key in keys])])
+
+
+    def compact(self):
+        """Gives free space back to the file system."""
+
+        self.sync()
+        self.__connection.execute("VACUUM")
+
+
+    def sync(self):
+        if self.__connection is not None and (self.__pending or self.__touched):
+            now = int(time.time())
+            statements = []
+
+            if self.__pending:
+                statements.append(("INSERT OR REPLACE INTO entries (key, value, validator, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                    [(key, data, pickle.dumps(validator), len(data), now) for key, (data, validator) in self.__pending.items()]))
+
+            if self.__touched:
+                statements.append(("UPDATE entries SET accessed=? WHERE key=?", [(now, key) for key in self.__touched]))
+
+            try:
+                self.__execute(statements)
+            except sqlite3.OperationalError as error:
+                # Other processes might block writing for too long. Caching is not essential, so just continue.
+                Console.warn("Could not store %s cache entries: %s", len(self.__pending), error)
+
+            self.__pending = {}
+            self.__pendingSince = None
+            self.__touched = set()
+
+
+    def close(self):
+        if self.__connection is not None:
+            self.sync()
+            self.__connection.close()
+            self.__connection = None
+
+
+    def __syncExpired(self):
+        """Writes the collected entries when the oldest one is waiting for longer than the batch time."""
+
+        if self.__pendingSince is not None and time.time() - self.__pendingSince >= self.batchTime:
+            self.sync()
+
+
+    def __execute(self, statements):
+        """Executes the given statements (tuples of SQL and a list of parameters) in one short write transaction."""
+
+        connection = self.__connection
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            for statement, parameters in statements:
+                connection.executemany(statement, parameters)
+
+        except:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+
+
+addEngine("shelve", ShelveEngine)
+addEngine("sqlite", SqliteEngine)
+
+
+
+class Cache:
+
+    """
+    A cache class based on exchangeable storage engines (shelve by default, SQLite optionally).
+
+    Supports transient in-memory
+    storage, too. Uses memory storage for caching requests to DB as well for
+    improved performance. Uses keys for identification of entries like a normal
+    hash table / dictionary.
+
+    The in-memory layer is limited by number of entries and estimated size using
+    separate pools for syntax trees and all other (typically small) values.
+
+    """
+
+    __engine = None
+
+    def __init__(self, path, filename="jasycache", hashkeys=False, engine="shelve", memory=None, compression=None, shared=False):
+        self.__compression = dict(compressionPolicy)
+        if compression:
+            self.__compression.update(compression)
+
+        self.__transient = {}
+        for pool in memoryLimits:
+            limits = dict(memoryLimits[pool])
+            if memory and pool in memory:
+                limits.update(memory[pool])
+
+            self.__transient[pool] = LruStore(limits["entries"], limits["size"])
+
+        self.__file = os.path.join(path, filename)
+        self.__hashkeys = hashkeys
+        self.__shared = shared
+
+        if engine not in engines:
+            raise UserError("Unsupported cache engine: %s" % engine)
+
+        self.__engineClass = engines[engine]
+
+        self.open()
+
+        # Be sure to correctly write down and close cache file on exit
+        atexit.register(self.close)
+
+
+    def open(self):
+        """Opens a cache file in the given path."""
+
+        self.__engine = self.__engineClass(self.__file)
+        self.__engine.open()
+
+        storedVersion = self.__readMeta("jasy-version")
+        storedHost = self.__readMeta("jasy-host")
+        storedFormat = self.__readMeta("jasy-format")
+
+        # Shared caches are used by different Jasy versions at the same time. These keep the version in their keys instead.
+        if self.__shared and storedFormat == storageFormat:
+            return
+
+        if storedVersion == jasy.__version__ and storedHost == hostId and storedFormat == storageFormat:
+            return
+
+        if storedVersion is not None or storedHost is not None:
+            Console.debug("Jasy version, host or cache format has been changed. Recreating cache...")
+
+        self.clear()
+
+        self.__engine = self.__engineClass(self.__file)
+        self.__engine.open()
+        self.__engine.write("jasy-version", encode(jasy.__version__, None))
+        self.__engine.write("jasy-host", encode(hostId, None))
+        self.__engine.write("jasy-format", encode(storageFormat, None))
+
+        # Other processes opening the same cache have to see the new version immediately
+        self.__engine.sync()
+
+
+    def __getPool(self, key):
+        """Returns the in-memory pool responsible for the given (original) key."""
+
+        if getNamespace(key) in treeNamespaces:
+            return self.__transient["tree"]
+
+        return self.__transient["default"]
+
+
+    def __getCompression(self, key):
+        """Returns the compression method for the given (original) key."""
+
+        namespace = getNamespace(key)
+        if namespace in self.__compression:
+            return self.__compression[namespace]
+
+        return defaultCompression
+
+
+    def __readMeta(self, key):
+        entry = self.__engine.read(key)
+        if entry is None:
+            return None
+
+        try:
+            return decode(entry[0])
+        except Exception:
+            return None
+
+
+    def clear(self):
+        """Clears the cache file(s)"""
+
+        if self.__engine is not None:
+            Console.debug("Closing cache file %s..." % self.__file)
+
+            self.__engine.close()
+            self.__engine = None
+
         for fileName in glob.glob("%s*" % self.__file):
             Console.debug("Clearing cache file %s..." % fileName)
             os.remove(fileName)
@@ -116,31 +816,62 @@ class Cache:
 
         """
 
+        pool = self.__getPool(key)
+        counters = getCounters(key)
+        counters["reads"] += 1
+
         if self.__hashkeys:
             key = hashlib.sha1(key.encode("ascii")).hexdigest()
 
-        if key in self.__transient:
-            return self.__transient[key]
+        # Only count a pool miss when the value is not on disk either
+        value = pool.get(key, countMiss=False)
+        if value is not None:
+            counters["memoryHits"] += 1
+            return value
 
-        timeKey = key + "-timestamp"
-        if key in self.__shelve and timeKey in self.__shelve:
-            if not timestamp or timestamp == self.__shelve[timeKey]:
-                value = self.__shelve[key]
+        entry = self.__engine.read(key)
+        if entry is not None:
+            data, validator = entry
+            if validator is not None and (not timestamp or timestamp == validator):
 
                 # Useful to debug serialized size. Often a performance
                 # issue when data gets to big.
-                # rePacked = pickle.dumps(value)
-                # print("LEN: %s = %s" % (key, len(rePacked)))
+                # print("LEN: %s = %s" % (key, len(data)))
+
+                start = time.perf_counter()
+                value = decode(data)
+                counters["serializeTime"] += time.perf_counter() - start
+                counters["bytesRead"] += len(data)
+                counters["diskHits"] += 1
+
+                self.__engine.touch(key)
 
                 # Copy over value to in-memory cache
                 if inMemory:
-                    self.__transient[key] = value
+                    pool.set(key, value)
 
                 return value
 
+        pool.addMiss()
+        counters["misses"] += 1
         return None
 
 
+    def contains(self, key, timestamp=None):
+        """Whether a valid value is stored for the given key (same rules as read() but without loading the value)."""
+
+        pool = self.__getPool(key)
+
+        if self.__hashkeys:
+            key = hashlib.sha1(key.encode("ascii")).hexdigest()
+
+        if key in pool:
+            return True
+
+        validator = self.__engine.readValidator(key)
+        return validator is not None and (not timestamp or timestamp == validator)
+
+
     def store(self, key, value, timestamp=None, transient=False, inMemory=True):
         """
         Stores the given value.
@@ -151,11 +882,16 @@ class Cache:
 
         """
 
+        pool = self.__getPool(key)
+        compression = self.__getCompression(key)
+        counters = getCounters(key)
+        counters["stores"] += 1
+
         if self.__hashkeys:
             key = hashlib.sha1(key.encode("ascii")).hexdigest()
 
         if inMemory:
-            self.__transient[key] = value
+            pool.set(key, value)
 
         if transient:
             return
@@ -164,22 +900,112 @@ class Cache:
             timestamp = time.time()
 
         try:
-            self.__shelve[key + "-timestamp"] = timestamp
-            self.__shelve[key] = value
-        except pickle.PicklingError as err:
+            start = time.perf_counter()
+            data = encode(value, compression)
+            counters["serializeTime"] += time.perf_counter() - start
+            counters["bytesWritten"] += len(data)
+
+            self.__engine.write(key, data, timestamp)
+        except (pickle.PicklingError, TreeCodec.CodecError) as err:
             Console.error("Failed to store enty: %s" % key)
 
+        # Shared caches are used by other processes concurrently. Don't block them by pending transactions.
+        if self.__shared:
+            self.__engine.sync()
+
+
+    def collectGarbage(self, maxAge=None, maxSize=None, isValid=None):
+        """
+        Removes stale entries from the storage.
+
+        - maxAge: Removes entries not accessed within the given number of seconds
+        - maxSize: Removes least recently accessed entries until the total size of all entries fits into the given number of bytes
+        - isValid: Callback which is called with the key of every entry. Entries are removed when it returns False.
+
+        Returns a tuple with the number of entries and bytes removed.
+
+        """
+
+        if self.__engine is None:
+            return 0, 0
+
+        now = time.time()
+        removed = set()
+        remaining = []
+        removedSize = 0
+
+        for key, accessed, size in self.__engine.entries():
+            # Internal meta data
+            if key.startswith("jasy-"):
+                continue
+
+            if (maxAge is not None and (accessed or 0) < now - maxAge) or (isValid is not None and not isValid(key)):
+                removed.add(key)
+                removedSize += size or 0
+            else:
+                remaining.append((accessed or 0, key, size or 0))
+
+        total = removedSize + sum([entry[2] for entry in remaining])
+
+        if maxSize is not None:
+            remaining.sort(reverse=True)
+            kept = 0
+            for accessed, key, size in remaining:
+                kept += size
+                if kept > maxSize:
+                    removed.add(key)
+                    removedSize += size
+
+        if removed:
+            Console.debug("Removing %s entries (%s bytes) from cache %s...", len(removed), removedSize, self.__file)
+            self.__engine.remove(removed)
+
+            # Only worth giving space back when a larger part of the cache was removed
+            if removedSize > total * 0.1:
+                self.__engine.compact()
+
+            for pool in self.__transient.values():
+                for key in removed:
+                    pool.remove(key)
+
+        return len(removed), removedSize
+
+
+    def discard(self, ids):
+        """
+        Removes all in-memory entries of the given item IDs e.g. script:tree[core.Main].
+
+        In-memory entries are not checked against validators. Long running sessions use this to
+        drop them when the underlying files are modified. Entries on disk are kept as these are
+        validated on read anyway.
+
+        """
+
+        ids = set(ids)
+        for pool in self.__transient.values():
+            for key in pool.keys():
+                start = key.find("[")
+                end = key.find("]", start)
+                if start != -1 and end != -1 and key[start + 1:end] in ids:
+                    pool.remove(key)
+
+
+    def getMemoryStatistics(self):
+        """Returns usage and hit/miss/eviction counters of the in-memory pools."""
+
+        return {pool: self.__transient[pool].getStatistics() for pool in self.__transient}
+
 
     def sync(self):
         """Syncs the internal storage database."""
 
-        if self.__shelve is not None:
-            self.__shelve.sync()
+        if self.__engine is not None:
+            self.__engine.sync()
 
 
     def close(self):
         """Closes the internal storage database."""
 
-        if self.__shelve is not None:
-            self.__shelve.close()
-            self.__shelve = None
+        if self.__engine is not None:
+            self.__engine.close()
+            self.__engine = None
@@ -0,0 +1,193 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Dependency graph of items which is shared by all resolvers and sorters of a session.
+
+Nodes of the graph are items. The outgoing edges of every item are computed once per
+filtered permutation (only the fields accessed by the item) against the full set of
+available items and are stored in the project cache. Resolvers and sorters are only
+resolving these edges against their set of items.
+"""
+
+import jasy.core.Console as Console
+import jasy.core.IdIndex as IdIndex
+import jasy.core.Util as Util
+
+
+def getSignature(items):
+    """Returns a checksum of the IDs of the given items. Stored edges are only valid for the same set of items."""
+
+    return Util.generateChecksum("\n".join(sorted(items)))
+
+
+
+class Edges(object):
+
+    """
+    Outgoing edges of an item for one (filtered) permutation.
+
+    Only contains IDs and field names, so that instances are independent of the item instances
+    and can be stored in the cache.
+
+    """
+
+    __slots__ = ["requires", "packages", "optionals", "fields", "breaks", "missingRequires", "missingOptionals", "missingBreaks"]
+
+    def __init__(self):
+        # IDs of required items (explicit names, wildcards, shared names)
+        self.requires = set()
+
+        # Candidates for every accessed package (longest name first). The first available one is used.
+        self.packages = []
+
+        # IDs of items which are removed from the dependencies again
+        self.optionals = set()
+
+        # Fields which are accessed but not permutated. Require the detection class of the field.
+        self.fields = []
+
+        # IDs of down-priorized dependencies
+        self.breaks = set()
+
+        # Unknown names (for warnings)
+        self.missingRequires = []
+        self.missingOptionals = []
+        self.missingBreaks = []
+
+
+
+class DependencyGraph(object):
+
+    """
+    Dependency graph of the given items (dictionary of IDs and items, typically all scripts or all styles
+    of the session). Use Session.getDependencyGraph() to get the instance which is shared during a build.
+
+    """
+
+    def __init__(self, items):
+        self.__items = items
+        self.__signature = getSignature(items)
+        self.__index = None
+        self.__edges = {}
+
+
+    def getItems(self):
+        """Returns the dictionary of all items of the graph."""
+
+        return self.__items
+
+
+    def getIndex(self):
+        """Returns the IdIndex of all items of the graph which is used for matching wildcards."""
+
+        if self.__index is None:
+            self.__index = IdIndex.IdIndex(self.__items)
+
+        return self.__index
+
+
+    def getSignature(self):
+        """Returns the signature of the items of the graph (see getSignature())."""
+
+        return self.__signature
+
+
+    def getEdges(self, item, permutation=None):
+        """
+        Returns the Edges of the given item for the given permutation.
+
+        Items which are not part of the graph (e.g. generated virtual items) are resolved against the items of
+        the graph as well. Their edges are not stored in the project cache.
+
+        """
+
+        permutation = item.filterPermutation(permutation)
+        key = (item.getId(), item.getValidator(), str(permutation))
+
+        edges = self.__edges.get(key)
+        if edges is None:
+            signature = self.__signature if self.__items.get(item.getId()) is item else None
+            edges = self.__edges[key] = item.getEdges(permutation, self.__items, signature, self.getIndex())
+
+        return edges
+
+
+    def getDependencies(self, item, permutation=None, items=None, fields=None, warnings=False):
+        """
+        Returns the set of dependencies of the given item.
+
+        Dependencies are limited to the given items (defaults to all items of the graph). Fields maps field
+        names to the items which are required for detecting fields which are not permutated.
+
+        """
+
+        return resolveDependencies(item, self.getEdges(item, permutation), self.__items if items is None else items, fields, warnings)
+
+
+    def getBreaks(self, item, permutation=None, items=None, warnings=False):
+        """Returns the set of down-priorized dependencies of the given item (limited to the given items)."""
+
+        return resolveBreaks(item, self.getEdges(item, permutation), self.__items if items is None else items, warnings)
+
+
+    def getClosure(self, roots, permutation=None, fields=None, warnings=True):
+        """Returns the set of the given items and all their (transitive) dependencies."""
+
+        result = set(roots)
+        pending = list(result)
+
+        while pending:
+            for dependency in self.getDependencies(pending.pop(), permutation, fields=fields, warnings=warnings):
+                if dependency not in result:
+                    result.add(dependency)
+                    pending.append(dependency)
+
+        return result
+
+
+
+def resolveDependencies(item, edges, items, fields=None, warnings=False):
+    """Returns the set of dependencies of the given item using its Edges and the given dictionary of available items."""
+
+    result = set()
+
+    if fields:
+        for fieldName in edges.fields:
+            if fieldName in fields:
+                result.add(fields[fieldName])
+
+    for itemId in edges.requires:
+        if itemId in items:
+            result.add(items[itemId])
+
+    for candidates in edges.packages:
+        for itemId in candidates:
+            if itemId in items:
+                result.add(items[itemId])
+                break
+
+    for itemId in edges.optionals:
+        if itemId in items:
+            result.discard(items[itemId])
+
+    if warnings:
+        for name in edges.missingRequires:
+            Console.warn("Missing item (required): %s in %s", name, item.getId())
+
+        for name in edges.missingOptionals:
+            Console.warn("Missing item (optional): %s in %s", name, item.getId())
+
+    return result
+
+
+def resolveBreaks(item, edges, items, warnings=False):
+    """Returns the set of down-priorized dependencies of the given item using its Edges and the given dictionary of available items."""
+
+    if warnings:
+        for name in edges.missingBreaks:
+            Console.warn("Missing item (break): %s in %s", name, item.getId())
+
+    return set([items[itemId] for itemId in edges.breaks if itemId in items])
@@ -150,7 +150,12 @@ class FileManager:
 
 
     def writeFile(self, dst, content):
-        """Writes the content to the destination file name."""
+        """
+        Writes the content to the destination file name.
+
+        The content is either a string or an iterable of strings which are written one after another.
+
+        """
 
         if self.__profile:
             dst = self.__profile.expandFileName(dst)
@@ -160,5 +165,8 @@ class FileManager:
 
         # Open file handle and write
         handle = open(dst, mode="w", encoding="utf-8")
-        handle.write(content)
+        if isinstance(content, str):
+            handle.write(content)
+        else:
+            handle.writelines(content)
         handle.close()
@@ -0,0 +1,99 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Sorted index of item IDs for answering wildcard queries (fnmatch syntax) like "core.*".
+
+Only the IDs sharing the literal prefix of the pattern are tested against the compiled
+pattern instead of all IDs. Compiled patterns are shared by all indexes.
+"""
+
+import bisect
+import fnmatch
+import re
+
+
+__all__ = ("IdIndex", "compilePattern", "getPrefix")
+
+
+__patterns = {}
+
+
+def compilePattern(pattern):
+    """Returns the compiled regular expression of the given wildcard pattern (memoized)."""
+
+    compiled = __patterns.get(pattern)
+    if compiled is None:
+        compiled = __patterns[pattern] = re.compile(fnmatch.translate(pattern))
+
+    return compiled
+
+
+def getPrefix(pattern):
+    """Returns the literal part of the given wildcard pattern in front of the first special character."""
+
+    for pos, char in enumerate(pattern):
+        if char in "*?[":
+            return pattern[:pos]
+
+    return pattern
+
+
+
+class IdIndex(object):
+
+    """
+    Index of the given IDs (any iterable e.g. a dictionary of items).
+
+    The index is not updated when the IDs are modified afterwards.
+
+    """
+
+    __slots__ = ["__ids", "__known", "__matches"]
+
+
+    def __init__(self, ids):
+        self.__ids = sorted(ids)
+        self.__known = set(self.__ids)
+        self.__matches = {}
+
+
+    def __len__(self):
+        return len(self.__ids)
+
+
+    def __contains__(self, itemId):
+        return itemId in self.__known
+
+
+    def getRange(self, prefix):
+        """Returns the sorted list of all IDs starting with the given prefix."""
+
+        ids = self.__ids
+        start = bisect.bisect_left(ids, prefix)
+        end = start
+
+        while end < len(ids) and ids[end].startswith(prefix):
+            end += 1
+
+        return ids[start:end]
+
+
+    def match(self, pattern):
+        """Returns the sorted list of all IDs matching the given wildcard pattern (results are memoized)."""
+
+        result = self.__matches.get(pattern)
+        if result is not None:
+            return result
+
+        prefix = getPrefix(pattern)
+        if prefix == pattern:
+            result = [pattern] if pattern in self.__known else []
+        else:
+            matcher = compilePattern(pattern).match
+            result = [itemId for itemId in self.getRange(prefix) if matcher(itemId)]
+
+        self.__matches[pattern] = result
+        return result
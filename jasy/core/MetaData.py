@@ -4,6 +4,8 @@
 # Copyright 2013-2014 Sebastian Werner
 #
 
+import jasy.parse.CompactTree as CompactTree
+
 
 class MetaData(object):
 
@@ -27,7 +29,10 @@ class MetaData(object):
         self.breaks = set()
         self.assets = set()
 
-        self.parse(tree)
+        if isinstance(tree, CompactTree.CompactTree):
+            self.parseCompact(tree)
+        else:
+            self.parse(tree)
 
 
     def parse(self, node):
@@ -35,53 +40,66 @@ class MetaData(object):
 
         # Parse meta
         if node.type == "meta":
+            self.addMeta(node.name, node[0].value)
 
-            child = node[0]
-            value = child.value
+        # Parse comments
+        comments = getattr(node, "comments", None)
+        if comments:
+            for comment in comments:
+                self.addTags(comment.getTags())
 
-            if node.name == "require":
-                self.requires.add(value)
+        # Process children
+        for child in node:
+            if child is not None:
+                self.parse(child)
 
-            if node.name == "load":
-                self.requires.add(value)
-                self.breaks.add(value)
 
-            if node.name == "optional":
-                self.optionals.add(value)
+    def parseCompact(self, tree):
+        """Same as parse() but reads the data directly from a CompactTree without converting it into nodes."""
 
-            if node.name == "break":
-                self.breaks.add(value)
+        for index in tree.findAll("meta"):
+            self.addMeta(tree.getAttribute(index, "name"), tree.getAttribute(index + 1, "value"))
 
-            if node.name == "asset":
-                self.assets.add(value)
+        for comments in tree.comments.values():
+            for comment in comments:
+                self.addTags(comment.getTags())
 
 
-        # Parse comments
-        comments = getattr(node, "comments", None)
-        if comments:
-            for comment in comments:
-                commentTags = comment.getTags()
-                if commentTags:
+    def addMeta(self, name, value):
+        if name == "require":
+            self.requires.add(value)
 
-                    if "require" in commentTags:
-                        self.requires.update(commentTags["require"])
+        if name == "load":
+            self.requires.add(value)
+            self.breaks.add(value)
 
-                    if "load" in commentTags:
-                        # load is a special combination shorthand for requires + breaks
-                        # This means load it but don't require it being loaded first
-                        self.requires.update(commentTags["load"])
-                        self.breaks.update(commentTags["load"])
+        if name == "optional":
+            self.optionals.add(value)
 
-                    if "optional" in commentTags:
-                        self.optionals.update(commentTags["optional"])
+        if name == "break":
+            self.breaks.add(value)
 
-                    if "break" in commentTags:
-                        self.breaks.update(commentTags["break"])
+        if name == "asset":
+            self.assets.add(value)
 
-                    if "asset" in commentTags:
-                        self.assets.update(commentTags["asset"])
 
-        # Process children
-        for child in node:
-            if child is not None:
-                self.parse(child)
+    def addTags(self, commentTags):
+        if commentTags:
+
+            if "require" in commentTags:
+                self.requires.update(commentTags["require"])
+
+            if "load" in commentTags:
+                # load is a special combination shorthand for requires + breaks
+                # This means load it but don't require it being loaded first
+                self.requires.update(commentTags["load"])
+                self.breaks.update(commentTags["load"])
+
+            if "optional" in commentTags:
+                self.optionals.update(commentTags["optional"])
+
+            if "break" in commentTags:
+                self.breaks.update(commentTags["break"])
+
+            if "asset" in commentTags:
+                self.assets.update(commentTags["asset"])
@@ -373,6 +373,12 @@ class Profile():
     def setUseSource(self, enable):
         return self.setFlag("use-source", enable)
 
+    def getSourceMaps(self):
+        return self.getFlag("source-maps")
+
+    def setSourceMaps(self, enable):
+        return self.setFlag("source-maps", enable)
+
 
 
 
@@ -8,12 +8,14 @@ import os
 import re
 import fnmatch
 import copy
+import time
 
 import jasy.core.Cache
 import jasy.core.Config as Config
 import jasy.core.File as File
 import jasy.core.Console as Console
 import jasy.core.Util as Util
+import jasy.item.Abstract as AbstractItem
 
 import jasy.vcs.Repository as Repository
 
@@ -199,7 +201,10 @@ class Project():
         # Initialize cache
         try:
             File.mkdir(os.path.join(self.__path, ".jasy"))
-            self.__cache = jasy.core.Cache.Cache(self.__path, filename=".jasy/cache")
+            self.__cache = jasy.core.Cache.Cache(self.__path, filename=".jasy/cache",
+                engine=self.__config.get("cache.engine", "shelve"),
+                memory=self.__config.get("cache.memory"),
+                compression=self.__config.get("cache.compression"))
         except IOError as err:
             raise UserError("Could not initialize project. Cache file in %s could not be initialized! %s" % (self.__path, err))
 
@@ -225,6 +230,11 @@ class Project():
 
         # Read setup for running command pre-scan
         self.__setup = self.__config.get("setup")
+        self.__prepared = False
+
+        # Whether cache entries of items are validated by content digest instead of modification time.
+        # Useful for CI systems where every job starts with a fresh checkout and a restored cache.
+        self.__contentValidation = self.__config.get("cache.validation", "mtime") == "content"
 
 
 
@@ -232,24 +242,18 @@ class Project():
     # Project Scan/Init
     #
 
-    def scan(self):
+    def prepare(self):
+        """Executes the setup commands of the project (only when the project was modified)."""
 
-        if self.scanned:
+        if self.__prepared:
             return
 
-        updatemsg = "[updated]" if self.__modified else "[cached]"
-
-        if self.version:
-            Console.info("Scanning %s @ %s %s...", Console.colorize(self.getName(), "bold"), Console.colorize(self.version, "magenta"), Console.colorize(updatemsg, "grey"))
-        else:
-            Console.info("Scanning %s %s...", Console.colorize(self.getName(), "bold"), Console.colorize(updatemsg, "grey"))
-
-        Console.indent()
+        self.__prepared = True
 
         # Support for pre-initialize projects...
         setup = self.__setup
         if setup and self.__modified:
-            Console.info("Running setup...")
+            Console.info("Running setup of %s...", Console.colorize(self.getName(), "bold"))
             Console.indent()
 
             for cmd in setup:
@@ -267,33 +271,85 @@ class Project():
 
             Console.outdent()
 
+
+    def collect(self, paths=None):
+        """
+        Collects all files matching the scan configuration of the project.
+
+        Returns a list of (relPath, fullPath, type, package, stat) tuples or None for projects
+        with manual content. Only touches the file system and the project cache so that the
+        files of multiple projects can be collected in parallel.
+
+        Only collects files at or below the given (full) paths when given e.g. the files reported by
+        a file system watcher. Deleted paths are ignored.
+
+        """
+
+        if self.__config.has("content"):
+            return None
+
+        # Read scan path from config
+        if not self.__config.has("scan"):
+            if self.__hasDir("source"):
+                self.kind = "application"
+                scan = self.__resolveScanConfig(structures[self.kind])
+            elif self.__hasDir("src"):
+                self.kind = "resource"
+                scan = self.__resolveScanConfig(structures[self.kind])
+            else:
+                self.kind = "flat"
+                scan = self.__resolveScanConfig(structures[self.kind])
+
+        else:
+            scan = self.__resolveScanConfig(self.__config.get("scan"))
+
+        self.__scanStart = time.time()
+        index = self.__cache.read("project[dirindex]") or {}
+        updatedIndex = {}
+
+        files = []
+        for config in scan:
+            directories = [config["paths"]] if isinstance(config["paths"], str) else config["paths"]
+            for directory in directories:
+                if paths is None:
+                    self.__collectDir(directory, config["regex"], config["type"], config["package"], files, index, updatedIndex)
+                else:
+                    self.__collectPaths(directory, config["regex"], config["type"], config["package"], paths, files, index, updatedIndex)
+
+        # Partial collections are not covering all directories of the index
+        if paths is None and updatedIndex != index:
+            self.__cache.store("project[dirindex]", updatedIndex)
+
+        return files
+
+
+    def scan(self, files=None):
+        """Scans the project and registers all its items. Uses the given result of collect() when available."""
+
+        if self.scanned:
+            return
+
+        self.prepare()
+
+        updatemsg = "[updated]" if self.__modified else "[cached]"
+
+        if self.version:
+            Console.info("Scanning %s @ %s %s...", Console.colorize(self.getName(), "bold"), Console.colorize(self.version, "magenta"), Console.colorize(updatemsg, "grey"))
+        else:
+            Console.info("Scanning %s %s...", Console.colorize(self.getName(), "bold"), Console.colorize(updatemsg, "grey"))
+
+        Console.indent()
+
         # Processing custom content section. Only supports classes and assets.
         if self.__config.has("content"):
             self.kind = "manual"
             self.__addContent(self.__config.get("content"))
 
         else:
-            # Read scan path from config
-            if not self.__config.has("scan"):
-                if self.__hasDir("source"):
-                    self.kind = "application"
-                    scan = self.__resolveScanConfig(structures[self.kind])
-                elif self.__hasDir("src"):
-                    self.kind = "resource"
-                    scan = self.__resolveScanConfig(structures[self.kind])
-                else:
-                    self.kind = "flat"
-                    scan = self.__resolveScanConfig(structures[self.kind])
-
-            else:
-                scan = self.__resolveScanConfig(self.__config.get("scan"))
+            if files is None:
+                files = self.collect()
 
-            for config in scan:
-                if isinstance(config["paths"], str):
-                    self.__addDir(config["paths"], config["regex"], config["type"], config["package"])
-                else:
-                    for path in config["paths"]:
-                        self.__addDir(path, config["regex"], config["type"], config["package"])
+            self.__addFiles(files)
 
         # Generate summary
         summary = []
@@ -313,6 +369,78 @@ class Project():
 
 
 
+    def refresh(self, paths=None):
+        """
+        Updates the items of the scanned project in place.
+
+        Adds new files, re-attaches modified ones and removes deleted ones. Drops the in-memory cache
+        entries of all these items. Returns the list of modified items.
+
+        Only checks the files at or below the given (full) paths when given. Otherwise (e.g. after the
+        event queue of the watcher overflowed) all files of the project are checked.
+
+        """
+
+        if not self.scanned:
+            return []
+
+        modified = []
+        files = self.collect(paths)
+
+        # Projects with manual content are composed from a fixed list of files
+        if files is None:
+            for itemType in self.items:
+                for item in self.items[itemType].values():
+                    if (paths is None or self.__isAffected(item.getPath(), paths)) and item.refresh():
+                        modified.append(item)
+
+        else:
+            known = {}
+            for itemType in self.items:
+                for item in self.items[itemType].values():
+                    if paths is None or self.__isAffected(item.getPath(), paths):
+                        known[(itemType, item.getPath())] = item
+
+            seen = set()
+            for relPath, fullPath, itemType, package, stat in files:
+                if (itemType, fullPath) in seen:
+                    continue
+
+                seen.add((itemType, fullPath))
+
+                item = known.get((itemType, fullPath))
+                if item is None:
+                    Console.debug("Adding %s %s", itemType, relPath)
+                    modified.append(self.addFile(relPath, fullPath, itemType, package, stat=stat))
+                elif item.refresh(stat):
+                    Console.debug("Updating %s %s", itemType, item.getId())
+                    modified.append(item)
+
+            for key in known:
+                if key not in seen:
+                    item = known[key]
+                    Console.debug("Removing %s %s", key[0], item.getId())
+                    del self.items[key[0]][item.getId()]
+                    modified.append(item)
+
+        if modified:
+            self.__cache.discard([item.getId() for item in modified])
+
+        return modified
+
+
+    def __isAffected(self, path, paths):
+        """Whether the given item path (or list of paths) is identical to or located below any of the given paths."""
+
+        for entry in path if isinstance(path, list) else [path]:
+            for changed in paths:
+                if entry == changed or entry.startswith(changed.rstrip(os.sep) + os.sep):
+                    return True
+
+        return False
+
+
+
     def __createPathRe(self, path):
         if not "{" in path:
             return fnmatch.translate(path), os.path.dirname(path)
@@ -441,47 +569,169 @@ class Project():
         Console.outdent()
 
 
-    def __addDir(self, directory, regex, type, package):
+    def __listDir(self, dirPath, index, updatedIndex):
+        """
+        Returns the sorted list of (name, isDir) entries of the given directory.
+
+        Listings are reused from the directory index as long as the modification time of the directory is
+        unchanged (adding, removing or renaming entries modifies it). Also returns the DirEntry objects
+        of freshly listed directories (or None) to reuse their stat results.
+
+        """
+
+        mtime = os.stat(dirPath).st_mtime
+        cached = index.get(dirPath)
+        if cached and cached[0] == mtime:
+            updatedIndex[dirPath] = cached
+            return cached[1], None
+
+        entries = []
+        dirEntries = {}
+
+        with os.scandir(dirPath) as iterator:
+            for dirEntry in iterator:
+                # Filter dotted files and directories like .git, .bzr, .hg, .svn, etc.
+                if dirEntry.name.startswith("."):
+                    continue
+
+                if dirEntry.is_dir(follow_symlinks=False):
+                    entries.append((dirEntry.name, True))
+
+                # Symbolic links to directories are not followed (like os.walk does by default)
+                elif not dirEntry.is_dir():
+                    entries.append((dirEntry.name, False))
+                    dirEntries[dirEntry.name] = dirEntry
+
+        entries.sort()
+
+        # Directories modified in the last moments might be modified again with the same timestamp
+        if mtime < self.__scanStart - 2:
+            updatedIndex[dirPath] = (mtime, entries)
+
+        return entries, dirEntries
+
+
+    def __collectDir(self, directory, regex, type, package, files, index, updatedIndex, subPath=""):
         check = re.compile(regex)
 
-        path = os.path.join(self.__path, directory)
-        if not os.path.exists(path):
+        path = os.path.join(self.__path, directory, subPath) if subPath else os.path.join(self.__path, directory)
+        if not os.path.isdir(path):
             return
 
-        Console.debug("Scanning directory: %s" % directory)
-        Console.indent()
-
-        for dirPath, dirNames, fileNames in os.walk(path):
-            for dirName in dirNames:
-                # Filter dotted directories like .git, .bzr, .hg, .svn, etc.
-                if dirName.startswith("."):
-                    dirNames.remove(dirName)
+        # Stack of (dirPath, relDirPath)
+        stack = [(path, subPath)]
+        while stack:
+            dirPath, relDirPath = stack.pop()
+            entries, dirEntries = self.__listDir(dirPath, index, updatedIndex)
 
-            relDirPath = os.path.relpath(dirPath, path)
+            subDirs = []
+            for name, isDir in entries:
+                relPath = relDirPath + "/" + name if relDirPath else name
 
-            for fileName in fileNames:
+                if isDir:
+                    subDirs.append((os.path.join(dirPath, name), relPath))
+                    continue
 
-                if fileName[0] == ".":
+                if not check.match(os.path.join(directory, relPath).replace(os.sep, "/")):
                     continue
 
-                relPath = os.path.normpath(os.path.join(relDirPath, fileName)).replace(os.sep, "/")
+                fullPath = os.path.join(dirPath, name)
 
-                if not check.match(os.path.join(directory, relPath).replace(os.sep, "/")):
+                try:
+                    stat = dirEntries[name].stat() if dirEntries is not None else os.stat(fullPath)
+                except OSError:
+                    raise UserError("Invalid item path: %s" % fullPath)
+
+                files.append((relPath, fullPath, type, package, stat))
+
+            # Process sub directories in alphabetical order
+            stack.extend(reversed(subDirs))
+
+
+    def __collectPaths(self, directory, regex, type, package, paths, files, index, updatedIndex):
+        """Collects the files at or below the given paths which are located in the given scan directory."""
+
+        base = os.path.join(self.__path, directory).rstrip(os.sep)
+
+        for path in paths:
+            path = path.rstrip(os.sep)
+
+            # Path contains the whole scan directory
+            if path == base or base.startswith(path + os.sep):
+                self.__collectDir(directory, regex, type, package, files, index, updatedIndex)
+                return
+
+            if not path.startswith(base + os.sep):
+                continue
+
+            relPath = path[len(base) + 1:].replace(os.sep, "/")
+
+            # Filter dotted files and directories like .git, .bzr, .hg, .svn, etc.
+            if any([name.startswith(".") for name in relPath.split("/")]):
+                continue
+
+            if os.path.isdir(path):
+                if not os.path.islink(path):
+                    self.__collectDir(directory, regex, type, package, files, index, updatedIndex, relPath)
+
+            elif os.path.exists(path) and re.match(regex, os.path.join(directory, relPath).replace(os.sep, "/")):
+                try:
+                    stat = os.stat(path)
+                except OSError:
                     continue
 
-                fullPath = os.path.join(dirPath, fileName)
-                self.addFile(relPath, fullPath, type, package)
+                files.append((relPath, path, type, package, stat))
 
-        Console.outdent()
 
+    def __addFiles(self, files):
+        """
+        Registers the given collected files.
+
+        The registry of the previous run (type, package, file system signature, ID and state of every item)
+        is stored in the project cache. Items of unchanged files are restored from it instead of being rebuilt.
+
+        """
+
+        registry = self.__cache.read("project[registry]") or {}
+        updatedRegistry = {}
+        restored = 0
+
+        for relPath, fullPath, itemType, package, stat in files:
+            signature = AbstractItem.getSignature(stat)
+
+            entry = registry.get(fullPath)
+            if entry is not None and entry[0] == itemType and entry[1] == package and entry[2] == signature:
+                item = self.addFile(relPath, fullPath, itemType, package, stat=stat, cached=entry[3:])
+                restored += 1
+            else:
+                item = self.addFile(relPath, fullPath, itemType, package, stat=stat)
+
+            updatedRegistry[fullPath] = (itemType, package, signature, item.getId(), item.getState())
+
+        Console.debug("Restored %s of %s items from registry", restored, len(updatedRegistry))
+
+        if restored != len(updatedRegistry) or len(registry) != len(updatedRegistry):
+            self.__cache.store("project[registry]", updatedRegistry)
 
-    def addFile(self, relPath, fullPath, itemType, package, override=False):
+
+    def addFile(self, relPath, fullPath, itemType, package, override=False, stat=None, cached=None):
+        """
+        Registers the file as an item of the given type. Returns the item.
+
+        - stat: Stat result of the file when already known
+        - cached: ID and state of the item from the registry of the previous run
+
+        """
 
         fileName = os.path.basename(relPath)
         fileExtension = os.path.splitext(fileName)[1]
 
         name, construct = self.__resolveConstructor(itemType)
-        item = construct.fromPath(self, relPath, package).attach(fullPath)
+        if cached is not None:
+            item = construct(self, cached[0]).restore(fullPath, stat, cached[1])
+        else:
+            item = construct.fromPath(self, relPath, package).attach(fullPath, stat)
+
         fileId = item.getId()
         Console.debug("Registering %s %s" % (item.kind, fileId))
 
@@ -494,6 +744,8 @@ class Project():
 
         self.items[itemType][fileId] = item
 
+        return item
+
 
 
     #
@@ -641,12 +893,56 @@ class Project():
 
         return self.__cache
 
+    def hasContentValidation(self):
+        """Whether cache entries of items should be validated by content digest instead of modification time."""
+
+        return self.__contentValidation
+
     def clean(self):
         """Clears the cache of the project."""
 
         Console.info("Clearing cache of %s..." % self.__name)
         self.__cache.clear()
 
+    def collectGarbage(self, maxAge=None, maxSize=None, dropUnknown=True):
+        """
+        Removes outdated entries from the cache of the project.
+
+        - maxAge: Maximum age (in days) since the last access of an entry. Defaults to cache.maxAge of the project config (30 days).
+        - maxSize: Maximum size (in MB) of all entries. Defaults to cache.maxSize of the project config (1024 MB).
+        - dropUnknown: Whether to remove entries of items which do not exist anymore (requires a scanned project).
+
+        """
+
+        if maxAge is None:
+            maxAge = self.__config.get("cache.maxAge", 30)
+
+        if maxSize is None:
+            maxSize = self.__config.get("cache.maxSize", 1024)
+
+        isValid = None
+        if dropUnknown and self.scanned:
+            knownIds = set()
+            for itemType in self.items:
+                knownIds.update(self.items[itemType])
+
+            def isValid(key):
+                namespace = jasy.core.Cache.getNamespace(key)
+
+                # Data cached by path e.g. item:digest[/path/to/file.js]
+                if namespace == "item:digest":
+                    return all([os.path.exists(path) for path in key[len(namespace) + 1:-1].split("|")])
+
+                # Data cached by item ID e.g. script:meta[core.Main]-permutation
+                elif namespace.startswith(("script:", "style:")) or namespace == "api":
+                    end = key.find("]", len(namespace))
+                    return end == -1 or key[len(namespace) + 1:end] in knownIds
+
+                return True
+
+        Console.debug("Collecting garbage in cache of %s...", Console.colorize(self.__name, "bold"))
+        return self.__cache.collectGarbage(maxAge * 24 * 60 * 60, maxSize * 1024 * 1024, isValid)
+
     def close(self):
         """Closes the project which deletes the internal caches."""
 
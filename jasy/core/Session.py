@@ -8,8 +8,13 @@ import atexit
 import os
 import zlib
 import shutil
+import concurrent.futures
+import concurrent.futures.process
 
+import jasy.core.Cache as Cache
 import jasy.core.Config as Config
+import jasy.core.DependencyGraph as DependencyGraph
+import jasy.core.File as File
 import jasy.core.Project as Project
 import jasy.core.Util as Util
 import jasy.core.Console as Console
@@ -24,6 +29,27 @@ import jasy.item.Translation
 from jasy import UserError
 
 
+# Maximum number of threads used for collecting the files of projects
+scanWorkers = 8
+
+# Maximum number of processes used for parsing items in warmup() (None = number of CPUs)
+parseWorkers = None
+
+# Minimum number of unparsed items for starting a process pool in warmup()
+parseThreshold = 4
+
+
+def runParseTask(task):
+    """Executes a task of an item's getParseTask() inside a worker process."""
+
+    function, args = task
+    try:
+        return function(*args)
+    except Exception:
+        # Errors are reported when the item is parsed again while being processed regularly
+        return None
+
+
 class Session():
 
     """Manages all projects."""
@@ -51,6 +77,10 @@ class Session():
     # Translation bundles created by merged data from active projects
     __translationBundles = None
 
+    # Machine-wide cache shared between projects and checkouts (keyed by content digest)
+    __sharedCache = None
+    __sharedCachePath = None
+
 
 
 
@@ -68,6 +98,9 @@ class Session():
         self.__translationBundles = {}
         self.__postscans = []
         self.__itemType = {}
+        self.__dependencyGraphs = {}
+        self.__warmedUp = set()
+        self.__sharedCachePath = os.environ.get("JASY_SHARED_CACHE")
 
         self.addItemType("jasy.Asset", "Assets", jasy.item.Asset.AssetItem)
         self.addItemType("jasy.Script", "Classes", jasy.item.Script.ScriptItem)
@@ -141,8 +174,21 @@ class Session():
         Console.info("Scanning projects...")
         Console.indent()
 
+        # Setup commands might generate files so these have to run first
+        pending = [project for project in self.__projects if not project.scanned]
+        for project in pending:
+            project.prepare()
+
+        # Collecting files is dominated by file system latency (especially on network drives)
+        # so do this for all projects in parallel. Registering the items is done afterwards
+        # in order as this prints status messages and modifies shared data structures.
+        collected = {}
+        if len(pending) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(pending), scanWorkers)) as executor:
+                collected = dict(zip(pending, executor.map(lambda project: project.collect(), pending)))
+
         for project in self.__projects:
-            project.scan()
+            project.scan(collected.get(project))
 
         for postscan in self.__postscans:
             postscan()
@@ -150,6 +196,130 @@ class Session():
         Console.outdent()
 
 
+    def warmup(self, items=None):
+        """
+        Parses all script and style items without a valid cache entry in parallel using a pool of processes.
+
+        Otherwise parsing happens lazily one item after another while resolving dependencies. The resulting
+        trees are stored in the caches of the projects. Defaults to all items of all scanned projects.
+        Items which were already checked before are skipped until they are refreshed. Returns the number
+        of parsed items.
+
+        """
+
+        if items is None:
+            items = []
+            for project in self.__projects:
+                if project.scanned:
+                    items.extend(project.getScripts().values())
+                    items.extend(project.getStyles().values())
+
+        workers = parseWorkers or os.cpu_count() or 1
+        if workers < 2:
+            return 0
+
+        # Items are only checked once per session (until they are modified)
+        items = [item for item in items if item not in self.__warmedUp]
+        self.__warmedUp.update(items)
+
+        pending = []
+        tasks = []
+        for item in items:
+            getParseTask = getattr(item, "getParseTask", None)
+            task = getParseTask() if getParseTask else None
+            if task is not None:
+                pending.append(item)
+                tasks.append(task)
+
+        if len(tasks) < parseThreshold:
+            return 0
+
+        Console.info("Parsing %s items using %s processes...", len(tasks), min(workers, len(tasks)))
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                results = list(executor.map(runParseTask, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+        except (OSError, NotImplementedError, concurrent.futures.process.BrokenProcessPool) as error:
+            Console.debug("Could not parse in parallel: %s", error)
+            return 0
+
+        parsed = 0
+        for item, tree in zip(pending, results):
+            if tree is not None:
+                item.storeTree(tree)
+                parsed += 1
+
+        return parsed
+
+
+    def refresh(self, paths=None):
+        """
+        Updates the items of all scanned projects in place e.g. after files were modified.
+
+        Limited to the files at or below the given paths (when given). Drops in-memory cache entries
+        of modified items and of items depending on them (classes generated from templates, stylesheets
+        including modified stylesheets). Returns the list of all affected items.
+
+        """
+
+        if not self.__projects:
+            return []
+
+        modified = []
+        for project in self.__projects:
+            projectPaths = None
+            if paths is not None:
+                root = project.getPath()
+                projectPaths = [path for path in paths if path == root or path.startswith(root + os.sep)]
+                if not projectPaths:
+                    continue
+
+            modified.extend(project.refresh(projectPaths))
+
+        if not modified:
+            return modified
+
+        self.__dependencyGraphs = {}
+
+        # Merged translations are created again on next access
+        for item in modified:
+            if item.kind == "jasy.Translation":
+                self.__translationBundles = {}
+                break
+
+        styles = []
+        for project in self.__projects:
+            if project.scanned:
+                styles.extend(project.getStyles().values())
+
+        affected = set(modified)
+        pending = list(modified)
+
+        while pending:
+            item = pending.pop()
+            dependents = []
+
+            if item.kind == "jasy.Template" and item.getId() in (item.getProject().getItems("jasy.Template") or {}):
+                dependents.append(item.getScriptItem())
+
+            elif item.kind == "jasy.Style":
+                for style in styles:
+                    if item.getId() in style.getIncludes(None):
+                        dependents.append(style)
+
+            for dependent in dependents:
+                if dependent not in affected:
+                    dependent.getProject().getCache().discard([dependent.getId()])
+                    affected.add(dependent)
+                    modified.append(dependent)
+                    pending.append(dependent)
+
+        self.__warmedUp.difference_update(modified)
+
+        return modified
+
+
     def clean(self):
         """Clears all caches of all registered projects."""
 
@@ -175,6 +345,39 @@ class Session():
         Console.outdent()
 
 
+    def collectGarbage(self, maxAge=None, maxSize=None):
+        """
+        Removes outdated entries from the caches of all registered projects.
+
+        Entries are removed when they were not accessed within maxAge days, when the cache exceeds
+        maxSize MB or when they belong to items which do not exist anymore. The shared cache is
+        collected as well. Returns a tuple with the number of entries and bytes removed.
+
+        """
+
+        count = 0
+        size = 0
+
+        if not self.__projects:
+            return count, size
+
+        for project in self.__projects:
+            if project.isReady():
+                # Items of the virtual project are partly created on demand and not known after scanning
+                projectCount, projectSize = project.collectGarbage(maxAge, maxSize, dropUnknown=project is not self.__virtualProject)
+                count += projectCount
+                size += projectSize
+
+        sharedCache = self.getSharedCache()
+        if sharedCache is not None:
+            Console.debug("Collecting garbage in shared cache...")
+            sharedCount, sharedSize = sharedCache.collectGarbage((maxAge or 30) * 24 * 60 * 60, (maxSize or 4096) * 1024 * 1024)
+            count += sharedCount
+            size += sharedSize
+
+        return count, size
+
+
     def close(self):
         """Closes the session and stores cache to the harddrive."""
 
@@ -185,8 +388,15 @@ class Session():
         Console.indent()
 
         for project in self.__projects:
+            if project.isReady() and project.getConfigValue("cache.autoCollect", True):
+                project.collectGarbage(dropUnknown=project is not self.__virtualProject)
+
             project.close()
 
+        if self.__sharedCache is not None:
+            self.__sharedCache.close()
+            self.__sharedCache = None
+
         self.__projects = None
 
         Console.outdent()
@@ -205,6 +415,9 @@ class Session():
         for project in self.__projects:
             project.pause()
 
+        if self.__sharedCache is not None:
+            self.__sharedCache.close()
+
 
     def resume(self):
         """Resumes the session after it has been paused."""
@@ -214,11 +427,73 @@ class Session():
         for project in self.__projects:
             project.resume()
 
+        if self.__sharedCache is not None:
+            self.__sharedCache.open()
+
 
     def getFields(self):
         return self.__fields
 
 
+    def setSharedCachePath(self, path):
+        """
+        Configures the directory of the machine-wide cache which is shared between projects and checkouts.
+
+        Defaults to the JASY_SHARED_CACHE environment variable. Use None to disable the shared cache.
+
+        """
+
+        if self.__sharedCache is not None:
+            self.__sharedCache.close()
+            self.__sharedCache = None
+
+        self.__sharedCachePath = path
+
+
+    def getSharedCache(self):
+        """
+        Returns the machine-wide cache which is shared between projects and checkouts.
+
+        Entries are keyed by content digest, Jasy version and processing options. Returns None when no shared
+        cache is configured.
+
+        """
+
+        if self.__sharedCache is None and self.__sharedCachePath:
+            path = os.path.abspath(os.path.expanduser(self.__sharedCachePath))
+            try:
+                File.mkdir(path)
+                self.__sharedCache = Cache.Cache(path, filename="jasyshared", engine="sqlite", shared=True)
+            except IOError as err:
+                Console.warn("Could not open shared cache in %s: %s", path, err)
+                self.__sharedCachePath = None
+
+        return self.__sharedCache
+
+
+    def getDependencyGraph(self, items):
+        """
+        Returns the dependency graph of the given items (dictionary of IDs and items).
+
+        The graph is shared by all resolvers and sorters using the same set of items so that
+        the dependencies of every item are only computed once per permutation. Items of the virtual
+        project are not part of the graph. Their IDs contain checksums of their generated content
+        and are resolved by the graph on demand instead (see DependencyGraph.getEdges()).
+
+        """
+
+        virtualProject = self.__virtualProject
+        if virtualProject is not None:
+            items = dict([(itemId, item) for itemId, item in items.items() if item.getProject() is not virtualProject])
+
+        signature = DependencyGraph.getSignature(items)
+        graph = self.__dependencyGraphs.get(signature)
+        if graph is None:
+            graph = self.__dependencyGraphs[signature] = DependencyGraph.DependencyGraph(items)
+
+        return graph
+
+
     def getScriptByName(self, className):
         """
         Queries all currently registered projects for the given class and returns the class item. Returns None when no
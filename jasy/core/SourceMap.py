@@ -0,0 +1,327 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Source maps (revision 3) mapping generated code back to the original files.
+
+Maps are created by the compressors for every item and stitched together by the
+builders for every bundle. Lines and columns are zero based as in the JSON format.
+Columns are counted in UTF-16 code units.
+"""
+
+import bisect
+import json
+import os
+
+
+__all__ = ("SourceMap", "stitch", "encodeVlq", "decodeVlq", "decodeMappings", "getLineOffsets", "getColumn", "getLength", "getComment", "linkItems")
+
+
+base64Chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+base64Values = dict((char, index) for index, char in enumerate(base64Chars))
+
+
+def encodeVlq(value):
+    """Encodes the given number as Base64 VLQ (sign in the lowest bit, 5 bits per digit)."""
+
+    value = (value << 1) if value >= 0 else ((-value << 1) | 1)
+
+    result = ""
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+
+        result += base64Chars[digit]
+        if not value:
+            return result
+
+
+def decodeVlq(segment):
+    """Decodes a segment of Base64 VLQ numbers into a list of numbers."""
+
+    result = []
+    value = 0
+    shift = 0
+
+    for char in segment:
+        digit = base64Values[char]
+        value += (digit & 31) << shift
+
+        if digit & 32:
+            shift += 5
+        else:
+            result.append(-(value >> 1) if value & 1 else value >> 1)
+            value = 0
+            shift = 0
+
+    return result
+
+
+class LineOffsets(list):
+
+    """List of line offsets which keeps the positions of all characters outside of the basic multilingual plane."""
+
+    astral = None
+
+
+def getLength(text):
+    """Returns the length of the given text in UTF-16 code units (characters outside of the BMP count twice)."""
+
+    length = len(text)
+    if text and max(text) > "\uffff":
+        length += sum(1 for char in text if char > "\uffff")
+
+    return length
+
+
+def getLineOffsets(text):
+    """Returns the offsets of the first character of every line in the given text."""
+
+    offsets = LineOffsets([0])
+    pos = text.find("\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = text.find("\n", pos + 1)
+
+    if text and max(text) > "\uffff":
+        offsets.astral = [pos for pos, char in enumerate(text) if char > "\uffff"]
+
+    return offsets
+
+
+def getColumn(offsets, line, start):
+    """Returns the column of the given (one based) line and file position using the result of getLineOffsets()."""
+
+    if not offsets or start is None or line is None or not 0 < line <= len(offsets):
+        return 0
+
+    lineStart = offsets[line - 1]
+    column = start - lineStart
+    if column < 0 or (line < len(offsets) and start >= offsets[line]):
+        return 0
+
+    # Characters outside of the BMP are using two UTF-16 code units
+    astral = getattr(offsets, "astral", None)
+    if astral:
+        column += bisect.bisect_left(astral, start) - bisect.bisect_left(astral, lineStart)
+
+    return column
+
+
+def getComment(fileName, style=False):
+    """Returns the comment which links generated code to the source map with the given file name."""
+
+    if style:
+        return "\n/*# sourceMappingURL=%s */" % fileName
+
+    return "\n//# sourceMappingURL=%s" % fileName
+
+
+
+class SourceMap:
+
+    """
+    Mappings from positions in generated code to positions in the original files.
+
+    Instances only contain plain data and are cached by the items.
+
+    """
+
+    __slots__ = ["sources", "contents", "indexes", "lines"]
+
+
+    def __init__(self):
+        # Names of the original files and their (optional) content
+        self.sources = []
+        self.contents = []
+        self.indexes = {}
+
+        # Per generated line: list of (column, source index, original line, original column)
+        self.lines = [[]]
+
+
+    def getSourceIndex(self, source, content=None):
+        """Returns the index of the given source name (which is added when unknown)."""
+
+        index = self.indexes.get(source)
+        if index is None:
+            index = self.indexes[source] = len(self.sources)
+            self.sources.append(source)
+            self.contents.append(content)
+
+        return index
+
+
+    def setContent(self, source, content):
+        """Embeds the content of the given original file into the map."""
+
+        self.contents[self.getSourceIndex(source)] = content
+
+
+    def addMapping(self, line, column, source, originalLine, originalColumn=0):
+        """Maps the given position in the generated code to the position in the given original file."""
+
+        lines = self.lines
+        while len(lines) <= line:
+            lines.append([])
+
+        lines[line].append((column, self.getSourceIndex(source), originalLine, originalColumn))
+
+
+    def getMappings(self):
+        """Returns a list of all mappings as (line, column, source, original line, original column) tuples."""
+
+        result = []
+        for line, segments in enumerate(self.lines):
+            for column, source, originalLine, originalColumn in segments:
+                result.append((line, column, self.sources[source], originalLine, originalColumn))
+
+        return result
+
+
+    def append(self, other, line, column):
+        """Adds all mappings of the other map. Its generated code starts at the given line and column of this map."""
+
+        for source, content in zip(other.sources, other.contents):
+            self.getSourceIndex(source, content)
+
+        for pos, segments in enumerate(other.lines):
+            if not segments:
+                continue
+
+            offset = column if pos == 0 else 0
+            for segmentColumn, source, originalLine, originalColumn in segments:
+                self.addMapping(line + pos, segmentColumn + offset, other.sources[source], originalLine, originalColumn)
+
+
+    def renameSources(self, names):
+        """Replaces the source names using the given dictionary (e.g. file IDs with URLs relative to the map)."""
+
+        self.sources = [names.get(source, source) for source in self.sources]
+        self.indexes = dict((source, index) for index, source in enumerate(self.sources))
+
+
+    def encodeMappings(self):
+        """Returns the mappings in the Base64 VLQ encoded format of the JSON file."""
+
+        previousSource = 0
+        previousLine = 0
+        previousColumn = 0
+
+        result = []
+        for segments in self.lines:
+            previousGenerated = 0
+            encoded = []
+
+            for column, source, originalLine, originalColumn in sorted(segments):
+                encoded.append(encodeVlq(column - previousGenerated) + encodeVlq(source - previousSource) +
+                    encodeVlq(originalLine - previousLine) + encodeVlq(originalColumn - previousColumn))
+
+                previousGenerated = column
+                previousSource = source
+                previousLine = originalLine
+                previousColumn = originalColumn
+
+            result.append(",".join(encoded))
+
+        return ";".join(result)
+
+
+    def export(self, fileName=None):
+        """Returns the source map as JSON text."""
+
+        data = {
+            "version" : 3,
+            "sources" : self.sources,
+            "names" : [],
+            "mappings" : self.encodeMappings()
+        }
+
+        if fileName:
+            data["file"] = os.path.basename(fileName)
+
+        if any(self.contents):
+            data["sourcesContent"] = self.contents
+
+        return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+
+def stitch(fragments):
+    """
+    Creates a source map for the code which results from joining the given fragments.
+
+    Fragments are tuples of code and its source map (or None for generated code without mapping).
+
+    """
+
+    result = SourceMap()
+    line = 0
+    column = 0
+
+    for code, sourceMap in fragments:
+        if sourceMap is not None:
+            result.append(sourceMap, line, column)
+
+        breaks = code.count("\n")
+        if breaks:
+            line += breaks
+            column = getLength(code[code.rfind("\n") + 1:])
+        else:
+            column += getLength(code)
+
+    return result
+
+
+def linkItems(sourceMap, getItem, path):
+    """
+    Replaces the file IDs used as source names by the paths of the items (relative to the given directory).
+
+    The items are looked up using the given function. Their content is embedded into the map as well,
+    so that the map keeps working when the original files are not deployed.
+
+    """
+
+    names = {}
+    for fileId in sourceMap.sources:
+        item = getItem(fileId)
+        if item is None:
+            continue
+
+        sourceMap.setContent(fileId, item.getText())
+
+        itemPath = item.getPath()
+        if isinstance(itemPath, str):
+            names[fileId] = os.path.relpath(itemPath, path).replace(os.sep, "/")
+
+    sourceMap.renameSources(names)
+
+
+def decodeMappings(mappings):
+    """Decodes the mappings of a JSON source map into (line, column, source index, original line, original column) tuples."""
+
+    result = []
+    source = 0
+    originalLine = 0
+    originalColumn = 0
+
+    for line, encoded in enumerate(mappings.split(";")):
+        column = 0
+        for segment in encoded.split(","):
+            if not segment:
+                continue
+
+            values = decodeVlq(segment)
+            column += values[0]
+
+            if len(values) >= 4:
+                source += values[1]
+                originalLine += values[2]
+                originalColumn += values[3]
+                result.append((line, column, source, originalLine, originalColumn))
+
+    return result
@@ -0,0 +1,276 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Watches the file system of all projects of a session.
+
+Uses inotify on Linux (via ctypes, no additional dependencies) and falls back
+to polling the modification times on all other systems.
+"""
+
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+
+import jasy.core.Console as Console
+
+
+__all__ = ("Watcher", "InotifyObserver", "PollingObserver")
+
+
+# Subset of flags as defined in <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+watchMask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+eventHeader = struct.Struct("iIII")
+
+
+def walkDirs(path):
+    """Yields the given directory and all its sub directories (excluding dotted ones like .git or .jasy)."""
+
+    stack = [path]
+    while stack:
+        dirPath = stack.pop()
+        yield dirPath
+
+        try:
+            with os.scandir(dirPath) as iterator:
+                for entry in iterator:
+                    if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+
+        except OSError:
+            pass
+
+
+
+class InotifyObserver:
+
+    """Observes the given directories (recursively) using the inotify API of the Linux kernel."""
+
+    def __init__(self, paths):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        self.__libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.__fd = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), "Could not initialize inotify")
+
+        self.__watches = {}
+        for path in paths:
+            self.__addTree(path)
+
+
+    def __addTree(self, path):
+        for dirPath in walkDirs(path):
+            wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(dirPath), watchMask)
+            if wd < 0:
+                Console.debug("Could not watch directory %s: %s", dirPath, os.strerror(ctypes.get_errno()))
+            else:
+                self.__watches[wd] = dirPath
+
+
+    def wait(self, timeout=None):
+        """
+        Waits for changes (up to the given number of seconds).
+
+        Returns the set of modified paths or None when the event queue overflowed (everything might be modified).
+
+        """
+
+        readable, writable, failed = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            data = os.read(self.__fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        modified = set()
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, cookie, length = eventHeader.unpack_from(data, offset)
+            offset += eventHeader.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+
+            dirPath = self.__watches.get(wd)
+            if dirPath is None:
+                continue
+
+            if mask & IN_IGNORED:
+                del self.__watches[wd]
+                continue
+
+            path = os.path.join(dirPath, name) if name else dirPath
+            if name.startswith("."):
+                continue
+
+            modified.add(path)
+
+            # Start watching new directories
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.__addTree(path)
+
+        return modified
+
+
+    def close(self):
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+
+
+class PollingObserver:
+
+    """Observes the given directories (recursively) by comparing the modification times of all files."""
+
+    def __init__(self, paths, interval=0.5):
+        self.__paths = paths
+        self.__interval = interval
+        self.__snapshot = self.__createSnapshot()
+
+
+    def __createSnapshot(self):
+        snapshot = {}
+        for path in self.__paths:
+            for dirPath in walkDirs(path):
+                try:
+                    with os.scandir(dirPath) as iterator:
+                        for entry in iterator:
+                            if not entry.name.startswith(".") and not entry.is_dir():
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_mtime, stat.st_size)
+
+                except OSError:
+                    pass
+
+        return snapshot
+
+
+    def wait(self, timeout=None):
+        """Waits for changes (up to the given number of seconds). Returns the set of modified paths."""
+
+        start = time.time()
+
+        while True:
+            snapshot = self.__createSnapshot()
+            previous = self.__snapshot
+            self.__snapshot = snapshot
+
+            modified = set([path for path in snapshot if previous.get(path) != snapshot[path]])
+            modified.update([path for path in previous if path not in snapshot])
+
+            if modified:
+                return modified
+
+            if timeout is not None and time.time() - start + self.__interval > timeout:
+                return modified
+
+            time.sleep(self.__interval)
+
+
+    def close(self):
+        self.__snapshot = None
+
+
+
+class Watcher:
+
+    """
+    Keeps the session warm by updating the items of all projects whenever files are modified.
+
+    Uses the InotifyObserver when available and the PollingObserver otherwise.
+
+    """
+
+    def __init__(self, session, polling=False, interval=0.5, delay=0.05):
+        self.__session = session
+        self.__delay = delay
+
+        # Make sure that all projects are scanned before recording any changes
+        session.scan()
+
+        paths = [project.getPath() for project in session.getProjects()]
+
+        self.__observer = None
+        if not polling:
+            try:
+                self.__observer = InotifyObserver(paths)
+                Console.debug("Watching %s projects using inotify", len(paths))
+            except (OSError, AttributeError) as error:
+                Console.debug("Could not use inotify: %s", error)
+
+        if self.__observer is None:
+            self.__observer = PollingObserver(paths, interval)
+            Console.debug("Watching %s projects using polling", len(paths))
+
+
+    def wait(self, timeout=None):
+        """
+        Waits for file changes (up to the given number of seconds) and updates the items of the session.
+
+        Returns the list of affected items.
+
+        """
+
+        paths = self.__observer.wait(timeout)
+        if paths is not None and not paths:
+            return []
+
+        # Collect follow-up events e.g. when editors write multiple files at once
+        while paths is not None:
+            more = self.__observer.wait(self.__delay)
+            if more is None:
+                paths = None
+            elif more:
+                paths.update(more)
+            else:
+                break
+
+        return self.__session.refresh(paths)
+
+
+    def run(self, callback):
+        """Calls the given callback with the list of affected items whenever files were modified. Runs until interrupted."""
+
+        while True:
+            items = self.wait()
+            if items:
+                Console.info("Modified: %s", ", ".join(sorted(set([item.getId() for item in items]))))
+                callback(items)
+
+
+    def close(self):
+        """Stops watching the file system."""
+
+        if self.__observer is not None:
+            self.__observer.close()
+            self.__observer = None
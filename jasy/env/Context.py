@@ -39,6 +39,10 @@ config = Config.Config()
 config.__doc__ = "Auto initialized config object based on project's jasyscript file"
 config.loadValues("jasyscript", optional=True)
 
+# Optional machine-wide cache shared between projects and checkouts
+if config.has("cache.shared"):
+    session.setSharedCachePath(config.get("cache.shared"))
+
 
 @task
 def about():
@@ -93,6 +97,42 @@ def create(name="myproject", origin=None, originVersion=None, skeleton=None, des
     return Create.create(name, origin, originVersion, skeleton, destination, session, **argv)
 
 
+@task
+def gc(maxAge=None, maxSize=None):
+    """Removes outdated entries from the caches of all projects."""
+
+    session.scan()
+
+    Console.info("Collecting garbage in project caches...")
+    Console.indent()
+    count, size = session.collectGarbage(int(maxAge) if maxAge else None, int(maxSize) if maxSize else None)
+    Console.info("Removed %s entries (%s KB)", count, size // 1024)
+    Console.outdent()
+
+
+@task
+def watch(tasks="build", polling=False):
+    """Re-runs the given tasks (comma separated) whenever files of the projects are modified."""
+
+    import jasy.core.Watcher as Watcher
+
+    names = [name.strip() for name in tasks.split(",") if name.strip()]
+
+    def execute(items=None):
+        for name in names:
+            Task.executeTask(name)
+
+    execute()
+
+    watcher = Watcher.Watcher(session, polling=polling not in (False, "false", "False"))
+    Console.info("Watching for changes...")
+
+    try:
+        watcher.run(execute)
+    finally:
+        watcher.close()
+
+
 @task
 def showapi():
     """Shows the official API available in jasyscript.py."""
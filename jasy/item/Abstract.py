@@ -5,9 +5,19 @@
 #
 
 import os
+import hashlib
 
 from jasy import UserError
+import jasy
 import jasy.core.File as File
+import jasy.core.Base62 as Base62
+
+
+def getSignature(stat):
+    """Returns a cheap identification string for the given stat result (modification time, size and inode)."""
+
+    return "%s:%s:%s" % (stat.st_mtime, stat.st_size, stat.st_ino)
+
 
 
 class AbstractItem(object):
@@ -22,6 +32,8 @@ class AbstractItem(object):
     __text = None
     __textFilter = None
     __filteredText = None
+    __signature = None
+    __digest = None
 
 
     @classmethod
@@ -42,30 +54,88 @@ class AbstractItem(object):
     def generateId(self, relpath, package):
         return "%s/%s" % (package, relpath)
 
-    def attach(self, path):
+    def attach(self, path, stat=None):
+        """
+        Attaches the item to the given path (or list of paths).
+
+        Accepts an already available stat result of the path e.g. from scanning the directory.
+
+        """
+
         self.__path = path
+        self.__digest = None
 
         entry = None
 
         try:
             if isinstance(path, list):
                 mtime = 0
+                signature = []
                 for entry in path:
-                    entryTime = os.stat(entry).st_mtime
-                    if entryTime > mtime:
-                        mtime = entryTime
+                    stat = os.stat(entry)
+                    signature.append(getSignature(stat))
+                    if stat.st_mtime > mtime:
+                        mtime = stat.st_mtime
 
                 self.mtime = mtime
+                self.__signature = "|".join(signature)
 
             else:
                 entry = path
-                self.mtime = os.stat(entry).st_mtime
+                if stat is None:
+                    stat = os.stat(entry)
+
+                self.mtime = stat.st_mtime
+                self.__signature = getSignature(stat)
 
         except OSError as oserr:
             raise UserError("Invalid item path: %s" % entry)
 
         return self
 
+    def refresh(self, stat=None):
+        """
+        Attaches the item again when the file system signature of its path(s) was modified.
+
+        Returns whether the item was modified. Used by long running sessions to update items in place.
+
+        """
+
+        path = self.__path
+        if path is None:
+            return False
+
+        try:
+            if isinstance(path, list):
+                signature = "|".join([getSignature(os.stat(entry)) for entry in path])
+            else:
+                signature = getSignature(stat or os.stat(path))
+
+        except OSError:
+            return False
+
+        if signature == self.__signature:
+            return False
+
+        self.attach(path, stat)
+        return True
+
+    def restore(self, path, stat, state):
+        """
+        Attaches the item to the given path re-using the state of a previous run.
+
+        Called for unchanged files when the project registry is restored from the cache. Items
+        with expensive attach() logic override this together with getState().
+
+        """
+
+        return self.attach(path, stat)
+
+    def getState(self):
+        """Returns data which is computed during attach() and stored in the project registry for restore()."""
+
+        return None
+
     def getId(self):
         """
         Returns a unique identify of the class.
@@ -100,9 +170,128 @@ class AbstractItem(object):
         """Returns last modification time of the class."""
         return self.mtime
 
+    def getDigest(self):
+        """
+        Returns a SHA1 based digest (Base62 encoded) of the content of the item.
+
+        The file system signature (modification time, size and inode) of the underlying file(s) is
+        recorded during attach(). Known digests are stored in the project cache under this signature
+        so that unchanged files are not re-hashed during the next run.
+
+        """
+
+        if self.__digest is not None:
+            return self.__digest
+
+        # Dynamically created text content (e.g. virtual items, templates)
+        if self.__text is not None:
+            self.__digest = Base62.encodeArrayToString(hashlib.sha1(self.__text.encode("utf-8")).digest())
+            return self.__digest
+
+        if self.__path is None:
+            return None
+
+        paths = self.__path if isinstance(self.__path, list) else [self.__path]
+        signature = self.__signature
+
+        cache = self.project.getCache() if self.project else None
+        field = "item:digest[%s]" % "|".join(paths)
+        digest = cache.read(field, signature, inMemory=False) if cache and signature else None
+
+        if digest is None:
+            sha1 = hashlib.sha1()
+            for path in paths:
+                with open(path, "rb") as handle:
+                    while True:
+                        data = handle.read(2 ** 20)
+                        if not data:
+                            break
+                        sha1.update(data)
+
+            digest = Base62.encodeArrayToString(sha1.digest())
+            if cache and signature:
+                cache.store(field, digest, signature, inMemory=False)
+
+        self.__digest = digest
+        return digest
+
+    def getValidator(self):
+        """
+        Returns the value which is used to validate cache entries of this item.
+
+        This is the modification time by default. Projects with content based cache validation
+        are using the digest of the file content instead so that entries survive fresh checkouts.
+
+        """
+
+        if self.project is not None and self.project.hasContentValidation():
+            return self.getDigest()
+
+        return self.mtime
+
+    def readCache(self, field, validator=None, digest=None, inMemory=True):
+        """
+        Reads the given field from the project cache.
+
+        Falls back to the shared cache of the session (when configured) which stores entries by content
+        digest. This allows reusing results across different checkouts of the same item.
+
+        """
+
+        if validator is None:
+            validator = self.getValidator()
+
+        cache = self.project.getCache()
+        value = cache.read(field, validator, inMemory=inMemory)
+
+        if value is None:
+            sharedCache = self.project.getSession().getSharedCache()
+            if sharedCache is not None:
+                value = sharedCache.read(self.__getSharedKey(field, digest), inMemory=False)
+                if value is not None:
+                    cache.store(field, value, validator, inMemory=inMemory)
+
+        return value
+
+    def hasCache(self, field, validator=None, digest=None):
+        """Whether the project cache or the shared cache of the session contains a valid value for the given field."""
+
+        if validator is None:
+            validator = self.getValidator()
+
+        if self.project.getCache().contains(field, validator):
+            return True
+
+        sharedCache = self.project.getSession().getSharedCache()
+        return sharedCache is not None and sharedCache.contains(self.__getSharedKey(field, digest))
+
+    def storeCache(self, field, value, validator=None, digest=None, transient=False, inMemory=True):
+        """
+        Stores the given field in the project cache.
+
+        Persistent values are copied to the shared cache of the session (when configured) as well.
+
+        """
+
+        if validator is None:
+            validator = self.getValidator()
+
+        self.project.getCache().store(field, value, validator, transient, inMemory)
+
+        if not transient:
+            sharedCache = self.project.getSession().getSharedCache()
+            if sharedCache is not None:
+                sharedCache.store(self.__getSharedKey(field, digest), value, inMemory=False)
+
+    def __getSharedKey(self, field, digest=None):
+        """Returns the key of the given field in the shared cache (field + content digest + Jasy version)."""
+
+        return "%s@%s-%s" % (field, digest or self.getDigest(), jasy.__version__)
+
     def setText(self, text):
         """Stores text from custom reader."""
         self.__text = text
+        self.__digest = None
 
 
     def saveText(self, text, path, encoding="utf-8"):
@@ -116,6 +305,7 @@ class AbstractItem(object):
 
         self.__text = text
         self.__path = path
+        self.__digest = None
 
         if not File.exists(path) or File.read(path) != text:
             File.write(path, text)
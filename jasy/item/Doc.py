@@ -30,7 +30,7 @@ class DocItem(AbstractItem.AbstractItem):
 
     def getApi(self):
         field = "api[%s]" % self.id
-        apidata = self.project.getCache().read(field, self.getModificationTime())
+        apidata = self.readCache(field)
 
         if not Text.supportsMarkdown:
             raise UserError("Missing Markdown feature to convert package docs into HTML.")
@@ -40,6 +40,6 @@ class DocItem(AbstractItem.AbstractItem):
             apidata.main["type"] = "Package"
             apidata.main["doc"] = Text.highlightCodeBlocks(Text.markdownToHtml(self.getText()))
 
-            self.project.getCache().store(field, apidata, self.getModificationTime())
+            self.storeCache(field, apidata)
 
         return apidata
@@ -5,13 +5,16 @@
 #
 
 import os
-import copy
-import fnmatch
-import re
+import json
 
+import jasy.core.DependencyGraph as DependencyGraph
+import jasy.core.IdIndex as IdIndex
 import jasy.core.MetaData as MetaData
+import jasy.core.SourceMap as SourceMap
 import jasy.core.Console as Console
+import jasy.core.Util
 import jasy.item.Abstract
+import jasy.parse.CompactTree as CompactTree
 import jasy.script.parse.Parser as Parser
 import jasy.script.parse.ScopeScanner as ScopeScanner
 import jasy.script.clean.DeadCode
@@ -33,33 +36,54 @@ except:
     highlight = None
 
 
-aliases = {}
+class FieldCollector(object):
 
+    """
+    Collects the names of all fields used in jasy.Env calls while walking the tree (see Util.walk()).
 
-def collectFields(node, keys=None):
+    Does not modify the tree, so it can share the traversal with other visitors.
 
-    if keys is None:
-        keys = set()
+    """
 
-    # Always the first parameter
     # Supported calls: jasy.Env.isSet(key, expected?), jasy.Env.getValue(key), jasy.Env.select(key, map)
     calls = ("jasy.Env.isSet", "jasy.Env.getValue", "jasy.Env.select")
-    if node.type == "dot" and node.parent.type == "call" and Util.assembleDot(node) in calls:
-        stringNode = node.parent[1][0]
-        if stringNode.type == "string":
-            keys.add(stringNode.value)
-        elif stringNode.type == "identifier":
-            # Tolerate identifiers for supporting dynamic requests e.g. for asset placeholders
-            pass
-        else:
-            raise Exception("Could not handle non string type in jasy.Env call at line: %s" % node.line)
 
-    # Process children
-    for child in reversed(node):
-        if child is not None:
-            collectFields(child, keys)
+    def __init__(self, keys=None):
+        self.keys = set() if keys is None else keys
+
+
+    def enter(self, node):
+        # Always the first parameter
+        if node.type == "dot" and node.parent.type == "call" and Util.assembleDot(node) in self.calls:
+            stringNode = node.parent[1][0]
+            if stringNode.type == "string":
+                self.keys.add(stringNode.value)
+            elif stringNode.type == "identifier":
+                # Tolerate identifiers for supporting dynamic requests e.g. for asset placeholders
+                pass
+            else:
+                raise Exception("Could not handle non string type in jasy.Env call at line: %s" % node.line)
+
+
+    def leave(self, node):
+        pass
+
+
+
+def collectFields(node, keys=None):
+    collector = FieldCollector(keys)
+    Util.walk(node, [collector])
+
+    return collector.keys
+
+
+def parseTree(text, fileId):
+    """Parses and scope scans the given code. Returns a CompactTree (see ScriptItem.getParseTask())."""
 
-    return keys
+    tree = Parser.parse(text, fileId)
+    ScopeScanner.scan(tree)
+
+    return CompactTree.fromNode(tree)
 
 
 
@@ -90,30 +114,64 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
 
 
     def __getTree(self):
-        """Returns the abstract syntax tree."""
+        """
+        Returns the abstract syntax tree.
+
+        The tree is kept as a CompactTree in the cache (stored on disk using the tree codec). Every call returns a new
+        tree of nodes which might be modified by the caller.
+
+        """
 
         field = "script:tree[%s]" % self.id
-        tree = self.project.getCache().read(field, self.mtime)
-        if not tree:
-            Console.info("Processing class %s...", Console.colorize(self.id, "bold"))
+        compact = self.readCache(field)
+        if compact:
+            return compact.toNode()
 
-            Console.indent()
-            tree = Parser.parse(self.getText(), self.id)
-            ScopeScanner.scan(tree)
-            Console.outdent()
+        Console.info("Processing class %s...", Console.colorize(self.id, "bold"))
+
+        Console.indent()
+        tree = Parser.parse(self.getText(), self.id)
+        ScopeScanner.scan(tree)
+        Console.outdent()
 
-            self.project.getCache().store(field, tree, self.mtime, True)
+        self.storeCache(field, CompactTree.fromNode(tree))
 
         return tree
 
 
+    def getParseTask(self):
+        """
+        Returns a task for parsing the class in another process or None when the tree is already cached.
+
+        Tasks are tuples of a module level function and its arguments. The result of the function has to be passed to
+        storeTree(). Used by Session.warmup() to parse multiple classes in parallel.
+
+        """
+
+        if self.hasCache("script:tree[%s]" % self.id):
+            return None
+
+        return (parseTree, (self.getText(), self.id))
+
+
+    def storeTree(self, compact):
+        """Stores a tree produced by the task of getParseTask()."""
+
+        self.storeCache("script:tree[%s]" % self.id, compact)
+
+
     def __getOptimizedTree(self, permutation=None):
-        """Returns an optimized tree with permutations applied."""
+        """
+        Returns the optimized tree with permutations applied as a CompactTree.
+
+        The snapshot is shared between all callers. Use toNode() to get a private copy for further modifications.
+
+        """
 
         field = "script:opt-tree[%s]-%s" % (self.id, permutation)
-        tree = self.project.getCache().read(field, self.mtime)
-        if not tree:
-            tree = copy.deepcopy(self.__getTree())
+        compact = self.readCache(field)
+        if compact is None:
+            tree = self.__getTree()
 
             # Logging
             msg = "Optimizing class %s" % Console.colorize(self.id, "bold")
@@ -130,15 +188,16 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
                 jasy.script.clean.Permutate.patch(tree, permutation)
                 Console.outdent()
 
-            # Cleanups
+            # Cleanups (both passes report their modifications, so only modified scopes are scanned again)
             jasy.script.clean.DeadCode.cleanup(tree)
-            ScopeScanner.scan(tree)
+            ScopeScanner.update(tree)
             jasy.script.clean.Unused.cleanup(tree)
 
-            self.project.getCache().store(field, tree, self.mtime, True)
+            compact = CompactTree.fromNode(tree)
+            self.storeCache(field, compact, transient=True)
             Console.outdent()
 
-        return tree
+        return compact
 
 
 
@@ -148,21 +207,7 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
         make the module work, but are not required being available before the current item.
         """
 
-        meta = self.getMetaData(permutation)
-
-        result = set()
-
-        for name in meta.breaks:
-            if name != self.id and name in items and items[name].kind == "jasy.Script":
-                result.add(items[name])
-            elif "*" in name:
-                reobj = re.compile(fnmatch.translate(name))
-                for className in items:
-                    if className != self.id:
-                        if reobj.match(className):
-                            result.add(items[className])
-
-        return result
+        return DependencyGraph.resolveBreaks(self, self.getEdges(permutation, items), items)
 
 
 
@@ -171,79 +216,103 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
         Returns a set of dependencies seen through the given list of known classes (ignoring all unknown items in
         original set) and configured fields with their individual detection classes.
 
-        This method also makes use of the meta data and the variable data.
+        This method also makes use of the meta data and the variable data. Resolvers are using the
+        shared dependency graph of the session instead (see Session.getDependencyGraph()).
+
+        """
+
+        return DependencyGraph.resolveDependencies(self, self.getEdges(permutation, items), items, fields, warnings)
+
+
+
+    def getEdges(self, permutation, items, signature=None, index=None):
+        """
+        Returns the outgoing edges of this class (see DependencyGraph.Edges) for the given permutation.
+
+        Names are matched against the given dictionary of all known items. Wildcards are matched using the
+        given IdIndex of these items (created on demand). The result is cached when the signature of these
+        items is given (see DependencyGraph.getSignature()).
 
         """
 
         permutation = self.filterPermutation(permutation)
 
+        field = "script:edges[%s]-%s-%s" % (self.id, permutation, signature)
+        if signature is not None:
+            edges = self.readCache(field)
+            if edges is not None:
+                return edges
+
         meta = self.getMetaData(permutation)
         scope = self.getScopeData(permutation)
 
-        result = set()
+        edges = DependencyGraph.Edges()
 
-        # Match fields with current permutation and give detection classes
-        # Add detection classes of fields which are accessed but not permutated
-        # to the list of dependencies for this class.
-        if fields:
-            accessedFields = self.getFields()
-            if accessedFields:
-                for fieldName in accessedFields:
-                    if permutation is None or not permutation.has(fieldName):
-                        if fieldName in fields:
-                            result.add(fields[fieldName])
+        # Fields which are accessed but not permutated require their detection classes
+        accessedFields = self.getFields()
+        if accessedFields:
+            for fieldName in sorted(accessedFields):
+                if permutation is None or not permutation.has(fieldName):
+                    edges.fields.append(fieldName)
 
         # Manually defined names/classes
         for name in meta.requires:
             if name != self.id and name in items and items[name].kind == "jasy.Script":
-                result.add(items[name])
+                edges.requires.add(name)
             elif "*" in name:
-                reobj = re.compile(fnmatch.translate(name))
-                for className in items:
+                if index is None:
+                    index = IdIndex.IdIndex(items)
+
+                for className in index.match(name):
                     if className != self.id:
-                        if reobj.match(className):
-                            result.add(items[className])
-            elif warnings:
-                Console.warn("Missing class (required): %s in %s", name, self.id)
+                        edges.requires.add(className)
+            else:
+                edges.missingRequires.append(name)
 
         # Globally modified names (mostly relevant when working without namespaces)
         for name in scope.shared:
             if name != self.id and name in items and items[name].kind == "jasy.Script":
-                result.add(items[name])
+                edges.requires.add(name)
 
-        # Add classes from detected package access
+        # Add classes from detected package access. The longest available name wins.
         for package in scope.packages:
-            if package in aliases:
-                className = aliases[package]
-                if className in items:
-                    result.add(items[className])
-                    continue
-
-            orig = package
-            while True:
-                if package == self.id:
-                    break
+            candidates = []
+            while package != self.id:
+                if package in items and items[package].kind == "jasy.Script":
+                    candidates.append(package)
 
-                elif package in items and items[package].kind == "jasy.Script":
-                    aliases[orig] = package
-                    result.add(items[package])
+                pos = package.rfind(".")
+                if pos == -1:
                     break
 
-                else:
-                    pos = package.rfind(".")
-                    if pos == -1:
-                        break
+                package = package[0:pos]
 
-                    package = package[0:pos]
+            if candidates:
+                edges.packages.append(tuple(candidates))
 
         # Manually excluded names/classes
         for name in meta.optionals:
             if name != self.id and name in items and items[name].kind == "jasy.Script":
-                result.remove(items[name])
-            elif warnings:
-                Console.warn("Missing class (optional): %s in %s", name, self.id)
+                edges.optionals.add(name)
+            else:
+                edges.missingOptionals.append(name)
 
-        return result
+        # Down-priorized dependencies
+        for name in meta.breaks:
+            if name != self.id and name in items and items[name].kind == "jasy.Script":
+                edges.breaks.add(name)
+            elif "*" in name:
+                if index is None:
+                    index = IdIndex.IdIndex(items)
+
+                for className in index.match(name):
+                    if className != self.id:
+                        edges.breaks.add(className)
+
+        if signature is not None:
+            self.storeCache(field, edges)
+
+        return edges
 
 
 
@@ -254,10 +323,10 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
         permutation = self.filterPermutation(permutation)
 
         field = "script:scope[%s]-%s" % (self.id, permutation)
-        scope = self.project.getCache().read(field, self.mtime)
+        scope = self.readCache(field)
         if scope is None:
-            scope = self.__getOptimizedTree(permutation).scope
-            self.project.getCache().store(field, scope, self.mtime)
+            scope = self.__getOptimizedTree(permutation).getScope(0)
+            self.storeCache(field, scope)
 
         return scope
 
@@ -265,7 +334,7 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
 
     def getApi(self, highlight=True):
         field = "script:api[%s]-%s" % (self.id, highlight)
-        apidata = self.project.getCache().read(field, self.mtime, inMemory=False)
+        apidata = self.readCache(field, inMemory=False)
         if apidata is None:
             apidata = jasy.script.api.Data.ApiData(self.id, highlight)
 
@@ -283,7 +352,7 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
 
             apidata.addFields(self.getFields())
 
-            self.project.getCache().store(field, apidata, self.mtime, inMemory=False)
+            self.storeCache(field, apidata, inMemory=False)
 
         return apidata
 
@@ -291,7 +360,7 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
 
     def getHighlightedCode(self):
         field = "script:highlighted[%s]" % self.id
-        source = self.project.getCache().read(field, self.mtime)
+        source = self.readCache(field)
         if source is None:
             if highlight is None:
                 raise UserError("Could not highlight JavaScript code! Please install Pygments.")
@@ -300,7 +369,7 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
             formatter = HtmlFormatter(full=True, style="autumn", linenos="table", lineanchors="line")
             source = highlight(self.getText(), lexer, formatter)
 
-            self.project.getCache().store(field, source, self.mtime)
+            self.storeCache(field, source)
 
         return source
 
@@ -310,41 +379,51 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
         permutation = self.filterPermutation(permutation)
 
         field = "script:meta[%s]-%s" % (self.id, permutation)
-        meta = self.project.getCache().read(field, self.mtime)
+        meta = self.readCache(field)
         if meta is None:
             meta = MetaData.MetaData(self.__getOptimizedTree(permutation))
-            self.project.getCache().store(field, meta, self.mtime)
+            self.storeCache(field, meta)
 
         return meta
 
 
 
     def getFields(self):
-        field = "script:fields[%s]" % (self.id)
-        fields = self.project.getCache().read(field, self.mtime)
+        fields = self.readCache("script:fields[%s]" % self.id)
         if fields is None:
-            try:
-                fields = collectFields(self.__getTree())
-            except Exception as ex:
-                raise Exception("Unable to collect fields in file %s: %s" % (self.id, ex))
-
-            self.project.getCache().store(field, fields, self.mtime)
+            fields = self.__collect()[0]
 
         return fields
 
 
 
     def getTranslations(self):
-        field = "script:translations[%s]" % (self.id)
-        result = self.project.getCache().read(field, self.mtime)
+        result = self.readCache("script:translations[%s]" % self.id)
         if result is None:
-            result = jasy.script.optimize.Translation.collectTranslations(self.__getTree())
-            self.project.getCache().store(field, result, self.mtime)
+            result = self.__collect()[1]
 
         return result
 
 
 
+    def __collect(self):
+        """Collects the fields and the translations used by the class in one traversal of the tree and stores both."""
+
+        fields = FieldCollector()
+        translations = jasy.script.optimize.Translation.Collector()
+
+        try:
+            Util.walk(self.__getTree(), [fields, translations])
+        except Exception as ex:
+            raise Exception("Unable to collect fields and translations in file %s: %s" % (self.id, ex))
+
+        self.storeCache("script:fields[%s]" % self.id, fields.keys)
+        self.storeCache("script:translations[%s]" % self.id, translations.translations)
+
+        return fields.keys, translations.translations
+
+
+
     def filterPermutation(self, permutation):
         if permutation:
             fields = self.getFields()
@@ -355,30 +434,85 @@ class ScriptItem(jasy.item.Abstract.AbstractItem):
 
 
 
+    def getCompressionKey(self, profile):
+        """
+        Returns the key of the compressed code for the given profile.
+
+        Only contains the settings which actually influence the result: the permutation filtered by the fields
+        accessed in this class, the optimization and formatting flags and the entries of the translation table
+        used by this class. Classes which do not depend on the permutation are compressed only once per build.
+
+        """
+
+        permutation = self.filterPermutation(profile.getCurrentPermutation())
+
+        # Classes without any translation calls are not modified by the translation optimizer
+        translation = profile.getCurrentTranslation()
+        used = self.getTranslations() if translation else None
+        if used:
+            table = translation.getTable()
+            relevant = {translationId: table[translationId] for translationId in used if translationId in table}
+            translation = jasy.core.Util.generateChecksum(json.dumps(relevant, sort_keys=True))
+        else:
+            translation = None
+
+        return "%s-%s-%s-%s" % (permutation, profile.getCurrentOptimization(), profile.getCurrentFormatting(), translation)
+
+
     def getCompressed(self, profile):
-        field = "script:compressed[%s]-%s" % (self.id, profile.getId())
-        compressed = self.project.getCache().read(field, self.mtime)
+        field = "script:compressed[%s]-%s" % (self.id, self.getCompressionKey(profile))
+        compressed = self.readCache(field)
         if compressed is None:
-            permutation = self.filterPermutation(profile.getCurrentPermutation())
-            tree = self.__getOptimizedTree(permutation)
+            compressed, sourceMap = self.__compress(profile)
+
+        return compressed
+
 
-            translation = profile.getCurrentTranslation()
-            optimization = profile.getCurrentOptimization()
-            formatting = profile.getCurrentFormatting()
+    def getCompressedWithMap(self, profile):
+        """Returns the compressed code and its SourceMap. Both are created in a single pass when not cached."""
 
-            if translation or optimization:
-                tree = copy.deepcopy(tree)
+        key = self.getCompressionKey(profile)
+        compressed = self.readCache("script:compressed[%s]-%s" % (self.id, key))
+        sourceMap = self.readCache("script:sourcemap[%s]-%s" % (self.id, key)) if compressed is not None else None
+        if sourceMap is None:
+            compressed, sourceMap = self.__compress(profile, True)
 
-                if translation:
-                    jasy.script.optimize.Translation.optimize(tree, translation)
+        return compressed, sourceMap
 
-                if optimization:
-                    try:
-                        optimization.apply(tree)
-                    except jasy.script.output.Optimization.Error as error:
-                        raise ScriptError(self, "Could not compress class! %s" % error)
 
+    def getSourceMap(self, profile):
+        """Returns the SourceMap of the code returned by getCompressed()."""
+
+        return self.getCompressedWithMap(profile)[1]
+
+
+    def __compress(self, profile, withMap=False):
+        """Compresses the class for the given profile and stores the result (and optionally the source map)."""
+
+        key = self.getCompressionKey(profile)
+        permutation = self.filterPermutation(profile.getCurrentPermutation())
+        tree = self.__getOptimizedTree(permutation).toNode()
+
+        translation = profile.getCurrentTranslation()
+        optimization = profile.getCurrentOptimization()
+        formatting = profile.getCurrentFormatting()
+
+        if translation:
+            jasy.script.optimize.Translation.optimize(tree, translation)
+
+        if optimization:
+            try:
+                optimization.apply(tree)
+            except jasy.script.output.Optimization.Error as error:
+                raise ScriptError(self, "Could not compress class! %s" % error)
+
+        if withMap:
+            compressed, sourceMap = Compressor.Compressor(formatting).compressWithMap(tree, SourceMap.getLineOffsets(self.getText()))
+            self.storeCache("script:sourcemap[%s]-%s" % (self.id, key), sourceMap)
+        else:
             compressed = Compressor.Compressor(formatting).compress(tree)
-            self.project.getCache().store(field, compressed, self.mtime)
+            sourceMap = None
 
-        return compressed
+        self.storeCache("script:compressed[%s]-%s" % (self.id, key), compressed)
+
+        return compressed, sourceMap
@@ -4,13 +4,15 @@
 #
 
 import os
-import copy
-import fnmatch
-import re
 
 import jasy.core.Console as Console
+import jasy.core.DependencyGraph as DependencyGraph
+import jasy.core.IdIndex as IdIndex
 import jasy.core.MetaData as MetaData
+import jasy.core.SourceMap as SourceMap
+import jasy.core.Util
 import jasy.item.Abstract as AbstractItem
+import jasy.parse.CompactTree as CompactTree
 import jasy.style.Util as Util
 import jasy.style.Engine as Engine
 
@@ -65,6 +67,12 @@ def collectFields(node, keys=None, condition=False):
     return keys
 
 
+def parseTree(text, fileId):
+    """Parses the given stylesheet. Returns a CompactTree (see StyleItem.getParseTask())."""
+
+    return CompactTree.fromNode(Engine.getTree(text, fileId))
+
+
 
 class StyleError(Exception):
 
@@ -97,21 +105,47 @@ class StyleItem(AbstractItem.AbstractItem):
 
 
     def __getTree(self):
-        """Returns the abstract syntax tree of the stylesheet."""
+        """
+        Returns the abstract syntax tree of the stylesheet as a CompactTree.
+
+        The snapshot is shared between all callers. Use toNode() to get a private copy for further modifications.
+
+        """
 
         field = "style:tree[%s]" % self.id
-        tree = self.project.getCache().read(field, self.mtime)
+        compact = self.readCache(field)
 
-        if not tree:
+        if compact is None:
             Console.info("Parsing stylesheet %s...", Console.colorize(self.id, "bold"))
 
             Console.indent()
-            tree = Engine.getTree(self.getText(), self.id)
+            compact = parseTree(self.getText(), self.id)
             Console.outdent()
 
-            self.project.getCache().store(field, tree, self.mtime, True)
+            self.storeCache(field, compact)
 
-        return tree
+        return compact
+
+
+    def getParseTask(self):
+        """
+        Returns a task for parsing the stylesheet in another process or None when the tree is already cached.
+
+        Tasks are tuples of a module level function and its arguments. The result of the function has to be passed to
+        storeTree(). Used by Session.warmup() to parse multiple stylesheets in parallel.
+
+        """
+
+        if self.hasCache("style:tree[%s]" % self.id):
+            return None
+
+        return (parseTree, (self.getText(), self.id))
+
+
+    def storeTree(self, compact):
+        """Stores a tree produced by the task of getParseTask()."""
+
+        self.storeCache("style:tree[%s]" % self.id, compact)
 
 
 
@@ -119,6 +153,8 @@ class StyleItem(AbstractItem.AbstractItem):
         """
         Returns a permutated tree: a copy of the original tree
         where conditions based on the given permutation are resolved.
+
+        Like the original tree the result is a shared CompactTree.
         """
 
         if permutation is None:
@@ -126,19 +162,20 @@ class StyleItem(AbstractItem.AbstractItem):
 
         permutation = self.filterPermutation(permutation)
         field = "style:permutated[%s]-%s" % (self.id, permutation)
-        tree = self.project.getCache().read(field, self.mtime)
+        compact = self.readCache(field)
 
-        if not tree:
-            tree = copy.deepcopy(self.__getTree())
+        if compact is None:
+            tree = self.__getTree().toNode()
 
             Console.info("Permutating stylesheet %s...", Console.colorize(self.id, "bold"))
             Console.indent()
             Engine.permutateTree(tree, permutation)
             Console.outdent()
 
-            self.project.getCache().store(field, tree, self.mtime, True)
+            compact = CompactTree.fromNode(tree)
+            self.storeCache(field, compact, transient=True)
 
-        return tree
+        return compact
 
 
 
@@ -146,25 +183,7 @@ class StyleItem(AbstractItem.AbstractItem):
         """Returns a set of dependencies seen through the given list of known items (ignoring all unknown items in
         original set)."""
 
-        meta = self.getMetaData(permutation)
-        result = set()
-
-        # Manually defined names/classes
-        for entry in meta.requires:
-            if entry == self.id:
-                pass
-            elif entry in items and items[entry].kind == "jasy.Style":
-                result.add(items[entry])
-            elif "*" in entry:
-                reobj = re.compile(fnmatch.translate(entry))
-                for itemId in items:
-                    if itemId != self.id:
-                        if reobj.match(itemId):
-                            result.add(items[itemId])
-            elif warnings:
-                Console.warn("Missing item for require command: %s in %s", entry, self.id)
-
-        return result
+        return DependencyGraph.resolveDependencies(self, self.getEdges(permutation, items), items, fields, warnings)
 
 
 
@@ -174,24 +193,58 @@ class StyleItem(AbstractItem.AbstractItem):
         make the item work, but are not required being available before the current item.
         """
 
+        return DependencyGraph.resolveBreaks(self, self.getEdges(permutation, items), items, warnings)
+
+
+
+    def getEdges(self, permutation, items, signature=None, index=None):
+        """
+        Returns the outgoing edges of this stylesheet (see DependencyGraph.Edges) for the given permutation.
+
+        Names are matched against the given dictionary of all known items. Wildcards are matched using the
+        given IdIndex of these items (created on demand). The result is cached when the signature of these
+        items is given (see DependencyGraph.getSignature()).
+
+        """
+
+        permutation = self.filterPermutation(permutation)
+
+        field = "style:edges[%s]-%s-%s" % (self.id, permutation, signature)
+        if signature is not None:
+            edges = self.readCache(field)
+            if edges is not None:
+                return edges
+
         meta = self.getMetaData(permutation)
-        result = set()
+        edges = DependencyGraph.Edges()
+
+        if index is None and any("*" in entry for entry in meta.requires | meta.breaks):
+            index = IdIndex.IdIndex(items)
+
+        self.__collectEdges(meta.requires, items, index, edges.requires, edges.missingRequires)
+        self.__collectEdges(meta.breaks, items, index, edges.breaks, edges.missingBreaks)
+
+        if signature is not None:
+            self.storeCache(field, edges)
+
+        return edges
+
+
+
+    def __collectEdges(self, names, items, index, result, missing):
+        """Adds the IDs of the items matching the given names (or wildcards) to result, unknown names to missing."""
 
-        for entry in meta.breaks:
+        for entry in names:
             if entry == self.id:
                 pass
             elif entry in items and items[entry].kind == "jasy.Style":
-                result.add(items[entry])
+                result.add(entry)
             elif "*" in entry:
-                reobj = re.compile(fnmatch.translate(entry))
-                for itemId in items:
+                for itemId in index.match(entry):
                     if itemId != self.id:
-                        if reobj.match(itemId):
-                            result.add(items[itemId])
-            elif warnings:
-                Console.warn("Missing item for break command: %s in %s", entry, self.id)
-
-        return result
+                        result.add(itemId)
+            else:
+                missing.append(entry)
 
 
 
@@ -201,11 +254,11 @@ class StyleItem(AbstractItem.AbstractItem):
         permutation = self.filterPermutation(permutation)
 
         field = "style:meta[%s]-%s" % (self.id, permutation)
-        meta = self.project.getCache().read(field, self.mtime)
+        meta = self.readCache(field)
         if meta is None:
             Console.debug("Collecting meta data %s...", Console.colorize(self.id, "bold"))
             meta = MetaData.MetaData(self.__getPermutatedTree(permutation))
-            self.project.getCache().store(field, meta, self.mtime)
+            self.storeCache(field, meta)
 
         return meta
 
@@ -215,11 +268,11 @@ class StyleItem(AbstractItem.AbstractItem):
         """Returns the fields which are used by this stylesheet."""
 
         field = "style:fields[%s]" % self.id
-        fields = self.project.getCache().read(field, self.mtime)
+        fields = self.readCache(field)
         if fields is None:
             Console.debug("Collecting fields %s...", Console.colorize(self.id, "bold"))
-            fields = collectFields(self.__getTree())
-            self.project.getCache().store(field, fields, self.mtime)
+            fields = collectFields(self.__getTree().toNode())
+            self.storeCache(field, fields)
 
         return fields
 
@@ -229,14 +282,14 @@ class StyleItem(AbstractItem.AbstractItem):
         """Returns the includes which are referenced by this stylesheet."""
 
         field = "style:includes[%s]" % self.id
-        includes = self.project.getCache().read(field, self.mtime)
+        includes = self.readCache(field)
         if includes is None:
             Console.debug("Collecting includes %s...", Console.colorize(self.id, "bold"))
             includes = []
-            for includeName, includeNode in includeGenerator(self.__getPermutatedTree(permutation)):
+            for includeName, includeNode in includeGenerator(self.__getPermutatedTree(permutation).toNode()):
                 includes.append(includeName)
 
-            self.project.getCache().store(field, includes, self.mtime)
+            self.storeCache(field, includes)
 
         return includes
 
@@ -278,6 +331,39 @@ class StyleItem(AbstractItem.AbstractItem):
 
 
 
+    def getIncludeDigest(self, profile):
+        """Returns a combined checksum of the content digests of the stylesheet and all its includes."""
+
+        permutation = self.filterPermutation(profile.getCurrentPermutation())
+        session = profile.getSession()
+
+        digests = [self.getDigest()]
+        for includeName in self.getIncludes(permutation):
+            styleItem = session.getStyleByName(includeName)
+            if styleItem is None:
+                raise Exception("Did not find style sheet: %s" % includeName)
+            digests.append(styleItem.getIncludeDigest(profile))
+
+        return jasy.core.Util.generateChecksum("|".join(digests))
+
+
+
+    def getIncludeValidator(self, profile):
+        """
+        Returns the cache validator of the stylesheet including all its includes.
+
+        This is the sum of modification dates or a combined checksum of all content digests
+        when the project is configured for content based cache validation.
+
+        """
+
+        if not self.project.hasContentValidation():
+            return self.getModificationTime(profile)
+
+        return self.getIncludeDigest(profile)
+
+
+
     def getMergedTree(self, profile):
         """
         Returns the merged (includes resolved) and optimized.
@@ -288,11 +374,8 @@ class StyleItem(AbstractItem.AbstractItem):
 
         session = profile.getSession()
 
-        # Work is on base of optimized tree
-        tree = self.__getPermutatedTree(profile.getCurrentPermutation())
-
-        # Copying original tree
-        tree = copy.deepcopy(tree)
+        # Work is on base of a private copy of the optimized tree
+        tree = self.__getPermutatedTree(profile.getCurrentPermutation()).toNode()
 
         # Run the actual resolver engine
         for includeName, includeNode in includeGenerator(tree):
@@ -301,12 +384,9 @@ class StyleItem(AbstractItem.AbstractItem):
             if styleItem is None:
                 raise Exception("Did not find style sheet: %s" % includeName)
 
-            # Use merged tree for children as well...
+            # Use merged tree for children as well (which is already a private copy)
             childRoot = styleItem.getMergedTree(profile)
 
-            # Copy it for being able to freely modify it
-            childRoot = copy.deepcopy(childRoot)
-
             # Then replace it with include node
             includeNode.parent.replace(includeNode, childRoot)
 
@@ -318,24 +398,70 @@ class StyleItem(AbstractItem.AbstractItem):
         """Returns the compressed CSS code of this item."""
 
         field = "style:compressed[%s]-%s" % (self.id, profile.getId())
-        mtime = self.getModificationTime(profile)
+        validator = self.getIncludeValidator(profile)
+
+        # Shared cache entries have to reflect the content of all includes
+        digest = self.getIncludeDigest(profile) if self.project.getSession().getSharedCache() else None
 
-        compressed = self.project.getCache().read(field, mtime)
+        compressed = self.readCache(field, validator, digest)
 
         if compressed is None:
+            compressed, sourceMap = self.__compress(profile, validator, digest)
+
+        return compressed
+
+
+
+    def getCompressedWithMap(self, profile):
+        """Returns the compressed CSS code and its SourceMap. Both are created in a single pass when not cached."""
+
+        validator = self.getIncludeValidator(profile)
+        digest = self.getIncludeDigest(profile) if self.project.getSession().getSharedCache() else None
+
+        compressed = self.readCache("style:compressed[%s]-%s" % (self.id, profile.getId()), validator, digest)
+        sourceMap = self.readCache("style:sourcemap[%s]-%s" % (self.id, profile.getId()), validator, digest) if compressed is not None else None
+
+        if sourceMap is None:
+            compressed, sourceMap = self.__compress(profile, validator, digest, True)
+
+        return compressed, sourceMap
+
 
-            Console.info("Compressing tree %s...", Console.colorize(self.id, "bold"))
 
-            # Start with the merged tree (includes resolved)
-            tree = self.getMergedTree(profile)
+    def getSourceMap(self, profile):
+        """Returns the SourceMap of the code returned by getCompressed() (pointing to this stylesheet and all its includes)."""
 
-            # Reduce tree
-            Engine.reduceTree(tree, profile)
+        return self.getCompressedWithMap(profile)[1]
 
-            # Compress tree
+
+
+    def __compress(self, profile, validator, digest, withMap=False):
+        """Compresses the stylesheet for the given profile and stores the result (and optionally the source map)."""
+
+        Console.info("Compressing tree %s...", Console.colorize(self.id, "bold"))
+
+        # Start with the merged tree (includes resolved)
+        tree = self.getMergedTree(profile)
+
+        # Reduce tree
+        Engine.reduceTree(tree, profile)
+
+        # Compress tree
+        if withMap:
+            session = self.project.getSession()
+
+            def getLineOffsets(fileName):
+                styleItem = session.getStyleByName(fileName)
+                return SourceMap.getLineOffsets(styleItem.getText()) if styleItem else None
+
+            compressed, sourceMap = Engine.compressTreeWithMap(tree, profile.getCompressionLevel(), profile.getFormattingLevel(), getLineOffsets)
+            self.storeCache("style:sourcemap[%s]-%s" % (self.id, profile.getId()), sourceMap, validator, digest)
+
+        else:
             compressed = Engine.compressTree(tree, profile.getCompressionLevel(), profile.getFormattingLevel())
+            sourceMap = None
 
-            # Store in cache
-            self.project.getCache().store(field, compressed, mtime)
+        # Store in cache
+        self.storeCache("style:compressed[%s]-%s" % (self.id, profile.getId()), compressed, validator, digest)
 
-        return compressed
+        return compressed, sourceMap
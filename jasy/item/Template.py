@@ -40,8 +40,8 @@ class TemplateItem(AbstractItem.AbstractItem):
         return (fileId + os.path.splitext(relpath)[0]).replace("/", ".")
 
 
-    def attach(self, path):
-        result = super().attach(path)
+    def attach(self, path, stat=None):
+        result = super().attach(path, stat)
 
         # Force adding an matching class item to the registry
         self.getScriptItem()
@@ -71,10 +71,10 @@ class TranslationItem(AbstractItem.AbstractItem):
         return (fileId + os.path.splitext(relpath)[0]).replace("/", ".")
 
 
-    def attach(self, path):
+    def attach(self, path, stat=None):
 
         # Call AbstractItem's attach method first
-        super().attach(path)
+        super().attach(path, stat)
 
         Console.debug("Loading translation file: %s", path)
         Console.indent()
@@ -104,6 +104,19 @@ class TranslationItem(AbstractItem.AbstractItem):
         return self
 
 
+    def restore(self, path, stat, state):
+
+        # Skip parsing of the file when the table was stored in the project registry
+        AbstractItem.AbstractItem.attach(self, path, stat)
+        self.table = state
+
+        return self
+
+
+    def getState(self):
+        return self.table
+
+
     def export(self, classes, formatted=True):
         """Exports the translation table as JSON based on the given set of classes."""
 
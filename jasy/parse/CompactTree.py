@@ -0,0 +1,442 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Compact, array-backed representation of node trees.
+
+Nodes are stored in pre-order as a struct of arrays (type ids, subtree sizes, lines,
+positions and relations) with all names and scalar attribute values interned. This
+needs a fraction of the memory of the node objects, does not keep the tokenizer (and
+with it the source code) alive and is cheap to pickle.
+
+Use fromNode() and CompactTree.toNode() to convert between both representations. Passes
+which only need to read the tree can use the accessors of CompactTree directly.
+"""
+
+import sys
+import array
+import copy
+
+import jasy.parse.AbstractNode as AbstractNode
+
+
+__all__ = ("CompactTree", "fromNode")
+
+
+# Attributes which are stored in dedicated arrays or side tables
+structuralAttributes = ("line", "type", "tokenizer", "start", "end", "rel", "parent", "comments", "scope")
+
+# Types of attribute values which are interned in the value table
+scalarTypes = (str, int, float, bool, type(None))
+
+# Flag: Node was created with a tokenizer
+FLAG_TOKENIZER = 1
+
+# Cache for the attribute names of node classes
+__attributeNames = {}
+
+
+def getAttributeNames(nodeClass):
+    """Returns the names of all non-structural slots of the given node class (including inherited ones)."""
+
+    names = __attributeNames.get(nodeClass)
+    if names is None:
+        names = []
+        for cls in reversed(nodeClass.__mro__):
+            for name in getattr(cls, "__slots__", ()):
+                if name not in structuralAttributes and name not in names:
+                    names.append(name)
+
+        names = __attributeNames[nodeClass] = tuple(names)
+
+    return names
+
+
+
+class OriginToken:
+
+    """Last token of the original tokenizer. Used for positioning nodes which are newly created by optimizers."""
+
+    __slots__ = ["type", "start", "line", "end"]
+
+    def __init__(self, type=None, start=0, line=None, end=0):
+        self.type = type
+        self.start = start
+        self.line = line
+        self.end = end
+
+
+
+class Origin:
+
+    """
+    Replaces the tokenizer reference of nodes converted back from a compact tree.
+
+    Offers the data of a tokenizer which is used for creating new nodes, but does not keep the source code alive.
+
+    """
+
+    __slots__ = ["fileId", "line", "token", "source"]
+
+    def __init__(self, fileId=None, token=None):
+        self.fileId = fileId
+        self.token = token
+        self.line = token.line if token else None
+        self.source = None
+
+
+
+class CompactTree:
+
+    """
+    Pre-order struct of arrays for a node tree.
+
+    Node indexes are positions in pre-order. The children of a node directly follow it, each child
+    spanning the number of entries stored in `sizes`. Empty children (e.g. holes in array literals) are
+    stored with type id 0.
+
+    """
+
+    __slots__ = [
+        # class of the nodes to create when converting back
+        "nodeClass",
+
+        # interned names (types, relations, attribute names) and scalar attribute values
+        "strings", "values",
+
+        # per node data
+        "types", "sizes", "lines", "starts", "ends", "rels", "flags",
+
+        # attributes of node i are stored in attrNames/attrValues[attrOffsets[i]:attrOffsets[i+1]]
+        "attrOffsets", "attrNames", "attrValues",
+
+        # side tables: node index => data
+        "comments", "scopes", "extras",
+
+        # data of the original tokenizer
+        "fileId", "token"
+    ]
+
+
+    def __init__(self, nodeClass):
+        self.nodeClass = nodeClass
+
+        self.strings = [None]
+        self.values = []
+
+        self.types = array.array("H")
+        self.sizes = array.array("I")
+        self.lines = array.array("i")
+        self.starts = array.array("i")
+        self.ends = array.array("i")
+        self.rels = array.array("H")
+        self.flags = array.array("B")
+
+        self.attrOffsets = array.array("I", [0])
+        self.attrNames = array.array("H")
+        self.attrValues = array.array("I")
+
+        self.comments = {}
+        self.scopes = {}
+        self.extras = {}
+
+        self.fileId = None
+        self.token = None
+
+
+    def __len__(self):
+        """Number of entries (nodes and empty children)."""
+
+        return len(self.types)
+
+
+    def getSize(self):
+        """Returns an estimation of the memory size in bytes."""
+
+        size = sys.getsizeof(self.strings) + sys.getsizeof(self.values)
+        size += sum([sys.getsizeof(value) for value in self.strings])
+        size += sum([sys.getsizeof(value) for value in self.values])
+
+        for data in (self.types, self.sizes, self.lines, self.starts, self.ends, self.rels, self.flags, self.attrOffsets, self.attrNames, self.attrValues):
+            size += sys.getsizeof(data)
+
+        for table in (self.comments, self.scopes, self.extras):
+            size += sys.getsizeof(table) + len(table) * 256
+
+        return size
+
+
+    def getType(self, index=0):
+        """Returns the type of the node at the given index (None for empty children)."""
+
+        return self.strings[self.types[index]]
+
+
+    def getLine(self, index=0):
+        line = self.lines[index]
+        return None if line == -1 else line
+
+
+    def getRelation(self, index):
+        """Returns the relation of the node at the given index to its parent e.g. "condition" or None."""
+
+        return self.strings[self.rels[index]]
+
+
+    def getAttribute(self, index, name, default=None):
+        """Returns the value of the given attribute (e.g. "value" or "assignOp") of the node at the given index."""
+
+        strings = self.strings
+        for pos in range(self.attrOffsets[index], self.attrOffsets[index + 1]):
+            if strings[self.attrNames[pos]] == name:
+                return self.values[self.attrValues[pos]]
+
+        extras = self.extras.get(index)
+        if extras and name in extras:
+            return extras[name]
+
+        return default
+
+
+    def getComments(self, index):
+        return self.comments.get(index)
+
+
+    def getScope(self, index):
+        return self.scopes.get(index)
+
+
+    def getChildren(self, index=0):
+        """Returns the indexes of all children of the node at the given index."""
+
+        sizes = self.sizes
+        child = index + 1
+        last = index + sizes[index]
+
+        result = []
+        while child < last:
+            result.append(child)
+            child += sizes[child]
+
+        return result
+
+
+    def findAll(self, type):
+        """Returns the indexes of all nodes of the given type."""
+
+        try:
+            typeId = self.strings.index(type)
+        except ValueError:
+            return []
+
+        return [index for index, value in enumerate(self.types) if value == typeId]
+
+
+    def toNode(self, index=0):
+        """Converts the (sub) tree starting at the given index back into a tree of nodes."""
+
+        nodeClass = self.nodeClass
+        strings = self.strings
+        values = self.values
+        types = self.types
+        sizes = self.sizes
+        lines = self.lines
+        starts = self.starts
+        ends = self.ends
+        rels = self.rels
+        flags = self.flags
+        attrOffsets = self.attrOffsets
+        attrNames = self.attrNames
+        attrValues = self.attrValues
+        comments = self.comments
+        scopes = self.scopes
+        extras = self.extras
+
+        origin = Origin(self.fileId, self.token)
+
+        root = None
+        parents = []
+        last = index + sizes[index]
+
+        for pos in range(index, last):
+
+            # Pop all parents which are completed
+            while parents and pos >= parents[-1][1]:
+                parents.pop()
+
+            typeId = types[pos]
+            if typeId == 0:
+                node = None
+
+            else:
+                node = nodeClass(None, strings[typeId])
+
+                line = lines[pos]
+                node.line = None if line == -1 else line
+
+                start = starts[pos]
+                node.start = None if start == -1 else start
+
+                end = ends[pos]
+                node.end = None if end == -1 else end
+
+                if flags[pos] & FLAG_TOKENIZER:
+                    node.tokenizer = origin
+
+                for attrPos in range(attrOffsets[pos], attrOffsets[pos + 1]):
+                    setattr(node, strings[attrNames[attrPos]], values[attrValues[attrPos]])
+
+                if pos in extras:
+                    for name, value in extras[pos].items():
+                        setattr(node, name, copy.deepcopy(value))
+
+                if pos in comments:
+                    node.comments = list(comments[pos])
+
+                if pos in scopes:
+                    node.scope = scopes[pos].copy()
+
+            if parents:
+                parent = parents[-1][0]
+                list.append(parent, node)
+
+                if node is not None:
+                    node.parent = parent
+
+                    relId = rels[pos]
+                    if relId:
+                        rel = strings[relId]
+                        setattr(parent, rel, node)
+                        node.rel = rel
+
+            else:
+                root = node
+
+            if node is not None and sizes[pos] > 1:
+                parents.append((node, pos + sizes[pos]))
+
+        return root
+
+
+
+def fromNode(node):
+    """Converts the given node (and all its children) into a CompactTree."""
+
+    tree = CompactTree(node.__class__)
+
+    strings = tree.strings
+    values = tree.values
+    types = tree.types
+    sizes = tree.sizes
+    lines = tree.lines
+    starts = tree.starts
+    ends = tree.ends
+    rels = tree.rels
+    flags = tree.flags
+    attrOffsets = tree.attrOffsets
+    attrNames = tree.attrNames
+    attrValues = tree.attrValues
+
+    stringIds = {None: 0}
+    valueIds = {}
+
+    def intern(value):
+        stringId = stringIds.get(value)
+        if stringId is None:
+            stringId = stringIds[value] = len(strings)
+            strings.append(value)
+
+        return stringId
+
+    def internValue(value):
+        key = (type(value), value)
+        valueId = valueIds.get(key)
+        if valueId is None:
+            valueId = valueIds[key] = len(values)
+            values.append(value)
+
+        return valueId
+
+    tokenizer = getattr(node, "tokenizer", None)
+    if tokenizer is not None:
+        tree.fileId = getattr(tokenizer, "fileId", None)
+        token = getattr(tokenizer, "token", None)
+        if token is not None:
+            tree.token = OriginToken(getattr(token, "type", None), token.start, token.line, token.end)
+
+    # Stack of (node, position) in pre-order; sizes are fixed when a node is completed
+    stack = [node]
+    opened = []
+
+    while stack:
+        current = stack.pop()
+
+        if current is None:
+            pos = len(types)
+            types.append(0)
+            sizes.append(1)
+            lines.append(-1)
+            starts.append(-1)
+            ends.append(-1)
+            rels.append(0)
+            flags.append(0)
+            attrOffsets.append(len(attrNames))
+            continue
+
+        if type(current) is tuple:
+            # Marker for completed node: fix up its size
+            pos = current[1]
+            sizes[pos] = len(types) - pos
+            continue
+
+        pos = len(types)
+        types.append(intern(current.type))
+        sizes.append(1)
+
+        line = getattr(current, "line", None)
+        lines.append(-1 if line is None else line)
+
+        start = getattr(current, "start", None)
+        starts.append(-1 if start is None else start)
+
+        end = getattr(current, "end", None)
+        ends.append(-1 if end is None else end)
+
+        rels.append(intern(getattr(current, "rel", None)))
+        flags.append(FLAG_TOKENIZER if hasattr(current, "tokenizer") else 0)
+
+        for name in getAttributeNames(current.__class__):
+            if hasattr(current, name):
+                value = getattr(current, name)
+
+                if isinstance(value, AbstractNode.AbstractNode):
+                    if getattr(value, "rel", None) != name:
+                        raise ValueError("Unsupported node reference in attribute %s of %s" % (name, current.type))
+
+                elif type(value) in scalarTypes:
+                    attrNames.append(intern(name))
+                    attrValues.append(internValue(value))
+
+                else:
+                    if pos not in tree.extras:
+                        tree.extras[pos] = {}
+
+                    tree.extras[pos][name] = copy.deepcopy(value)
+
+        attrOffsets.append(len(attrNames))
+
+        comments = getattr(current, "comments", None)
+        if comments is not None:
+            tree.comments[pos] = list(comments)
+
+        scope = getattr(current, "scope", None)
+        if scope is not None:
+            tree.scopes[pos] = scope
+
+        if len(current) > 0:
+            stack.append((current, pos))
+            stack.extend(reversed(current))
+
+    return tree
@@ -14,11 +14,15 @@ class ScopeData():
     * Modified Variables (modified)
     * Shared
     * Unused Variables (unused)
+
+    Scopes which contain modifications since scanning are flagged as dirty (see ScopeScanner.markDirty()).
     """
 
-    __slots__ = ["name", "params", "declared", "accessed", "modified", "shared", "unused", "packages"]
+    fields = ("name", "params", "declared", "accessed", "modified", "shared", "unused", "packages")
+    __slots__ = list(fields) + ["dirty"]
 
     def __init__(self):
+        self.dirty = False
         self.name = None
         self.params = set()
         self.declared = set()
@@ -29,7 +33,7 @@ class ScopeData():
         self.packages = {}
 
     def __iter__(self):
-        for field in self.__slots__:
+        for field in self.fields:
             yield field
 
     def __getitem__(self, key):
@@ -52,6 +56,22 @@ class ScopeData():
 
         raise KeyError("Unknown key: %s" % key)
 
+    def copy(self):
+        """
+        Returns a shallow copy of this instance.
+
+        Used for attaching data to trees restored from snapshots so that flagging scopes as dirty does not
+        modify the snapshot. The collected data itself is only replaced, never modified, after scanning.
+
+        """
+
+        result = ScopeData()
+        result.dirty = self.dirty
+        for field in self.fields:
+            setattr(result, field, getattr(self, field))
+
+        return result
+
     def export(self):
         """Exports all data as a Python dict instance."""
 
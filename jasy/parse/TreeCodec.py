@@ -0,0 +1,382 @@
+#
+# Jasy - Web Tooling Framework
+# Copyright 2013-2014 Sebastian Werner
+#
+
+"""
+Binary serialization of syntax trees.
+
+Trees are written as a CompactTree: an interned string and value table followed by the
+pre-order node stream. Line numbers are stored as zig-zag encoded varint deltas to the
+previous node. All other columns of the stream (types, sizes, relations, positions, ...)
+use the smallest fixed width fitting all their values, which allows to load them in bulk.
+Comments, scope data and other non-scalar attributes are stored as side tables.
+
+Decoding is a single linear pass over the data and does not need to reconstruct a generic
+object graph.
+"""
+
+import array
+import itertools
+import pickle
+import re
+import struct
+import sys
+
+import jasy.parse.AbstractNode as AbstractNode
+import jasy.parse.CompactTree as CompactTree
+
+
+__all__ = ("encode", "decode", "CodecError")
+
+
+# Marks the start of encoded trees, followed by the format version
+magic = b"JT"
+version = 1
+
+# Kind of tree which was encoded (decoded trees are returned in the same representation)
+KIND_NODE = 0
+KIND_COMPACT = 1
+
+# Value tags of the value table
+VALUE_NONE = 0
+VALUE_FALSE = 1
+VALUE_TRUE = 2
+VALUE_INT = 3
+VALUE_FLOAT = 4
+VALUE_STR = 5
+
+doubleStruct = struct.Struct("<d")
+
+# Types of fixed width columns ordered by size
+columnTypes = ("B", "H", "I", "Q")
+
+# Matches varints using more than one byte
+multiByteMatcher = re.compile(b"[\\x80-\\xff]+[\\x00-\\x7f]")
+
+
+class CodecError(Exception):
+
+    """Thrown for data which was not produced by encode() or by an incompatible version."""
+
+    pass
+
+
+
+#
+# Varints
+#
+
+def writeVarint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    out.append(value)
+
+
+def writeVarints(out, values):
+    """Writes the number of bytes followed by all values as varints."""
+
+    column = bytearray()
+    for value in values:
+        while value > 0x7F:
+            column.append((value & 0x7F) | 0x80)
+            value >>= 7
+
+        column.append(value)
+
+    writeVarint(out, len(column))
+    out += column
+
+
+def zigzag(values):
+    """Maps signed to unsigned values: 0, -1, 1, -2, 2 => 0, 1, 2, 3, 4."""
+
+    return [(value << 1) if value >= 0 else ((-value << 1) - 1) for value in values]
+
+
+def unzigzag(values):
+    return [(value >> 1) ^ -(value & 1) for value in values]
+
+
+def deltas(values):
+    """Returns the differences between all values (-1 is used for None by CompactTree)."""
+
+    previous = 0
+    result = []
+    for value in values:
+        result.append(value - previous)
+        previous = value
+
+    return result
+
+
+def writeColumn(out, values):
+    """Writes the (unsigned) values using the smallest fixed width fitting all of them."""
+
+    maximum = max(values) if len(values) else 0
+    for typecode in columnTypes:
+        if maximum < 1 << (8 * array.array(typecode).itemsize):
+            break
+
+    column = array.array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+
+    encoded = column.tobytes()
+    out.append(ord(typecode))
+    writeVarint(out, len(encoded))
+    out += encoded
+
+
+def readVarint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+
+        shift += 7
+
+
+def readVarints(data, pos):
+    """Reads a column written by writeVarints(). Returns the list of values and the new position."""
+
+    length, pos = readVarint(data, pos)
+    end = pos + length
+    column = data[pos:end]
+
+    # Values smaller than 128 use a single byte and are copied in bulk, only longer varints are decoded one by one.
+    values = []
+    last = 0
+    for match in multiByteMatcher.finditer(column):
+        start, stop = match.span()
+        if start > last:
+            values.extend(column[last:start])
+
+        result = 0
+        shift = 0
+        for byte in column[start:stop]:
+            result |= (byte & 0x7F) << shift
+            shift += 7
+
+        values.append(result)
+        last = stop
+
+    values.extend(column[last:])
+
+    return values, end
+
+
+def readColumn(data, pos, typecode):
+    """Reads a column written by writeColumn() into an array of the given type. Returns the array and the new position."""
+
+    storedType = chr(data[pos])
+    length, pos = readVarint(data, pos + 1)
+    end = pos + length
+
+    column = array.array(storedType)
+    column.frombytes(data[pos:end])
+    if sys.byteorder != "little":
+        column.byteswap()
+
+    if storedType != typecode:
+        column = array.array(typecode, column)
+
+    return column, end
+
+
+
+#
+# Tables
+#
+
+def writeString(out, value):
+    encoded = value.encode("utf-8")
+    writeVarint(out, len(encoded))
+    out += encoded
+
+
+def readString(data, pos):
+    length, pos = readVarint(data, pos)
+    end = pos + length
+    return data[pos:end].decode("utf-8"), end
+
+
+def writeValue(out, value):
+    if value is None:
+        out.append(VALUE_NONE)
+    elif value is False:
+        out.append(VALUE_FALSE)
+    elif value is True:
+        out.append(VALUE_TRUE)
+    elif type(value) is int:
+        out.append(VALUE_INT)
+        writeVarint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+    elif type(value) is float:
+        out.append(VALUE_FLOAT)
+        out += doubleStruct.pack(value)
+    else:
+        out.append(VALUE_STR)
+        writeString(out, value)
+
+
+def readValue(data, pos):
+    tag = data[pos]
+    pos += 1
+
+    if tag == VALUE_NONE:
+        return None, pos
+    elif tag == VALUE_FALSE:
+        return False, pos
+    elif tag == VALUE_TRUE:
+        return True, pos
+    elif tag == VALUE_INT:
+        value, pos = readVarint(data, pos)
+        return (value >> 1) ^ -(value & 1), pos
+    elif tag == VALUE_FLOAT:
+        return doubleStruct.unpack_from(data, pos)[0], pos + doubleStruct.size
+    elif tag == VALUE_STR:
+        return readString(data, pos)
+
+    raise CodecError("Invalid value tag: %s" % tag)
+
+
+
+#
+# Public API
+#
+
+def encode(tree):
+    """Encodes the given tree (a node or a CompactTree) into bytes."""
+
+    if isinstance(tree, AbstractNode.AbstractNode):
+        kind = KIND_NODE
+        try:
+            tree = CompactTree.fromNode(tree)
+        except ValueError as error:
+            raise CodecError(error)
+    elif isinstance(tree, CompactTree.CompactTree):
+        kind = KIND_COMPACT
+    else:
+        raise CodecError("Unsupported value: %s" % type(tree))
+
+    out = bytearray(magic)
+    out.append(version)
+    out.append(kind)
+
+    # Interned strings (the first entry is always None)
+    writeVarint(out, len(tree.strings) - 1)
+    for value in tree.strings[1:]:
+        writeString(out, value)
+
+    writeVarint(out, len(tree.values))
+    for value in tree.values:
+        writeValue(out, value)
+
+    # Node stream
+    writeVarint(out, len(tree.types))
+    writeColumn(out, tree.types)
+    writeColumn(out, tree.sizes)
+    writeColumn(out, tree.rels)
+    writeColumn(out, tree.flags)
+    writeVarints(out, zigzag(deltas(tree.lines)))
+    writeColumn(out, zigzag(deltas(tree.starts)))
+    writeColumn(out, zigzag([end - start for start, end in zip(tree.starts, tree.ends)]))
+
+    offsets = tree.attrOffsets
+    writeColumn(out, [offsets[pos + 1] - offsets[pos] for pos in range(len(tree.types))])
+    writeColumn(out, tree.attrNames)
+    writeColumn(out, tree.attrValues)
+
+    # Side tables
+    token = tree.token
+    if token is not None:
+        token = (token.type, token.start, token.line, token.end)
+
+    side = pickle.dumps((tree.nodeClass, tree.fileId, token, tree.comments, tree.scopes, tree.extras), pickle.HIGHEST_PROTOCOL)
+    writeVarint(out, len(side))
+    out += side
+
+    return bytes(out)
+
+
+def decode(data):
+    """Decodes the data produced by encode(). Returns a tree in the original representation (node or CompactTree)."""
+
+    if data[:2] != magic:
+        raise CodecError("Invalid data")
+
+    if data[2] != version:
+        raise CodecError("Unsupported version: %s" % data[2])
+
+    kind = data[3]
+    pos = 4
+
+    count, pos = readVarint(data, pos)
+    strings = [None]
+    for index in range(count):
+        value, pos = readString(data, pos)
+        strings.append(value)
+
+    count, pos = readVarint(data, pos)
+    values = []
+    for index in range(count):
+        value, pos = readValue(data, pos)
+        values.append(value)
+
+    count, pos = readVarint(data, pos)
+    types, pos = readColumn(data, pos, "H")
+    sizes, pos = readColumn(data, pos, "I")
+    rels, pos = readColumn(data, pos, "H")
+    flags, pos = readColumn(data, pos, "B")
+
+    column, pos = readVarints(data, pos)
+    lines = array.array("i", itertools.accumulate(unzigzag(column)))
+
+    column, pos = readColumn(data, pos, "Q")
+    starts = array.array("i", itertools.accumulate(unzigzag(column)))
+
+    column, pos = readColumn(data, pos, "Q")
+    ends = array.array("i", [start + length for start, length in zip(starts, unzigzag(column))])
+
+    attrCounts, pos = readColumn(data, pos, "I")
+    attrNames, pos = readColumn(data, pos, "H")
+    attrValues, pos = readColumn(data, pos, "I")
+
+    if len(types) != count or len(attrCounts) != count:
+        raise CodecError("Invalid node stream")
+
+    length, pos = readVarint(data, pos)
+    nodeClass, fileId, token, comments, scopes, extras = pickle.loads(data[pos:pos + length])
+
+    tree = CompactTree.CompactTree(nodeClass)
+    tree.strings = strings
+    tree.values = values
+    tree.types = types
+    tree.sizes = sizes
+    tree.rels = rels
+    tree.flags = flags
+    tree.lines = lines
+    tree.starts = starts
+    tree.ends = ends
+    tree.attrOffsets = array.array("I", [0])
+    tree.attrOffsets.extend(itertools.accumulate(attrCounts))
+    tree.attrNames = attrNames
+    tree.attrValues = attrValues
+    tree.comments = comments
+    tree.scopes = scopes
+    tree.extras = extras
+    tree.fileId = fileId
+
+    if token is not None:
+        tree.token = CompactTree.OriginToken(*token)
+
+    if kind == KIND_NODE:
+        return tree.toNode()
+
+    return tree
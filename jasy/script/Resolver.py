@@ -21,7 +21,7 @@ class Resolver(AbstractResolver.Resolver):
 
 
     def getItemDependencies(self, item):
-        return item.getDependencies(self.permutation, items=self.items, fields=self.fields)
+        return self.getGraph().getDependencies(item, self.permutation, fields=self.fields, warnings=True)
 
 
     def getSorted(self):
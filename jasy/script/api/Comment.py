@@ -66,20 +66,27 @@ class Comment():
     # Relation to code
     context = None
 
+    # Raw text of the comment (until processed on first access)
+    __source = None
+
+    # Line number and indentation of the raw comment
+    __lineNo = 0
+    __indent = ""
+
     # Dictionary of tags
-    tags = None
+    __tags = None
 
     # Dictionary of params
-    params = None
+    __params = None
 
     # List of return types
-    returns = None
+    __returns = None
 
     # Static type
-    type = None
+    __type = None
 
     # Collected text of the comment (without the extracted doc relevant data)
-    text = None
+    __text = None
 
     # Text with extracted / parsed data
     __processedText = None
@@ -100,37 +107,95 @@ class Comment():
         self.fileId = fileId
 
         # Figure out the type of the comment based on the starting characters
-
-        # Inline comments
         if text.startswith("//"):
-            # "// hello" => "   hello"
-            text = "  " + text[2:]
             self.variant = "single"
 
         # Doc comments
         elif text.startswith("/**"):
-            # "/** hello */" => "    hello "
-            text = "   " + text[3:-2]
             self.variant = "doc"
 
         # Protected comments which should not be removed (e.g these are used for license blocks)
         elif text.startswith("/*!"):
-            # "/*! hello */" => "    hello "
-            text = "   " + text[3:-2]
             self.variant = "protected"
 
         # A normal multiline comment
         elif text.startswith("/*"):
-            # "/* hello */" => "   hello "
-            text = "  " + text[2:-2]
             self.variant = "multi"
 
         else:
             raise CommentException("Invalid comment text: %s" % text, lineNo)
 
+        # Keep the raw comment. Outdenting and doc processing happen on first access.
+        self.__source = text
+        self.__lineNo = lineNo
+        self.__indent = indent
+
+
+    @property
+    def text(self):
+        """Text of the comment (without the extracted doc relevant data)."""
+
+        self.__process()
+        return self.__text
+
+
+    @property
+    def tags(self):
+        """Dictionary of tags."""
+
+        self.__process()
+        return self.__tags
+
+
+    @property
+    def params(self):
+        """Dictionary of params."""
+
+        self.__process()
+        return self.__params
+
+
+    @property
+    def returns(self):
+        """List of return types."""
+
+        self.__process()
+        return self.__returns
+
+
+    @property
+    def type(self):
+        """Static type."""
+
+        self.__process()
+        return self.__type
+
+
+    def __process(self):
+        """Processes the raw comment text (only once)."""
+
+        text = self.__source
+        if text is None:
+            return
+
+        self.__source = None
+        lineNo = self.__lineNo
+
+        if self.variant == "single":
+            # "// hello" => "   hello"
+            text = "  " + text[2:]
+
+        elif self.variant == "doc" or self.variant == "protected":
+            # "/** hello */" => "    hello "
+            text = "   " + text[3:-2]
+
+        else:
+            # "/* hello */" => "   hello "
+            text = "  " + text[2:-2]
+
         # Multi line comments need to have their indentation removed
         if "\n" in text:
-            text = self.__outdent(text, indent, lineNo)
+            text = self.__outdent(text, self.__indent, lineNo)
 
         # For single line comments strip the surrounding whitespace
         else:
@@ -138,7 +203,7 @@ class Comment():
             text = text.strip()
 
         # The text of the comment before any processing took place
-        self.text = text
+        self.__text = text
 
 
         # Perform annotation parsing, markdown conversion and code highlighting on doc blocks
@@ -166,7 +231,7 @@ class Comment():
                     plainText += "\n\n" + b["text"] + "\n\n"
 
             # The without any annotations
-            self.text = plainText.strip()
+            self.__text = plainText.strip()
 
 
     def __splitBlocks(self, text):
@@ -327,6 +392,8 @@ class Comment():
 
         """
 
+        self.__process()
+
         if not Text.supportsMarkdown:
             raise UserError("Markdown is not supported by the system. Documentation comments could converted to HTML.")
 
@@ -370,14 +437,27 @@ class Comment():
 
 
     def getTags(self):
+        """
+        Returns the dictionary of tags.
+
+        Comments which are not processed yet are only processed when the raw text contains tags at all.
+
+        """
+
+        if self.__source is not None:
+            # Without the delimiters as tags are allowed directly in front of the closing "*/"
+            if self.variant != "doc" or not tagMatcher.search(self.__source[3:-2]):
+                return None
+
         return self.tags
 
 
     def hasTag(self, name):
-        if not self.tags:
+        tags = self.getTags()
+        if not tags:
             return False
 
-        return name in self.tags
+        return name in tags
 
 
     def __outdent(self, text, indent, startLineNo):
@@ -521,7 +601,7 @@ class Comment():
         """Extracts leading return defintion (when type is function)"""
 
         def collectReturn(match):
-            self.returns = self.__splitTypeList(match.group(1))
+            self.__returns = self.__splitTypeList(match.group(1))
             return ""
 
         return returnMatcher.sub(collectReturn, text)
@@ -532,7 +612,7 @@ class Comment():
         """Extracts leading type defintion (when value is a static type)"""
 
         def collectType(match):
-            self.type = match.group(1).strip()
+            self.__type = match.group(1).strip()
             return ""
 
         return typeMatcher.sub(collectType, text)
@@ -548,18 +628,18 @@ class Comment():
         """
 
         def collectTags(match):
-            if not self.tags:
-                self.tags = {}
+            if not self.__tags:
+                self.__tags = {}
 
             name = match.group(1)
             param = match.group(3)
 
-            if name in self.tags:
-                self.tags[name].add(param)
+            if name in self.__tags:
+                self.__tags[name].add(param)
             elif param:
-                self.tags[name] = set([param])
+                self.__tags[name] = set([param])
             else:
-                self.tags[name] = True
+                self.__tags[name] = True
 
             return ""
 
@@ -579,10 +659,10 @@ class Comment():
             if paramTypes:
                 paramTypes = self.__splitTypeList(paramTypes)
 
-            if self.params is None:
-                self.params = {}
+            if self.__params is None:
+                self.__params = {}
 
-            params = self.params
+            params = self.__params
             fullName = match.group(1).strip()
             names = fullName.split('.')
 
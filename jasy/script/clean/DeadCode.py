@@ -49,6 +49,7 @@ It can figure out combined expressions as well like:
 __all__ = ("cleanup")
 
 import jasy.core.Console as Console
+import jasy.script.parse.ScopeScanner as ScopeScanner
 
 
 def cleanup(node):
@@ -83,12 +84,15 @@ def __cleanup(node):
             Console.debug("Optimizing if/else at line %s", node.line)
 
             if check is True:
+                ScopeScanner.markDirty(node.parent)
                 node.parent.replace(node, node.thenPart)
 
             elif check is False:
                 if hasattr(node, "elsePart"):
+                    ScopeScanner.markDirty(node.parent)
                     node.parent.replace(node, node.elsePart)
                 else:
+                    ScopeScanner.markDirty(node.parent)
                     node.parent.remove(node)
 
     # Optimize hook statement
@@ -99,8 +103,10 @@ def __cleanup(node):
             optimized = True
 
             if check is True:
+                ScopeScanner.markDirty(node.parent)
                 node.parent.replace(node, node[1])
             elif check is False:
+                ScopeScanner.markDirty(node.parent)
                 node.parent.replace(node, node[2])
 
     # Optimize switch statement
@@ -131,6 +137,7 @@ def __cleanup(node):
             if not matcher:
                 matcher = fallback
 
+            ScopeScanner.markDirty(node.parent)
             node.parent.replace(node, matcher)
             Console.debug("Optimizing switch at line %s", node.line)
             optimized = True
@@ -5,6 +5,7 @@
 #
 
 import jasy.script.parse.Parser as Parser
+import jasy.script.parse.ScopeScanner as ScopeScanner
 import jasy.core.Console as Console
 
 from jasy.script.util import *
@@ -48,6 +49,7 @@ def patch(node, permutation):
             replacement = __translateToJS(permutation.get(name))
             if replacement:
                 replacementNode = Parser.parseExpression(replacement)
+                ScopeScanner.markDirty(callNode.parent)
                 callNode.parent.replace(callNode, replacementNode)
                 modified = True
 
@@ -84,6 +86,7 @@ def patch(node, permutation):
 
                     # Do actual replacement
                     replacementNode = Parser.parseExpression("true" if replacementResult else "false")
+                    ScopeScanner.markDirty(callNode.parent)
                     callNode.parent.replace(callNode, replacementNode)
                     modified = True
 
@@ -111,11 +114,13 @@ def patch(node, permutation):
                             fallbackNode = propertyInit[1]
 
                         elif parsedReplacement.value in str(propertyInit[0].value).split("|"):
+                            ScopeScanner.markDirty(callNode.parent)
                             callNode.parent.replace(callNode, propertyInit[1])
                             modified = True
                             break
 
                     if not modified and fallbackNode is not None:
+                        ScopeScanner.markDirty(callNode.parent)
                         callNode.parent.replace(callNode, fallbackNode)
                         modified = True
 
@@ -28,8 +28,8 @@ class Error(Exception):
 def cleanup(node):
     """"""
 
-    if not hasattr(node, "variables"):
-        ScopeScanner.scan(node)
+    # Only scans the tree when it was not scanned before
+    ScopeScanner.update(node)
 
     # Re cleanup until nothing to remove is found
     x = 0
@@ -42,7 +42,7 @@ def cleanup(node):
         Console.indent()
 
         if __cleanup(node):
-            ScopeScanner.scan(node)
+            ScopeScanner.update(node)
             cleaned = True
             Console.outdent()
         else:
@@ -68,6 +68,8 @@ def __cleanup(node):
 
     if node.type == "script" and node.scope.unused and hasattr(node, "parent"):
         if __recurser(node, node.scope.unused):
+            # All modifications are limited to this scope
+            ScopeScanner.markDirty(node)
             cleaned = True
 
     return cleaned
@@ -382,7 +382,8 @@ def combineToCommaExpression(node):
 
     comma = Node.Node(node.tokenizer, "comma")
 
-    for child in list(node):
+    # Only the expressions are moved, the children of the node itself are kept
+    for child in node:
         if child is None:
             pass
 
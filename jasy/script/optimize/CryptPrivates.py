@@ -8,6 +8,7 @@ import zlib
 import string
 import re
 import jasy.core.Console as Console
+import jasy.script.util as Util
 
 
 
@@ -29,85 +30,101 @@ class Error(Exception):
 
 def optimize(node, contextId=""):
 
-    Console.debug("Crypting private fields...")
-    Console.indent()
+    visitor = Visitor(contextId)
+    Util.walk(node, [visitor])
 
-    coll = __search(node)
+    return visitor.finish(node)
 
-    repl = {}
-    for name in coll:
-        repl[name] = "__%s" % __encode("%s.%s" % (contextId, name[2:]))
-        Console.debug("Replacing private field %s with %s (context: %s)", name, repl[name], contextId)
 
-    Console.debug("Found %s private fields" % len(repl))
-    modified, reduction = __replace(node, repl)
 
-    Console.debug("Reduced size by %s bytes" % reduction)
-    Console.outdent()
+class Visitor(object):
 
-    return modified
+    """
+    Collects private fields and their usages while walking the tree (see Util.walk()) and replaces them in finish().
 
+    Does not modify the tree while walking, so it can share the traversal with other visitors (see Optimization.apply()).
 
+    """
 
-#
-# Internal API
-#
+    def __init__(self, contextId=""):
+        self.__contextId = contextId
+
+        # Names of private fields which are assigned or initialized
+        self.__fields = set()
+
+        # Identifiers which are using private fields
+        self.__usages = []
+
+
+    def enter(self, node):
+        nodeType = node.type
 
-__matcher = re.compile("^__[a-zA-Z0-9]+$")
+        if nodeType == "assign" and node[0].type == "dot":
+            # Only last dot child is relevant
+            if node[0][1].type == "identifier":
+                name = node[0][1].value
+                if isinstance(name, str) and matcher.match(name):
+                    self.__fields.add(name)
 
+        elif nodeType == "property_init":
+            name = node[0].value
+            if isinstance(name, str) and matcher.match(name):
+                self.__fields.add(name)
 
-def __search(node, coll=None):
+        elif nodeType == "identifier":
+            # Only rename items which are part of a dot operator
+            parent = getattr(node, "parent", None)
+            if parent is not None and parent.type in ("dot", "property_init"):
+                self.__usages.append(node)
 
-    if coll is None:
-        coll = set()
 
-    if node.type == "assign" and node[0].type == "dot":
-        # Only last dot child is relevant
-        if node[0][1].type == "identifier":
-            name = node[0][1].value
-            if isinstance(name, str) and __matcher.match(name):
-                coll.add(name)
+    def leave(self, node):
+        pass
 
-    elif node.type == "property_init":
-        name = node[0].value
-        if isinstance(name, str) and __matcher.match(name):
-            coll.add(name)
 
-    for child in node:
-        # None children are allowed sometimes e.g. during array_init like [1,2,,,7,8]
-        if child is not None:
-            __search(child, coll)
+    def finish(self, tree):
+        """Replaces all private fields. Returns whether the tree was modified."""
 
-    return coll
+        Console.debug("Crypting private fields...")
+        Console.indent()
 
+        contextId = self.__contextId
 
+        repl = {}
+        for name in self.__fields:
+            repl[name] = "__%s" % encode("%s.%s" % (contextId, name[2:]))
+            Console.debug("Replacing private field %s with %s (context: %s)", name, repl[name], contextId)
 
-def __replace(node, repl):
-    modified = False
-    reduction = 0
+        Console.debug("Found %s private fields" % len(repl))
 
-    if node.type == "identifier" and getattr(node, "parent", None):
-        # Only rename items which are part of a dot operator
-        if node.parent.type in ("dot", "property_init") and isinstance(node.value, str) and __matcher.match(node.value):
-            if node.value in repl:
-                reduction = reduction + len(node.value) - len(repl[node.value])
-                node.value = repl[node.value]
-                modified = True
-            else:
-                raise Error(node.value, node.line)
+        modified = False
+        reduction = 0
 
-    for child in node:
-        # None children are allowed sometimes e.g. during array_init like [1,2,,,7,8]
-        if child is not None:
-            subModified, subReduction = __replace(child, repl)
-            modified = modified or subModified
-            reduction = reduction + subReduction
+        for node in self.__usages:
+            value = node.value
+            if isinstance(value, str) and matcher.match(value):
+                if value in repl:
+                    reduction = reduction + len(value) - len(repl[value])
+                    node.value = repl[value]
+                    modified = True
+                else:
+                    raise Error(value, node.line)
 
-    return modified, reduction
+        Console.debug("Reduced size by %s bytes" % reduction)
+        Console.outdent()
+
+        return modified
+
+
+
+#
+# Internal API
+#
 
+matcher = re.compile("^__[a-zA-Z0-9]+$")
 
 
-def __encode(value, alphabet=string.ascii_letters + string.digits):
+def encode(value, alphabet=string.ascii_letters + string.digits):
 
     num = zlib.adler32(value.encode("utf-8"))
 
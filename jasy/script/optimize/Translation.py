@@ -5,10 +5,10 @@
 #
 
 import re
-import copy
 import polib
 
 import jasy.script.parse.Node as Node
+import jasy.script.util as Util
 import jasy.item.Translation as Translation
 
 from jasy import UserError
@@ -19,7 +19,7 @@ import jasy.core.Console as Console
 # Public API
 #
 
-__all__ = ("hasText", "optimize", "collectTranslations")
+__all__ = ("hasText", "optimize", "collectTranslations", "Collector")
 
 translationFunctions = ("tr", "trc", "trn", "marktr")
 
@@ -65,33 +65,47 @@ def parseParams(params, funcName):
 
 
 
-def __collectionRecurser(node, collection):
-    if node.type == "call":
-        funcName = None
+class Collector(object):
 
-        if node[0].type == "identifier":
-            funcName = node[0].value
-        elif node[0].type == "dot" and node[0][1].type == "identifier":
-            funcName = node[0][1].value
+    """
+    Collects the IDs of all translated texts and the lines using them while walking the tree (see Util.walk()).
 
-        if funcName in translationFunctions:
-            translationId = Translation.generateId(*parseParams(node[1], funcName))
-            if translationId:
-                if translationId in collection:
-                    collection[translationId].append(node.line)
-                else:
-                    collection[translationId] = [node.line]
+    Does not modify the tree, so it can share the traversal with other visitors.
 
-    # Process children
-    for child in node:
-        if child is not None:
-            __collectionRecurser(child, collection)
+    """
+
+    def __init__(self):
+        self.translations = {}
+
+
+    def enter(self, node):
+        if node.type == "call":
+            funcName = None
+
+            if node[0].type == "identifier":
+                funcName = node[0].value
+            elif node[0].type == "dot" and node[0][1].type == "identifier":
+                funcName = node[0][1].value
+
+            if funcName in translationFunctions:
+                translationId = Translation.generateMessageId(*parseParams(node[1], funcName))
+                if translationId:
+                    if translationId in self.translations:
+                        self.translations[translationId].append(node.line)
+                    else:
+                        self.translations[translationId] = [node.line]
+
+
+    def leave(self, node):
+        pass
 
-    return collection
 
 
 def collectTranslations(node):
-    return __collectionRecurser(node, dict())
+    collector = Collector()
+    Util.walk(node, [collector])
+
+    return collector.translations
 
 
 
@@ -145,7 +159,7 @@ def __splitTemplate(value, valueParams):
             except KeyError:
                 raise UserError("Invalid positional value: %s in %s" % (entry, value))
 
-            copied = copy.deepcopy(mapper[pos])
+            copied = mapper[pos].clone()
             if copied.type not in ("identifier", "call"):
                 copied.parenthesized = True
             pair.append(copied)
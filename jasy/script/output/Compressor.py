@@ -8,6 +8,8 @@ import re
 import sys
 import json
 
+import jasy.core.SourceMap as SourceMap
+
 from jasy.script.tokenize.Lang import keywords
 from jasy.script.parse.Lang import expressions, futureReserved
 
@@ -21,6 +23,16 @@ unicode_encoder = json.JSONEncoder(ensure_ascii=False)
 
 
 class Compressor:
+
+    """
+    Generates compressed code from a syntax tree.
+
+    Code is written as fragments into a buffer instead of returning new strings from every level of the tree.
+    Decisions which depend on the surrounding code (spaces between operators, semicolons) look at the
+    fragments written so far. Use compress() to get the code as a string or write() to stream it into a file.
+
+    """
+
     __semicolonSymbol = ";"
     __commaSymbol = ","
 
@@ -34,6 +46,13 @@ class Compressor:
                 self.__commaSymbol = ",\n"
 
         self.__forcedSemicolon = False
+        self.__parts = None
+
+        # Buffer positions where the code of nodes starts (only collected for source maps)
+        self.__marks = None
+
+        # Cache for the methods handling the node types
+        self.__methods = {}
 
 
 
@@ -42,49 +61,161 @@ class Compressor:
     #
 
     def compress(self, node):
+        """Returns the compressed code of the given node."""
+
+        previous = self.__parts
+        marks = self.__marks
+        self.__parts = []
+        self.__marks = None
+
+        try:
+            self.__write(node)
+            return "".join(self.__parts)
+        finally:
+            self.__parts = previous
+            self.__marks = marks
+
+
+    def compressWithMap(self, node, lineOffsets=None):
+        """
+        Returns the compressed code of the given node and a SourceMap pointing back to the original file.
+
+        The lineOffsets of the original text (see SourceMap.getLineOffsets()) are used for computing
+        the original columns. Without them all positions are mapped to the start of the original lines.
+
+        """
+
+        previous = self.__parts
+        self.__parts = []
+        self.__marks = []
+
+        try:
+            self.__write(node)
+            parts = self.__parts
+            marks = self.__marks
+        finally:
+            self.__parts = previous
+            self.__marks = None
+
+        source = node.getFileName()
+        sourceMap = SourceMap.SourceMap()
+
+        # Only the inner most node starting at the same position is mapped.
+        # Trailing semicolons might have been removed after marking their position.
+        positions = {}
+        for index, originalLine, start in marks:
+            if index < len(parts):
+                positions[index] = (originalLine, start)
+
+        line = 0
+        column = 0
+        pos = 0
+
+        for index in sorted(positions):
+            while pos < index:
+                part = parts[pos]
+                breaks = part.count("\n")
+                if breaks:
+                    line += breaks
+                    column = SourceMap.getLength(part[part.rfind("\n") + 1:])
+                else:
+                    column += SourceMap.getLength(part)
+
+                pos += 1
+
+            originalLine, start = positions[index]
+            sourceMap.addMapping(line, column, source, originalLine - 1, SourceMap.getColumn(lineOffsets, originalLine, start))
+
+        return "".join(parts), sourceMap
+
+
+    def write(self, node, handle):
+        """
+        Writes the compressed code of the given node into the file-like handle.
+
+        Statements of scripts are written as soon as they are completed. The code of
+        the whole tree is never kept in memory.
+
+        """
+
+        previous = self.__parts
+
+        try:
+            if node.type == "script" and not getattr(node, "parenthesized", None):
+                for child in node:
+                    self.__parts = []
+                    self.__write(child)
+                    handle.write("".join(self.__parts))
+
+            else:
+                self.__parts = []
+                self.__write(node)
+                handle.write("".join(self.__parts))
+
+        finally:
+            self.__parts = previous
+
+
+    def __write(self, node):
+        """Writes the code of the given node (and all its children) into the buffer."""
+
         type = node.type
-        result = None
+        out = self.__parts
+
+        if self.__marks is not None:
+            line = getattr(node, "line", None)
+            if line is not None:
+                self.__marks.append((len(out), line, getattr(node, "start", None)))
+
+        parenthesized = getattr(node, "parenthesized", None)
+        if parenthesized:
+            out.append("(")
 
         if type in self.__simple:
-            result = type
+            out.append(type)
+
         elif type in self.__prefixes:
             if getattr(node, "postfix", False):
-                result = self.compress(node[0]) + self.__prefixes[node.type]
+                self.__write(node[0])
+                out.append(self.__prefixes[type])
             else:
-                result = self.__prefixes[node.type] + self.compress(node[0])
+                out.append(self.__prefixes[type])
+                self.__write(node[0])
 
         elif type in self.__dividers:
-            first = self.compress(node[0])
-            second = self.compress(node[1])
-            divider = self.__dividers[node.type]
+            divider = self.__dividers[type]
 
             # Fast path
-            if node.type not in ("plus", "minus"):
-                result = "%s%s%s" % (first, divider, second)
+            if type not in ("plus", "minus"):
+                self.__write(node[0])
+                out.append(divider)
+                self.__write(node[1])
 
             # Special code for dealing with situations like x + ++y and y-- - x
             else:
-                result = first
-                if first.endswith(divider):
-                    result += " "
-
-                result += divider
+                start = len(out)
+                self.__write(node[0])
+                if self.__endsWith(start, divider):
+                    out.append(" ")
 
-                if second.startswith(divider):
-                    result += " "
+                out.append(divider)
 
-                result += second
+                space = self.__reserve()
+                self.__write(node[1])
+                if self.__firstChar(space) == divider:
+                    out[space] = " "
 
         else:
-            try:
-                result = getattr(self, "type_%s" % type)(node)
-            except AttributeError:
-                raise Exception("Script compressor does not support type '%s' from line %s in file %s" % (type, node.line, node.getFileName()))
+            method = self.__methods.get(type)
+            if method is None:
+                method = self.__methods[type] = getattr(self, "type_%s" % type, None)
+                if method is None:
+                    raise Exception("Script compressor does not support type '%s' from line %s in file %s" % (type, node.line, node.getFileName()))
 
-        if getattr(node, "parenthesized", None):
-            return "(%s)" % result
-        else:
-            return result
+            method(node)
+
+        if parenthesized:
+            out.append(")")
 
 
 
@@ -92,36 +223,106 @@ class Compressor:
     # Helpers
     #
 
+    def __reserve(self):
+        """Adds an empty fragment which might be replaced later on. Returns its position in the buffer."""
+
+        self.__parts.append("")
+        return len(self.__parts) - 1
+
+    def __endsWith(self, start, suffix):
+        """Whether the code written since the given buffer position ends with the given suffix."""
+
+        out = self.__parts
+        pos = len(out)
+        if pos > start and len(out[-1]) >= len(suffix):
+            return out[-1].endswith(suffix)
+
+        text = ""
+
+        while pos > start and len(text) < len(suffix):
+            pos -= 1
+            text = out[pos] + text
+
+        return text.endswith(suffix)
+
+    def __firstChar(self, start):
+        """Returns the first character written since the given buffer position (or an empty string)."""
+
+        out = self.__parts
+        for pos in range(start, len(out)):
+            if out[pos]:
+                return out[pos][0]
+
+        return ""
+
+    def __detach(self, node):
+        """Writes the given node into a separate buffer. Returns the state to be added later on using __attach()."""
+
+        parts = self.__parts
+        marks = self.__marks
+        self.__parts = []
+        if marks is not None:
+            self.__marks = []
+
+        try:
+            self.__write(node)
+            return self.__parts, self.__marks
+        finally:
+            self.__parts = parts
+            self.__marks = marks
+
+    def __attach(self, detached):
+        parts, marks = detached
+        if self.__marks is not None:
+            offset = len(self.__parts)
+            self.__marks.extend([(index + offset, line, start) for index, line, start in marks])
+
+        self.__parts.extend(parts)
+
+    def __join(self, nodes, separator):
+        out = self.__parts
+        first = True
+        for node in nodes:
+            if first:
+                first = False
+            else:
+                out.append(separator)
+
+            self.__write(node)
+
     def __statements(self, node):
-        result = []
         for child in node:
-            result.append(self.compress(child))
-
-        return "".join(result)
+            self.__write(child)
 
     def __handleForcedSemicolon(self, node):
         if node.type == "semicolon" and not hasattr(node, "expression"):
             self.__forcedSemicolon = True
 
-    def __addSemicolon(self, result):
-        if not result.endswith(self.__semicolonSymbol):
+    def __addSemicolon(self, start):
+        """Adds a semicolon to the code written since the given buffer position (when not already there)."""
+
+        if not self.__endsWith(start, self.__semicolonSymbol):
             if self.__forcedSemicolon:
                 self.__forcedSemicolon = False
 
-            return result + self.__semicolonSymbol
+            self.__parts.append(self.__semicolonSymbol)
 
-        else:
-            return result
+    def __removeSemicolon(self, start):
+        """Removes a trailing semicolon from the code written since the given buffer position."""
 
-    def __removeSemicolon(self, result):
         if self.__forcedSemicolon:
             self.__forcedSemicolon = False
-            return result
+            return
 
-        if result.endswith(self.__semicolonSymbol):
-            return result[:-len(self.__semicolonSymbol)]
-        else:
-            return result
+        if self.__endsWith(start, self.__semicolonSymbol):
+            out = self.__parts
+            length = len(self.__semicolonSymbol)
+            while length > 0:
+                last = out.pop()
+                if len(last) > length:
+                    out.append(last[:-length])
+
+                length -= len(last)
 
 
     #
@@ -178,7 +379,7 @@ class Compressor:
     #
 
     def type_script(self, node):
-        return self.__statements(node)
+        self.__statements(node)
 
 
 
@@ -187,16 +388,17 @@ class Compressor:
     #
 
     def type_comma(self, node):
-        return self.__commaSymbol.join(map(self.compress, node))
+        self.__join(node, self.__commaSymbol)
 
     def type_object_init(self, node):
-        return "{%s}" % self.__commaSymbol.join(map(self.compress, node))
+        self.__parts.append("{")
+        self.__join(node, self.__commaSymbol)
+        self.__parts.append("}")
 
     def type_property_init(self, node):
         key = self.compress(node[0])
-        value = self.compress(node[1])
 
-        if type(key) in (int, float):
+        if type(getattr(node[0], "value", None)) in (int, float):
             pass
 
         elif self.__number_property.match(key):
@@ -204,27 +406,46 @@ class Compressor:
 
         # Protect keywords and special characters
         elif key in keywords or key in futureReserved or not self.__simple_property.match(key):
-            key = self.type_string(node[0])
+            key = self.__encodeString(node[0].value)
 
-        return "%s:%s" % (key, value)
+        self.__parts.append(key)
+        self.__parts.append(":")
+        self.__write(node[1])
 
     def type_array_init(self, node):
-        def helper(child):
-            return self.compress(child) if child is not None else ""
+        out = self.__parts
+        out.append("[")
+
+        first = True
+        for child in node:
+            if first:
+                first = False
+            else:
+                out.append(",")
+
+            if child is not None:
+                self.__write(child)
 
-        return "[%s]" % ",".join(map(helper, node))
+        out.append("]")
 
     def type_array_comp(self, node):
-        return "[%s %s]" % (self.compress(node.expression), self.compress(node.tail))
+        self.__parts.append("[")
+        self.__write(node.expression)
+        self.__parts.append(" ")
+        self.__write(node.tail)
+        self.__parts.append("]")
 
-    def type_string(self, node):
+    def __encodeString(self, value):
         # Omit writing real high unicode character which are not supported well by browsers
-        ascii = ascii_encoder.encode(node.value)
+        ascii = ascii_encoder.encode(value)
 
         if high_unicode.search(ascii):
             return ascii
         else:
-            return unicode_encoder.encode(node.value)
+            return unicode_encoder.encode(value)
+
+    def type_string(self, node):
+        self.__parts.append(self.__encodeString(node.value))
 
     def type_number(self, node):
         value = node.value
@@ -242,92 +463,99 @@ class Compressor:
         elif int(value) == value and node.parent.type != "dot":
             value = int(value)
 
-        return "%s" % value
+        self.__parts.append("%s" % value)
 
     def type_regexp(self, node):
-        return node.value
+        self.__parts.append("%s" % node.value)
 
     def type_identifier(self, node):
-        return node.value
+        self.__parts.append("%s" % node.value)
 
     def type_list(self, node):
-        return ",".join(map(self.compress, node))
+        self.__join(node, ",")
 
     def type_index(self, node):
-        return "%s[%s]" % (self.compress(node[0]), self.compress(node[1]))
+        self.__write(node[0])
+        self.__parts.append("[")
+        self.__write(node[1])
+        self.__parts.append("]")
 
     def type_declaration(self, node):
         names = getattr(node, "names", None)
         if names:
-            result = self.compress(names)
+            self.__write(names)
         else:
-            result = node.name
+            self.__parts.append(node.name)
 
         initializer = getattr(node, "initializer", None)
         if initializer:
-            result += "=%s" % self.compress(node.initializer)
-
-        return result
+            self.__parts.append("=")
+            self.__write(initializer)
 
     def type_assign(self, node):
         assignOp = getattr(node, "assignOp", None)
         operator = "=" if not assignOp else self.__dividers[assignOp] + "="
 
-        return self.compress(node[0]) + operator + self.compress(node[1])
+        self.__write(node[0])
+        self.__parts.append(operator)
+        self.__write(node[1])
 
     def type_call(self, node):
-        return "%s(%s)" % (self.compress(node[0]), self.compress(node[1]))
+        self.__write(node[0])
+        self.__parts.append("(")
+        self.__write(node[1])
+        self.__parts.append(")")
 
     def type_new_with_args(self, node):
-        result = "new %s" % self.compress(node[0])
+        self.__parts.append("new ")
+        self.__write(node[0])
 
         # Compress new Object(); => new Object;
         if len(node[1]) > 0:
-            result += "(%s)" % self.compress(node[1])
+            self.__parts.append("(")
+            self.__write(node[1])
+            self.__parts.append(")")
         else:
             parent = getattr(node, "parent", None)
-            if parent and parent.type is "dot":
-                result += "()"
-
-        return result
+            if parent and parent.type == "dot":
+                self.__parts.append("()")
 
     def type_exception(self, node):
-        return node.value
+        self.__parts.append("%s" % node.value)
 
     def type_generator(self, node):
         """Generator Expression."""
-        result = self.compress(getattr(node, "expression"))
+        self.__write(getattr(node, "expression"))
         tail = getattr(node, "tail", None)
         if tail:
-            result += " %s" % self.compress(tail)
-
-        return result
+            self.__parts.append(" ")
+            self.__write(tail)
 
     def type_comp_tail(self, node):
         """Comprehensions Tails."""
-        result = self.compress(getattr(node, "for"))
+        self.__write(getattr(node, "for"))
         guard = getattr(node, "guard", None)
         if guard:
-            result += "if(%s)" % self.compress(guard)
-
-        return result
+            self.__parts.append("if(")
+            self.__write(guard)
+            self.__parts.append(")")
 
     def type_in(self, node):
-        first = self.compress(node[0])
-        second = self.compress(node[1])
+        out = self.__parts
+        start = len(out)
+        self.__write(node[0])
 
-        if first.endswith("'") or first.endswith('"'):
-            pattern = "%sin %s"
+        if self.__endsWith(start, "'") or self.__endsWith(start, '"'):
+            out.append("in ")
         else:
-            pattern = "%s in %s"
+            out.append(" in ")
 
-        return pattern % (first, second)
+        self.__write(node[1])
 
     def type_instanceof(self, node):
-        first = self.compress(node[0])
-        second = self.compress(node[1])
-
-        return "%s instanceof %s" % (first, second)
+        self.__write(node[0])
+        self.__parts.append(" instanceof ")
+        self.__write(node[1])
 
 
 
@@ -336,38 +564,61 @@ class Compressor:
     #
 
     def type_block(self, node):
-        return "{%s}" % self.__removeSemicolon(self.__statements(node))
+        out = self.__parts
+        out.append("{")
+        start = len(out)
+        self.__statements(node)
+        self.__removeSemicolon(start)
+        out.append("}")
 
     def type_let_block(self, node):
-        begin = "let(%s)" % ",".join(map(self.compress, node.variables))
+        self.__parts.append("let(")
+        self.__join(node.variables, ",")
+        self.__parts.append(")")
+
         if hasattr(node, "block"):
-            end = self.compress(node.block)
+            self.__write(node.block)
         elif hasattr(node, "expression"):
-            end = self.compress(node.expression)
+            self.__write(node.expression)
 
-        return begin + end
+    def __declarations(self, keyword, node):
+        start = len(self.__parts)
+        self.__parts.append(keyword)
+        self.type_list(node)
+        self.__addSemicolon(start)
 
     def type_const(self, node):
-        return self.__addSemicolon("const %s" % self.type_list(node))
+        self.__declarations("const ", node)
 
     def type_var(self, node):
-        return self.__addSemicolon("var %s" % self.type_list(node))
+        self.__declarations("var ", node)
 
     def type_let(self, node):
-        return self.__addSemicolon("let %s" % self.type_list(node))
+        self.__declarations("let ", node)
 
     def type_semicolon(self, node):
+        start = len(self.__parts)
         expression = getattr(node, "expression", None)
-        return self.__addSemicolon(self.compress(expression) if expression else "")
+        if expression:
+            self.__write(expression)
+
+        self.__addSemicolon(start)
 
     def type_label(self, node):
-        return self.__addSemicolon("%s:%s" % (node.label, self.compress(node.statement)))
+        start = len(self.__parts)
+        self.__parts.append("%s:" % node.label)
+        self.__write(node.statement)
+        self.__addSemicolon(start)
 
     def type_break(self, node):
-        return self.__addSemicolon("break" if not hasattr(node, "label") else "break %s" % node.label)
+        start = len(self.__parts)
+        self.__parts.append("break" if not hasattr(node, "label") else "break %s" % node.label)
+        self.__addSemicolon(start)
 
     def type_continue(self, node):
-        return self.__addSemicolon("continue" if not hasattr(node, "label") else "continue %s" % node.label)
+        start = len(self.__parts)
+        self.__parts.append("continue" if not hasattr(node, "label") else "continue %s" % node.label)
+        self.__addSemicolon(start)
 
 
     #
@@ -375,46 +626,57 @@ class Compressor:
     #
 
     def type_function(self, node):
+        out = self.__parts
+
         if node.type == "setter":
-            result = "set"
+            out.append("set")
         elif node.type == "getter":
-            result = "get"
+            out.append("get")
         else:
-            result = "function"
+            out.append("function")
 
         name = getattr(node, "name", None)
         if name:
-            result += " %s" % name
+            out.append(" %s" % name)
 
         params = getattr(node, "params", None)
-        result += "(%s)" % self.compress(params) if params else "()"
+        if params:
+            out.append("(")
+            self.__write(params)
+            out.append(")")
+        else:
+            out.append("()")
 
         # keep expression closure format (may be micro-optimized for other code, too)
         if getattr(node, "expressionClosure", False):
-            result += self.compress(node.body)
+            self.__write(node.body)
         else:
-            result += "{%s}" % self.__removeSemicolon(self.compress(node.body))
-
-        return result
+            out.append("{")
+            start = len(out)
+            self.__write(node.body)
+            self.__removeSemicolon(start)
+            out.append("}")
 
     def type_getter(self, node):
-        return self.type_function(node)
+        self.type_function(node)
 
     def type_setter(self, node):
-        return self.type_function(node)
+        self.type_function(node)
 
     def type_return(self, node):
-        result = "return"
+        out = self.__parts
+        start = len(out)
+        out.append("return")
+
         if hasattr(node, "value"):
-            valueCode = self.compress(node.value)
+            space = self.__reserve()
+            self.__write(node.value)
 
             # Micro optimization: Don't need a space when a block/map/array/group/strings are returned
-            if not valueCode.startswith(("(", "[", "{", "'", '"', "!", "-", "/")):
-                result += " "
+            if self.__firstChar(space) not in ("(", "[", "{", "'", '"', "!", "-", "/"):
+                out[space] = " "
 
-            result += valueCode
-
-        return self.__addSemicolon(result)
+        self.__addSemicolon(start)
 
 
 
@@ -423,22 +685,30 @@ class Compressor:
     #
 
     def type_throw(self, node):
-        return self.__addSemicolon("throw %s" % self.compress(node.exception))
+        start = len(self.__parts)
+        self.__parts.append("throw ")
+        self.__write(node.exception)
+        self.__addSemicolon(start)
 
     def type_try(self, node):
-        result = "try%s" % self.compress(node.tryBlock)
+        out = self.__parts
+        out.append("try")
+        self.__write(node.tryBlock)
 
         for catch in node:
             if catch.type == "catch":
+                out.append("catch(")
+                self.__write(catch.exception)
                 if hasattr(catch, "guard"):
-                    result += "catch(%s if %s)%s" % (self.compress(catch.exception), self.compress(catch.guard), self.compress(catch.block))
-                else:
-                    result += "catch(%s)%s" % (self.compress(catch.exception), self.compress(catch.block))
+                    out.append(" if ")
+                    self.__write(catch.guard)
 
-        if hasattr(node, "finallyBlock"):
-            result += "finally%s" % self.compress(node.finallyBlock)
+                out.append(")")
+                self.__write(catch.block)
 
-        return result
+        if hasattr(node, "finallyBlock"):
+            out.append("finally")
+            self.__write(node.finallyBlock)
 
 
 
@@ -447,58 +717,87 @@ class Compressor:
     #
 
     def type_while(self, node):
-        result = "while(%s)%s" % (self.compress(node.condition), self.compress(node.body))
+        self.__parts.append("while(")
+        self.__write(node.condition)
+        self.__parts.append(")")
+        self.__write(node.body)
         self.__handleForcedSemicolon(node.body)
-        return result
 
 
     def type_do(self, node):
+        out = self.__parts
+        start = len(out)
+        out.append("do")
+
         # block unwrapping don't help to reduce size on this loop type
         # but if it happens (don't like to modify a global function to fix a local issue), we
         # need to fix the body and re-add braces around the statement
-        body = self.compress(node.body)
-        if not body.startswith("{"):
-            body = "{%s}" % body
+        brace = self.__reserve()
+        self.__write(node.body)
+        if self.__firstChar(brace) != "{":
+            out[brace] = "{"
+            out.append("}")
 
-        return self.__addSemicolon("do%swhile(%s)" % (body, self.compress(node.condition)))
+        out.append("while(")
+        self.__write(node.condition)
+        out.append(")")
+        self.__addSemicolon(start)
 
 
     def type_for_in(self, node):
+        out = self.__parts
+
         # Optional variable declarations
         varDecl = getattr(node, "varDecl", None)
 
         # Body is optional - at least in comprehensions tails
+        # Note: The body has to be processed first as it might modify the state of forced semicolons
         body = getattr(node, "body", None)
         if body:
-            body = self.compress(body)
-        else:
-            body = ""
+            body = self.__detach(body)
 
-        result = "for"
+        out.append("for")
         if node.isEach:
-            result += " each"
-
-        result += "(%s in %s)%s" % (self.__removeSemicolon(self.compress(node.iterator)), self.compress(node.object), body)
-
-        if body:
+            out.append(" each")
+
+        out.append("(")
+        start = len(out)
+        self.__write(node.iterator)
+        self.__removeSemicolon(start)
+        out.append(" in ")
+        self.__write(node.object)
+        out.append(")")
+
+        if body and any(body[0]):
+            self.__attach(body)
             self.__handleForcedSemicolon(node.body)
 
-        return result
-
 
     def type_for(self, node):
+        out = self.__parts
         setup = getattr(node, "setup", None)
         condition = getattr(node, "condition", None)
         update = getattr(node, "update", None)
 
-        result = "for("
-        result += self.__addSemicolon(self.compress(setup) if setup else "")
-        result += self.__addSemicolon(self.compress(condition) if condition else "")
-        result += self.compress(update) if update else ""
-        result += ")%s" % self.compress(node.body)
+        out.append("for(")
+
+        start = len(out)
+        if setup:
+            self.__write(setup)
+        self.__addSemicolon(start)
+
+        start = len(out)
+        if condition:
+            self.__write(condition)
+        self.__addSemicolon(start)
+
+        if update:
+            self.__write(update)
+
+        out.append(")")
+        self.__write(node.body)
 
         self.__handleForcedSemicolon(node.body)
-        return result
 
 
 
@@ -516,47 +815,64 @@ class Compressor:
             [thenPart, elsePart] = [elsePart, thenPart]
             condition = condition[0]
 
-        return "%s?%s:%s" % (self.compress(condition), self.compress(thenPart), self.compress(elsePart))
+        self.__write(condition)
+        self.__parts.append("?")
+        self.__write(thenPart)
+        self.__parts.append(":")
+        self.__write(elsePart)
 
 
     def type_if(self, node):
-        result = "if(%s)%s" % (self.compress(node.condition), self.compress(node.thenPart))
+        out = self.__parts
+        out.append("if(")
+        self.__write(node.condition)
+        out.append(")")
+        self.__write(node.thenPart)
 
         elsePart = getattr(node, "elsePart", None)
         if elsePart:
-            result += "else"
+            out.append("else")
 
-            elseCode = self.compress(elsePart)
+            space = self.__reserve()
+            self.__write(elsePart)
 
             # Micro optimization: Don't need a space when the child is a block
             # At this time the brace could not be part of a map declaration (would be a syntax error)
-            if not elseCode.startswith(("{", "(", ";")):
-                result += " "
-
-            result += elseCode
+            if self.__firstChar(space) not in ("{", "(", ";"):
+                out[space] = " "
 
             self.__handleForcedSemicolon(elsePart)
 
-        return result
-
 
     def type_switch(self, node):
-        result = "switch(%s){" % self.compress(node.discriminant)
+        out = self.__parts
+        start = len(out)
+
+        out.append("switch(")
+        self.__write(node.discriminant)
+        out.append("){")
+
         for case in node:
             if case.type == "case":
-                labelCode = self.compress(case.label)
-                if labelCode.startswith('"'):
-                    result += "case%s:" % labelCode
-                else:
-                    result += "case %s:" % labelCode
+                out.append("case")
+                space = self.__reserve()
+                self.__write(case.label)
+                if self.__firstChar(space) != '"':
+                    out[space] = " "
+
+                out.append(":")
+
             elif case.type == "default":
-                result += "default:"
+                out.append("default:")
+
             else:
                 continue
 
             for statement in case.statements:
-                temp = self.compress(statement)
-                if len(temp) > 0:
-                    result += self.__addSemicolon(temp)
+                statementStart = len(out)
+                self.__write(statement)
+                if self.__firstChar(statementStart):
+                    self.__addSemicolon(statementStart)
 
-        return "%s}" % self.__removeSemicolon(result)
+        self.__removeSemicolon(start)
+        out.append("}")
@@ -5,6 +5,7 @@
 #
 
 import jasy.core.FlagSet as FlagSet
+import jasy.script.util as Util
 
 import jasy.script.optimize.CryptPrivates as CryptPrivates
 import jasy.script.optimize.BlockReducer as BlockReducer
@@ -25,6 +26,26 @@ class Error(Exception):
 
 
 
+#
+# Pass Ordering
+#
+
+# All optimizations in the order of application: flag, kind and implementation. Passes of kind "tree" are
+# functions which restructure the tree and require a traversal of their own. Passes of kind "visitor" only
+# rename nodes. Consecutive visitors of enabled optimizations share a single traversal of the tree.
+passes = (
+    ("wrap", "tree", ClosureWrapper.optimize),
+    ("declarations", "tree", CombineDeclarations.optimize),
+    ("blocks", "tree", BlockReducer.optimize),
+    ("variables", "visitor", lambda tree: LocalVariables.Visitor(tree)),
+    ("privates", "visitor", lambda tree: CryptPrivates.Visitor(tree.fileId))
+)
+
+# Errors raised by the optimization modules
+errors = (CombineDeclarations.Error, BlockReducer.Error, LocalVariables.Error, CryptPrivates.Error)
+
+
+
 class Optimization(FlagSet.FlagSet):
 
     """
@@ -45,32 +66,34 @@ class Optimization(FlagSet.FlagSet):
 
         """
 
-        if self.has("wrap"):
-            try:
-                ClosureWrapper.optimize(tree)
-            except CryptPrivates.Error as err:
-                raise Error(err)
-
-        if self.has("declarations"):
-            try:
-                CombineDeclarations.optimize(tree)
-            except CombineDeclarations.Error as err:
-                raise Error(err)
-
-        if self.has("blocks"):
-            try:
-                BlockReducer.optimize(tree)
-            except BlockReducer.Error as err:
-                raise Error(err)
-
-        if self.has("variables"):
-            try:
-                LocalVariables.optimize(tree)
-            except LocalVariables.Error as err:
-                raise Error(err)
-
-        if self.has("privates"):
-            try:
-                CryptPrivates.optimize(tree, tree.fileId)
-            except CryptPrivates.Error as err:
-                raise Error(err)
+        try:
+            visitors = []
+
+            for flag, kind, implementation in passes:
+                if not self.has(flag):
+                    continue
+
+                if kind == "visitor":
+                    visitors.append(implementation(tree))
+                    continue
+
+                if visitors:
+                    self.__visit(tree, visitors)
+                    visitors = []
+
+                implementation(tree)
+
+            if visitors:
+                self.__visit(tree, visitors)
+
+        except errors as err:
+            raise Error(err)
+
+
+    def __visit(self, tree, visitors):
+        """Runs the given visitors in one traversal of the tree."""
+
+        Util.walk(tree, visitors)
+
+        for visitor in visitors:
+            visitor.finish(tree)
@@ -26,7 +26,7 @@ def parseExpression(source, fileId=None, line=1, builder=None):
     if not source.endswith(";"):
         source = source + ";"
 
-    tokenizer = jasy.script.tokenize.Tokenizer.Tokenizer(source, fileId, line)
+    tokenizer = jasy.script.tokenize.Tokenizer.createTokenizer(source, fileId, line)
     staticContext = StaticContext(False, builder)
 
     return Expression(tokenizer, staticContext)
@@ -37,7 +37,7 @@ def parse(source, fileId=None, line=1, builder=None):
     if builder is None:
         builder = jasy.script.parse.VanillaBuilder.VanillaBuilder()
 
-    tokenizer = jasy.script.tokenize.Tokenizer.Tokenizer(source, fileId, line)
+    tokenizer = jasy.script.tokenize.Tokenizer.createTokenizer(source, fileId, line)
     staticContext = StaticContext(False, builder)
     node = Script(tokenizer, staticContext)
 
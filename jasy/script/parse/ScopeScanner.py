@@ -25,12 +25,52 @@ def scan(tree):
     return __scanScope(tree)
 
 
+def update(tree):
+    """
+    Brings the scope data of the given tree in sync after modifications which were reported using markDirty().
+
+    Only dirty scopes are scanned again. The data of all other scopes is re-used. Falls back to
+    scan() for trees which were not scanned before.
+
+    """
+
+    data = getattr(tree, "scope", None)
+    if data is None or data.dirty:
+        return __scanScope(tree, True)
+
+    return data
+
+
+def markDirty(node):
+    """
+    Marks the scope containing the given node and all its parent scopes as dirty.
+
+    Should be called by all passes which add, remove or replace children of the given node when the
+    tree should be updated using update() afterwards. Modifications of the params or the name of a
+    function are affecting the scope of its body as well.
+
+    """
+
+    while node is not None:
+        if node.type == "function":
+            body = getattr(node, "body", None)
+            if body is not None and getattr(body, "scope", None) is not None:
+                body.scope.dirty = True
+
+        elif node.type == "script":
+            data = getattr(node, "scope", None)
+            if data is not None:
+                data.dirty = True
+
+        node = getattr(node, "parent", None)
+
+
 
 #
 # Implementation
 #
 
-def __scanNode(node, data):
+def __scanNode(node, data, reuse=False):
     """Scans nodes recursively and collects all variables which are declared and accessed."""
 
     if node.type == "function":
@@ -95,7 +135,10 @@ def __scanNode(node, data):
         data.declared.add(node.parent.exception.value)
 
     if node.type == "script":
-        innerVariables = __scanScope(node)
+        innerVariables = getattr(node, "scope", None) if reuse else None
+        if innerVariables is None or innerVariables.dirty:
+            innerVariables = __scanScope(node, reuse)
+
         for name in innerVariables.shared:
             data.increment(name, innerVariables.shared[name])
 
@@ -112,7 +155,7 @@ def __scanNode(node, data):
         for child in node:
             # None children are allowed sometimes e.g. during array_init like [1,2,,,7,8]
             if child is not None:
-                __scanNode(child, data)
+                __scanNode(child, data, reuse)
 
 
 
@@ -129,8 +172,13 @@ def __combinePackage(node):
 
 
 
-def __scanScope(node):
-    """Scans a scope and collects statistics on variable declaration and usage."""
+def __scanScope(node, reuse=False):
+    """
+    Scans a scope and collects statistics on variable declaration and usage.
+
+    Re-uses the existing data of inner scopes which are not dirty when reuse is enabled.
+
+    """
 
     # Initialize statistics object for this scope
     data = jasy.parse.ScopeData.ScopeData()
@@ -141,7 +189,7 @@ def __scanScope(node):
 
     # Collect all data from all children (excluding sub-scopes)
     for child in node:
-        __scanNode(child, data)
+        __scanNode(child, data, reuse)
 
     # Remove all objects which are based on locally declared variables
     for name in list(data.packages):
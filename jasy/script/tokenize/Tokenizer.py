@@ -76,6 +76,24 @@ assignOperators = ["|", "^", "&", "<<", ">>", ">>>", "+", "-", "*", "/", "%"]
 
 
 
+# Regular expressions used by the RegexTokenizer
+skipMatcher = re.compile(r"(?P<space>[ \t\xA0]+)|(?P<newline>\n+)|(?P<block>/\*)|(?P<line>//[^\n]*)")
+identMatcher = re.compile(r"[a-zA-Z0-9$_]*")
+digitsMatcher = re.compile(r"[0-9]*")
+hexMatcher = re.compile(r"[0-9a-fA-F]*")
+octalMatcher = re.compile(r"[0-7]*")
+numberMatcher = re.compile(r"[0-9]*(?P<fraction>\.[0-9]*)?")
+exponentMatcher = re.compile(r"[eE](?:[+-]?[0-9]+)?")
+stringMatchers = {
+    '"' : re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL),
+    "'" : re.compile(r"(?:[^'\\]|\\.)*'", re.DOTALL)
+}
+identStart = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ$_")
+skipStart = frozenset(" \t\xA0\n/")
+operatorMatcher = re.compile("|".join([re.escape(op) for op in sorted(operatorNames, key=len, reverse=True)]))
+
+
+
 #
 # Classes
 #
@@ -163,7 +181,7 @@ class Tokenizer(object):
         startLine = self.line
 
         # Whether this is the first called as happen on start parsing a file (eat leading comments/white space)
-        startOfFile = self.cursor is 0
+        startOfFile = self.cursor == 0
 
         indent = ""
 
@@ -255,7 +273,7 @@ class Tokenizer(object):
 
                 try:
                     self.comments.append(Comment.Comment(text, mode, self.line - 1, "", self.fileId))
-                except Comment.CommentException:
+                except Comment.CommentException as commentError:
                     Console.error("Ignoring comment in %s: %s", self.fileId, commentError)
 
             # check for whitespace, also for special cases like 0xA0
@@ -587,3 +605,339 @@ class Tokenizer(object):
             raise ParseError("PANIC: too much lookahead!", self.fileId, self.line)
 
         self.tokenIndex = (self.tokenIndex - 1) & 3
+
+
+
+class RegexTokenizer(Tokenizer):
+
+    """
+    Tokenizer which matches whole whitespace runs, comments, identifiers, numbers, strings and
+    operators using precompiled regular expressions instead of stepping through single characters.
+
+    Produces exactly the same tokens and comments as the character based Tokenizer.
+
+    """
+
+    def skip(self):
+        """Eats comments and whitespace."""
+        input = self.source
+        cursor = self.cursor
+
+        # Most tokens directly follow each other or are separated by a single space
+        ch = input[cursor:cursor + 1]
+        if ch not in skipStart:
+            return
+
+        if ch == " " and input[cursor + 1:cursor + 2] not in skipStart:
+            self.cursor = cursor + 1
+            return
+
+        startLine = self.line
+
+        # Whether this is the first called as happen on start parsing a file (eat leading comments/white space)
+        startOfFile = cursor == 0
+
+        indent = ""
+
+        while True:
+            match = skipMatcher.match(input, cursor)
+            if match is None:
+                break
+
+            kind = match.lastgroup
+
+            if kind == "space":
+                indent += match.group()
+                cursor = match.end()
+
+            elif kind == "newline":
+                if self.scanNewlines:
+                    break
+
+                self.line += match.end() - cursor
+                indent = ""
+                cursor = match.end()
+
+            elif kind == "block":
+                if startLine == self.line and not startOfFile:
+                    mode = "inline"
+                elif (self.line - 1) > startLine:
+                    mode = "section"
+                else:
+                    mode = "block"
+
+                end = input.find("*/", cursor + 2)
+                if end == -1:
+                    self.line += input.count("\n", cursor)
+                    self.cursor = len(input)
+                    raise ParseError("Unterminated comment", self.fileId, self.line)
+
+                text = input[cursor:end + 2]
+                commentStartLine = self.line
+                self.line += text.count("\n")
+                cursor = end + 2
+
+                # Filter escaping on slash-star combinations in comment text
+                text = text.replace("*\/", "*/")
+
+                try:
+                    self.comments.append(Comment.Comment(text, mode, commentStartLine, indent, self.fileId))
+                except Comment.CommentException as commentError:
+                    Console.error("Ignoring comment in %s: %s", self.fileId, commentError)
+
+            else:
+                if startLine == self.line and not startOfFile:
+                    mode = "inline"
+                elif (self.line - 1) > startLine:
+                    mode = "section"
+                else:
+                    mode = "block"
+
+                text = match.group()
+                cursor = match.end()
+
+                # Line comments always consume their line break
+                if cursor < len(input):
+                    cursor += 1
+                    self.line += 1
+
+                try:
+                    self.comments.append(Comment.Comment(text, mode, self.line - 1, "", self.fileId))
+                except Comment.CommentException as commentError:
+                    Console.error("Ignoring comment in %s: %s", self.fileId, commentError)
+
+        self.cursor = cursor
+
+
+    def lexExponent(self):
+        match = exponentMatcher.match(self.source, self.cursor)
+        if match is None:
+            return False
+
+        if match.end() - self.cursor == 1:
+            raise ParseError("Missing exponent", self.fileId, self.line)
+
+        self.cursor = match.end()
+        return True
+
+
+    def lexZeroNumber(self, ch):
+        token = self.token
+        input = self.source
+        token.type = "number"
+
+        ch = input[self.cursor:self.cursor + 1]
+        if ch == ".":
+            self.cursor = digitsMatcher.match(input, self.cursor + 1).end()
+            self.lexExponent()
+            token.value = input[token.start:self.cursor]
+
+        elif ch == "x" or ch == "X":
+            self.cursor = hexMatcher.match(input, self.cursor + 1).end()
+            token.value = input[token.start:self.cursor]
+
+        elif ch >= "0" and ch <= "7":
+            self.cursor = octalMatcher.match(input, self.cursor + 1).end()
+            token.value = input[token.start:self.cursor]
+
+        else:
+            self.lexExponent()     # 0E1, &c.
+            token.value = 0
+
+
+    def lexNumber(self, ch):
+        token = self.token
+        input = self.source
+        token.type = "number"
+
+        match = numberMatcher.match(input, self.cursor)
+        self.cursor = match.end()
+        floating = match.group("fraction") is not None
+
+        exponent = self.lexExponent()
+        segment = input[token.start:self.cursor]
+
+        # Protect float or exponent numbers
+        if floating or exponent:
+            token.value = segment
+        else:
+            token.value = int(segment)
+
+
+    def lexDot(self, ch):
+        token = self.token
+        input = self.source
+        next = input[self.cursor:self.cursor + 1]
+
+        if next and next >= "0" and next <= "9":
+            self.cursor = digitsMatcher.match(input, self.cursor).end()
+            self.lexExponent()
+
+            token.type = "number"
+            token.value = input[token.start:self.cursor]
+
+        else:
+            token.type = "dot"
+
+
+    def lexString(self, ch):
+        token = self.token
+        input = self.source
+        token.type = "string"
+
+        match = stringMatchers[ch].match(input, self.cursor)
+        if match is None:
+            raise ParseError("Unterminated string", self.fileId, self.line)
+
+        self.cursor = match.end()
+
+        if "\\" in match.group():
+            token.value = eval(input[token.start:self.cursor])
+        else:
+            token.value = input[token.start + 1:self.cursor - 1]
+
+
+    def lexOp(self, ch):
+        token = self.token
+        input = self.source
+
+        match = operatorMatcher.match(input, token.start)
+        op = match.group()
+        self.cursor = match.end()
+
+        if input[self.cursor:self.cursor + 1] == "=" and op in assignOperators:
+            self.cursor += 1
+            token.type = "assign"
+            token.assignOp = operatorNames[op]
+
+        else:
+            token.type = operatorNames[op]
+            token.assignOp = None
+
+
+    def lexIdent(self, ch):
+        token = self.token
+        input = self.source
+
+        self.cursor = identMatcher.match(input, self.cursor).end()
+
+        identifier = input[token.start:self.cursor]
+        if identifier in Lang.keywords:
+            token.type = identifier
+        else:
+            token.type = "identifier"
+            token.value = identifier
+
+
+    def get(self, scanOperand=False):
+        """
+        It consumes input *only* if there is no lookahead.
+        Handles identifiers and operators directly and dispatches to the lexing functions otherwise.
+        """
+        while self.lookahead:
+            self.lookahead -= 1
+            self.tokenIndex = (self.tokenIndex + 1) & 3
+            token = self.tokens[self.tokenIndex]
+            if token.type != "newline" or self.scanNewlines:
+                return token.type
+
+        self.skip()
+
+        self.tokenIndex = (self.tokenIndex + 1) & 3
+        self.tokens[self.tokenIndex] = token = Token()
+
+        input = self.source
+        cursor = self.cursor
+
+        token.start = cursor
+        token.line = self.line
+
+        if cursor == len(input):
+            token.end = cursor
+            token.type = "end"
+            return token.type
+
+        ch = input[cursor]
+
+        if ch in identStart:
+            cursor = identMatcher.match(input, cursor + 1).end()
+            identifier = input[token.start:cursor]
+            if identifier in Lang.keywords:
+                token.type = identifier
+            else:
+                token.type = "identifier"
+                token.value = identifier
+
+        elif ch in operatorNames and not (scanOperand and ch == "/"):
+            op = operatorMatcher.match(input, cursor).group()
+            cursor += len(op)
+
+            if input[cursor:cursor + 1] == "=" and op in assignOperators:
+                cursor += 1
+                token.type = "assign"
+                token.assignOp = operatorNames[op]
+
+            else:
+                token.type = operatorNames[op]
+                token.assignOp = None
+
+        else:
+            self.cursor = cursor + 1
+
+            if scanOperand and ch == "/":
+                self.lexRegExp(ch)
+
+            elif ch == ".":
+                self.lexDot(ch)
+
+            elif self.scanNewlines and ch == "\n":
+                token.type = "newline"
+                self.line += 1
+
+            elif ch >= "1" and ch <= "9":
+                self.lexNumber(ch)
+
+            elif ch == "0":
+                self.lexZeroNumber(ch)
+
+            elif ch == '"' or ch == "'":
+                self.lexString(ch)
+
+            else:
+                raise ParseError("Illegal token: %s (Code: %s)" % (ch, ord(ch)), self.fileId, self.line)
+
+            cursor = self.cursor
+
+        self.cursor = token.end = cursor
+        return token.type
+
+
+
+#
+# Engines
+#
+
+engines = {
+    "classic" : Tokenizer,
+    "regex" : RegexTokenizer
+}
+
+# Engine used by the parser (both produce the same tokens; "classic" is kept as reference implementation)
+engine = "regex"
+
+
+def setEngine(name):
+    """Selects the tokenizer engine used by createTokenizer()."""
+
+    global engine
+
+    if name not in engines:
+        raise ValueError("Unsupported tokenizer engine: %s" % name)
+
+    engine = name
+
+
+def createTokenizer(source, fileId="", line=1):
+    """Returns a tokenizer for the given source using the configured engine."""
+
+    return engines[engine](source, fileId, line)
@@ -265,6 +265,28 @@ def query(node, matcher, deep=True, inner=False):
     return None
 
 
+def walk(node, visitors):
+    """
+    Recurses the tree starting with the given node and calls the enter() and leave() methods of all given visitors.
+
+    Visitors are entered in the given order and left in reverse order. They are allowed to modify the
+    values of nodes, but not the structure of the tree.
+
+    """
+
+    for visitor in visitors:
+        visitor.enter(node)
+
+    for child in node:
+        # None children are allowed sometimes e.g. during array_init like [1,2,,,7,8]
+        if child is not None:
+            walk(child, visitors)
+
+    for visitor in reversed(visitors):
+        visitor.leave(node)
+
+
+
 def findCall(node, methodName):
     """Recurses the tree starting with the given node and returns the first node which calls the given method name
     (supports namespaces, too)"""
@@ -67,9 +67,11 @@ def reduceTree(tree, profile=None):
 
     # PHASE 3
     # Resolve all mixins
+    # All following passes are reporting their modifications using ScopeScanner.markDirty()
+    # so that only the modified scopes have to be scanned again.
     Mixins.processMixins(tree)
     Mixins.processSelectors(tree)
-    ScopeScanner.scan(tree)
+    ScopeScanner.update(tree)
     Unused.cleanup(tree)
 
     # PHASE 4
@@ -78,7 +80,7 @@ def reduceTree(tree, profile=None):
 
     # PHASE 5
     # Post mixin cleanups
-    ScopeScanner.scan(tree)
+    ScopeScanner.update(tree)
     Unused.cleanup(tree)
 
     # PHASE 6
@@ -91,7 +93,7 @@ def reduceTree(tree, profile=None):
 
     # PHASE 8
     # Post scan to remove (hopefully) all variable/mixin access
-    ScopeScanner.scan(tree)
+    ScopeScanner.update(tree)
 
     Console.outdent()
 
@@ -102,6 +104,20 @@ def reduceTree(tree, profile=None):
 def compressTree(tree, optimizationLevel=0, formattingLevel=0):
     """Returns the compressed result from the given tree."""
 
+    return getCompressor(optimizationLevel, formattingLevel).compress(tree)
+
+
+
+def compressTreeWithMap(tree, optimizationLevel=0, formattingLevel=0, getLineOffsets=None):
+    """Returns the compressed result from the given tree and its SourceMap (see Compressor.compressWithMap())."""
+
+    return getCompressor(optimizationLevel, formattingLevel).compressWithMap(tree, getLineOffsets)
+
+
+
+def getCompressor(optimizationLevel=0, formattingLevel=0):
+    """Returns a compressor configured for the given levels."""
+
     optimization = Optimization.Optimization()
     formatting = Formatting.Formatting()
 
@@ -115,7 +131,7 @@ def compressTree(tree, optimizationLevel=0, formattingLevel=0):
         formatting.enable("whitespace")
         formatting.enable("indent")
 
-    return Compressor.Compressor(optimization, formatting).compress(tree)
+    return Compressor.Compressor(optimization, formatting)
 
 
 
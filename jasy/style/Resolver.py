@@ -19,7 +19,7 @@ class Resolver(AbstractResolver.Resolver):
 
 
     def getItemDependencies(self, item):
-        return item.getDependencies(self.permutation, items=self.items)
+        return self.getGraph().getDependencies(item, self.permutation, warnings=True)
 
 
     def getSorted(self):
@@ -15,8 +15,8 @@ class Sorter(AbstractSorter.AbstractSorter):
 
 
     def getItemDependencies(self, item):
-        return item.getDependencies(self.permutation, items=self.items, warnings=False)
+        return self.resolver.getGraph().getDependencies(item, self.permutation, items=self.items)
 
 
     def getItemBreaks(self, item):
-        return item.getBreaks(self.permutation, items=self.items)
+        return self.resolver.getGraph().getBreaks(item, self.permutation, items=self.items, warnings=True)
@@ -27,8 +27,8 @@ class Error(Exception):
 def cleanup(node):
     """"""
 
-    if not hasattr(node, "variables"):
-        ScopeScanner.scan(node)
+    # Only scans the tree when it was not scanned before
+    ScopeScanner.update(node)
 
     # Re cleanup until nothing to remove is found
     iteration = 0
@@ -43,7 +43,7 @@ def cleanup(node):
         modified = __cleanup(node)
         if modified > 0:
             Console.debug("Removed %s unused variables", modified)
-            ScopeScanner.scan(node)
+            ScopeScanner.update(node)
             cleaned = True
         else:
             break
@@ -104,6 +104,7 @@ def __recurser(node, unused):
         # Remove full unused functions (when not in top-level scope)
         elif node.name in unused:
             Console.debug("Removing unused mixin %s at line %s" % (node.name, node.line))
+            ScopeScanner.markDirty(node.parent)
             node.parent.remove(node)
             modified += 1
 
@@ -116,6 +117,7 @@ def __recurser(node, unused):
                 for variable in reversed(params):
                     if variable.name in unused:
                         Console.debug("Removing unused parameter '%s' in line %s", variable.name, variable.line)
+                        ScopeScanner.markDirty(params)
                         params.remove(variable)
                         modified += 1
                     else:
@@ -127,6 +129,7 @@ def __recurser(node, unused):
                 init = node.initializer
                 if init.type in ("null", "this", "true", "false", "identifier", "number", "string"):
                     Console.debug("Removing unused primitive variable %s at line %s" % (node.name, node.line))
+                    ScopeScanner.markDirty(node.parent)
                     node.parent.remove(node)
                     modified += 1
 
@@ -134,6 +137,7 @@ def __recurser(node, unused):
                     Console.debug("Could not automatically remove unused variable %s at line %s without possible side-effects" % (node.name, node.line))
 
             else:
+                ScopeScanner.markDirty(node.parent)
                 node.parent.remove(node)
                 modified += 1
 
@@ -7,9 +7,13 @@ import json
 import re
 import sys
 import jasy.style.Util as Util
+import jasy.core.SourceMap as SourceMap
 
 ascii_encoder = json.JSONEncoder(ensure_ascii=True)
 
+# Placeholders for the start of mapped nodes inside the code (zero bytes are not valid in CSS)
+markerMatcher = re.compile("\x00([0-9]+)\x00")
+
 
 class CompressorError(Exception):
 
@@ -48,6 +52,12 @@ class Compressor:
         "unary_minus" : "-"
     }
 
+    # Types of nodes which are added to source maps
+    __mapped = set(["selector", "property", "mixin", "keyframes", "frame", "page", "media", "supports", "fontface"])
+
+    # Mapped nodes as (file name, line, position) while creating a source map
+    __marks = None
+
 
 
     def __init__(self, optimize=None, format=None):
@@ -110,9 +120,64 @@ class Compressor:
             except AttributeError:
                 raise Exception("Style compressor does not support type '%s' from line %s in file %s" % (type, node.line, node.getFileName()))
 
+            # Code is prefixed with a marker which is replaced by the position in the source map
+            if self.__marks is not None and result and type in self.__mapped:
+                result = "\x00%s\x00%s" % (len(self.__marks), result)
+                self.__marks.append((node.getFileName(), node.line, getattr(node, "start", None)))
+
         return result
 
 
+    def compressWithMap(self, node, getLineOffsets=None):
+        """
+        Returns the compressed code of the given node and a SourceMap pointing back to the original files.
+
+        The optional getLineOffsets function returns the line offsets (see SourceMap.getLineOffsets()) for the
+        given file name. These are used for computing the original columns.
+
+        """
+
+        self.__marks = []
+        try:
+            code = self.compress(node)
+            marks = self.__marks
+        finally:
+            self.__marks = None
+
+        sourceMap = SourceMap.SourceMap()
+        offsets = {}
+        result = []
+
+        line = 0
+        column = 0
+        last = 0
+
+        for match in markerMatcher.finditer(code):
+            text = code[last:match.start()]
+            result.append(text)
+            last = match.end()
+
+            breaks = text.count("\n")
+            if breaks:
+                line += breaks
+                column = SourceMap.getLength(text[text.rfind("\n") + 1:])
+            else:
+                column += SourceMap.getLength(text)
+
+            fileName, originalLine, start = marks[int(match.group(1))]
+            if originalLine is None:
+                continue
+
+            if fileName not in offsets:
+                offsets[fileName] = getLineOffsets(fileName) if getLineOffsets else None
+
+            sourceMap.addMapping(line, column, fileName, originalLine - 1, SourceMap.getColumn(offsets[fileName], originalLine, start))
+
+        result.append(code[last:])
+
+        return "".join(result), sourceMap
+
+
     def indent(self, code):
         """Indents the given code by the current indenting setup."""
 
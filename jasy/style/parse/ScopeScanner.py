@@ -23,12 +23,51 @@ def scan(tree):
     return __scanScope(tree)
 
 
+def update(tree):
+    """
+    Brings the scope data of the given tree in sync after modifications which were reported using markDirty().
+
+    Only dirty scopes are scanned again. The data of all other scopes is re-used. Falls back to
+    scan() for trees which were not scanned before.
+
+    """
+
+    data = getattr(tree, "scope", None)
+    if data is None or data.dirty:
+        return __scanScope(tree, True)
+
+    return data
+
+
+def markDirty(node):
+    """
+    Marks the scope containing the given node and all its parent scopes as dirty.
+
+    Should be called by all passes which add, remove or replace children of the given node when the
+    tree should be updated using update() afterwards. Modifications of the params of a mixin are
+    affecting the scope of its rules as well.
+
+    """
+
+    while node is not None:
+        if node.type == "mixin":
+            rules = getattr(node, "rules", None)
+            if rules is not None and getattr(rules, "scope", None) is not None:
+                rules.scope.dirty = True
+
+        data = getattr(node, "scope", None)
+        if data is not None:
+            data.dirty = True
+
+        node = getattr(node, "parent", None)
+
+
 
 #
 # Implementation
 #
 
-def __scanNode(node, data):
+def __scanNode(node, data, reuse=False):
     """Scans nodes recursively and collects all variables which are declared and accessed."""
 
     if node.type == "mixin":
@@ -68,7 +107,10 @@ def __scanNode(node, data):
     # All non blocks (or blocks which are non-scoped) have to be processed in else-block
 
     if node.type == "block" and not getattr(node, "noscope", False):
-        innerVariables = __scanScope(node)
+        innerVariables = getattr(node, "scope", None) if reuse else None
+        if innerVariables is None or innerVariables.dirty:
+            innerVariables = __scanScope(node, reuse)
+
         for name in innerVariables.shared:
             data.increment(name, innerVariables.shared[name])
 
@@ -85,7 +127,7 @@ def __scanNode(node, data):
         for child in node:
             # None children are allowed sometimes e.g. during array_init like [1,2,,,7,8]
             if child is not None:
-                __scanNode(child, data)
+                __scanNode(child, data, reuse)
 
 
 
@@ -102,8 +144,13 @@ def __combinePackage(node):
 
 
 
-def __scanScope(node):
-    """Scans a scope and collects statistics on variable declaration and usage."""
+def __scanScope(node, reuse=False):
+    """
+    Scans a scope and collects statistics on variable declaration and usage.
+
+    Re-uses the existing data of inner scopes which are not dirty when reuse is enabled.
+
+    """
 
     # Initialize statistics object for this scope
     data = jasy.parse.ScopeData.ScopeData()
@@ -114,7 +161,7 @@ def __scanScope(node):
 
     # Collect all data from all children (excluding sub-scopes)
     for child in node:
-        __scanNode(child, data)
+        __scanNode(child, data, reuse)
 
     # Remove all objects which are based on locally declared variables
     for name in list(data.packages):
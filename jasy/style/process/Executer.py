@@ -7,6 +7,7 @@ import copy
 import re
 
 import jasy.style.parse.Node as Node
+import jasy.style.parse.ScopeScanner as ScopeScanner
 import jasy.style.process.Operation as Operation
 import jasy.style.Util as Util
 import jasy.core.Console as Console
@@ -44,7 +45,8 @@ def __recurser(node, scope, values, profile):
             raise ExecuterError("Could not resolve variable %s! Value is none!" % name, node)
 
         Console.debug("Resolving variable: %s at line %s with %s from %s", name, node.line, values[name].type, values[name].line)
-        node.parent.replace(node, copy.deepcopy(values[name]))
+        ScopeScanner.markDirty(node.parent)
+        node.parent.replace(node, values[name].clone())
 
 
     # Decide which sub tree of an if-condition is relevant based on current variable situation
@@ -59,6 +61,8 @@ def __recurser(node, scope, values, profile):
         # Cast condition to Python boolean type
         resultValue = Operation.castToBool(node.condition)
 
+        ScopeScanner.markDirty(node.parent)
+
         # Process relevant part of the sub tree
         if resultValue is True:
             # Fix missing processing of result node
@@ -134,6 +138,7 @@ def __recurser(node, scope, values, profile):
             values[name] = init
 
         # Remove declaration node from tree
+        ScopeScanner.markDirty(node.parent)
         node.parent.remove(node)
 
 
@@ -158,6 +163,8 @@ def __recurser(node, scope, values, profile):
             else:
                 raise ExecuterError("Could not replace property inline variable with value of type: %s" % value.type, node)
 
+        ScopeScanner.markDirty(node)
+
         # Fix all selectors
         if node.type == "selector":
             selectors = node.name
@@ -172,6 +179,7 @@ def __recurser(node, scope, values, profile):
     elif node.type == "command":
         repl = Util.executeCommand(node, profile)
         if not repl is node:
+            ScopeScanner.markDirty(node.parent)
             node.parent.replace(node, repl)
 
 
@@ -179,4 +187,5 @@ def __recurser(node, scope, values, profile):
     elif node.type in Util.ALL_OPERATORS:
         repl = Operation.compute(node)
         if repl is not None:
+            ScopeScanner.markDirty(node.parent)
             node.parent.replace(node, repl)
@@ -6,6 +6,7 @@
 import jasy.style.Util as Util
 import jasy.core.Console as Console
 import jasy.style.parse.Node as Node
+import jasy.style.parse.ScopeScanner as ScopeScanner
 
 
 def process(tree):
@@ -25,6 +26,9 @@ def process(tree):
         # all remaining nodes afterwards
         if process:
             chdest = Node.Node(None, "helper")
+
+            # The node is moved to the given destination
+            ScopeScanner.markDirty(node.parent)
         else:
             chdest = dest
 
@@ -95,6 +99,7 @@ def process(tree):
                 selectorNode.append(selectorBlock, "rules")
 
                 # Move all rules from local media/supports block into new selector block
+                ScopeScanner.markDirty(node.rules)
                 for nonSelectorChild in list(node.rules):
                     if nonSelectorChild:
                         selectorBlock.append(nonSelectorChild)
@@ -108,6 +113,7 @@ def process(tree):
                     mediaNode.append(mediaBlock, "rules")
 
                     # Replace current node with media node
+                    ScopeScanner.markDirty(node.parent)
                     node.parent.replace(node, mediaNode)
 
                     # Then append this node to the media node
@@ -170,22 +176,27 @@ def process(tree):
 
         if hasattr(node, "rules") and len(node.rules) == 0:
             Console.debug("Cleaning up empty selector/mixin/@media/@supports at line %s" % node.line)
+            ScopeScanner.markDirty(node.parent)
             node.parent.remove(node)
 
         elif node.type == "content":
             Console.debug("Cleaning up left over @content at line %s" % node.line)
+            ScopeScanner.markDirty(node.parent)
             node.parent.remove(node)
 
         elif node.type == "meta":
             Console.debug("Cleaning up left over @meta at line %s" % node.line)
+            ScopeScanner.markDirty(node.parent)
             node.parent.remove(node)
 
         elif node.type == "block" and node.parent.type in ("sheet", "block"):
             Console.debug("Inlining content of unnecessary block node at line %s" % node.line)
+            ScopeScanner.markDirty(node.parent)
             node.parent.insertAllReplace(node, node)
 
         elif node.type == "root" and len(node) == 0:
             Console.debug("Cleaning up left over @root at line %s" % node.line)
+            ScopeScanner.markDirty(node.parent)
             node.parent.remove(node)
 
 
@@ -211,6 +222,8 @@ def process(tree):
                     thisSelector = child.selector
 
                 if thisSelector == previousSelector:
+                    ScopeScanner.markDirty(previousChild.rules)
+                    ScopeScanner.markDirty(tree)
                     previousChild.rules.insertAll(None, child.rules)
                     tree.remove(child)
                     Console.debug("Combined selector of line %s into %s" % (child.line, previousChild.line))
@@ -223,6 +236,8 @@ def process(tree):
 
             elif child.type == "media":
                 if child.name == previousMedia:
+                    ScopeScanner.markDirty(previousChild.rules)
+                    ScopeScanner.markDirty(tree)
                     previousChild.rules.insertAll(None, child.rules)
                     tree.remove(child)
                     Console.debug("Combined @media of line %s into %s" % (child.line, previousChild.line))
@@ -235,6 +250,8 @@ def process(tree):
 
             elif child.type == "supports":
                 if child.name == previousSupports:
+                    ScopeScanner.markDirty(previousChild.rules)
+                    ScopeScanner.markDirty(tree)
                     previousChild.rules.insertAll(None, child.rules)
                     tree.remove(child)
                     Console.debug("Combined @supports of line %s into %s" % (child.line, previousChild.line))
@@ -264,6 +281,7 @@ def process(tree):
     dest = Node.Node(None, "sheet")
     __flatter(tree, dest)
     tree.insertAll(0, dest)
+    ScopeScanner.markDirty(tree)
 
     __clean(tree)
     __combine(tree)
@@ -3,12 +3,12 @@
 # Copyright 2013-2014 Sebastian Werner
 #
 
-import copy
 import random
 import string
 
 import jasy.core.Console as Console
 import jasy.style.parse.Node as Node
+import jasy.style.parse.ScopeScanner as ScopeScanner
 import jasy.style.Util as Util
 
 
@@ -114,6 +114,7 @@ def __extend(node):
             parent = node.parent
             pos = parent.index(node)
             parent.insertAll(pos, replacements)
+            ScopeScanner.markDirty(parent)
 
         elif selector:
             Console.debug("Extending selector of mixin by: %s", ", ".join(selector))
@@ -159,7 +160,9 @@ def __extend(node):
 
                 pos = mixin.parent.index(mixin)
                 mixin.parent.insert(pos + 1, virtualTop)
+                ScopeScanner.markDirty(mixin.parent)
 
+        ScopeScanner.markDirty(node.parent)
         node.parent.remove(node)
         Console.outdent()
 
@@ -215,6 +218,7 @@ def __process(node, scanMixins=False, active=None):
 
         # Finally remove original node
         parent.remove(node)
+        ScopeScanner.markDirty(parent)
 
         modified += 1
 
@@ -229,9 +233,11 @@ def __injectContent(node, call):
             __injectContent(child, call)
 
     if node.type == "content":
+        ScopeScanner.markDirty(node.parent)
+
         if hasattr(call, "rules"):
             Console.debug("Inserting content section from call into mixin clone")
-            node.parent.insertAllReplace(node, copy.deepcopy(call.rules))
+            node.parent.insertAllReplace(node, call.rules.clone())
         else:
             Console.debug("Removing unused content section from mixin clone")
             node.parent.remove(node)
@@ -259,7 +265,7 @@ def __extendContent(node, call, targetBlock, stopCombineAt):
         selectorNode = Node.Node(type="selector")
         selectorNode.name = selector
 
-        selectorNode.append(copy.deepcopy(call.rules), "rules")
+        selectorNode.append(call.rules.clone(), "rules")
 
         # Support @supports
         if supports:
@@ -329,7 +335,7 @@ def __resolveMixin(mixin, params):
     variables = {}
 
     # Generate full recursive clone of mixin rules
-    clone = copy.deepcopy(mixin.rules)
+    clone = mixin.rules.clone()
 
     if hasattr(mixin, "params"):
         for pos, param in enumerate(mixin.params):
@@ -345,9 +351,9 @@ def __resolveMixin(mixin, params):
 
             # Copy over actual param value
             if len(params) > pos:
-                paramAsDeclaration.append(copy.deepcopy(params[pos]), "initializer")
+                paramAsDeclaration.append(params[pos].clone(), "initializer")
             elif param.type == "assign" and param[0].type == "variable":
-                paramAsDeclaration.append(copy.deepcopy(param[1]), "initializer")
+                paramAsDeclaration.append(param[1].clone(), "initializer")
 
             clone.insert(0, paramAsDeclaration)
 
@@ -376,7 +382,9 @@ def __renameRecurser(node, variables, prefix):
             Console.debug("Renaming variable: %s to %s at line %s", node.name, variables[node.name], node.line)
 
         node.name = variables[node.name]
+        ScopeScanner.markDirty(node)
 
     # Access variable
     elif node.type == "variable" and node.name in variables:
         node.name = variables[node.name]
+        ScopeScanner.markDirty(node)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+
+# Extend PYTHONPATH with local 'lib' folder
+jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
+sys.path.insert(0, jasyroot)
+
+import jasy.bench.Corpus as Corpus
+import jasy.bench.Runner as Runner
+
+phases = ["compress", "optimize", "parse", "scope", "tokenize"]
+
+
+class Tests(unittest.TestCase):
+
+    def test_corpus_reproducible(self):
+        self.assertEqual(Corpus.generateScripts(2, 3, seed=5), Corpus.generateScripts(2, 3, seed=5))
+        self.assertEqual(Corpus.generateStyles(2, 4, 5, seed=5), Corpus.generateStyles(2, 4, 5, seed=5))
+        self.assertNotEqual(Corpus.generateScripts(2, 3, seed=5), Corpus.generateScripts(2, 3, seed=6))
+
+    def test_scripts(self):
+        result = Runner.benchScripts(Corpus.generateScripts(1, 3), 2)
+        self.assertEqual(sorted(result), phases)
+        self.assertEqual(len(result["parse"]["runs"]), 2)
+        self.assertLessEqual(result["parse"]["min"], result["parse"]["median"])
+
+    def test_styles(self):
+        result = Runner.benchStyles(Corpus.generateStyles(1, 4, 5), 1)
+        self.assertEqual(sorted(result), phases)
+
+    def test_compare(self):
+        previous = {"results": {"script": {"parse": {"median": 2.0}}}}
+        current = {"results": {"script": {"parse": {"median": 1.0}, "scope": {"median": 1.0}}, "style": {}}}
+        self.assertEqual(Runner.compare(previous, current), [("script", "parse", 2.0, 1.0, 0.5)])
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
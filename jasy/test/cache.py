@@ -5,12 +5,16 @@ import os
 import unittest
 import logging
 import tempfile
+import sqlite3
+import unittest.mock
 
 # Extend PYTHONPATH with local 'lib' folder
 jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
 sys.path.insert(0, jasyroot)
 
 import jasy.core.Cache as Cache
+import jasy.parse.CompactTree as CompactTree
+import jasy.script.parse.Parser as Parser
 
 
 class Tests(unittest.TestCase):
@@ -90,6 +94,273 @@ class Tests(unittest.TestCase):
         cache.store("test", 1337, transient=True, inMemory=False)
         self.assertEqual(cache.read("test", inMemory=False), None)
 
+    def test_sqlite_store_and_read(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        cache = Cache.Cache(tempDirectory, engine="sqlite")
+        cache.store("test", 1337)
+        self.assertEqual(cache.read("test"), 1337)
+        cache.store("test", "yeah")
+        self.assertEqual(cache.read("test"), "yeah")
+
+    def test_sqlite_close_and_reopen(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        cache = Cache.Cache(tempDirectory, engine="sqlite")
+        cache.store("test", {"a": [1, 2]}, timestamp=42)
+        cache.close()
+        cache2 = Cache.Cache(tempDirectory, engine="sqlite")
+        self.assertEqual(cache2.read("test", 43), None)
+        self.assertEqual(cache2.read("test", 42), {"a": [1, 2]})
+
+    def test_sqlite_concurrent_access(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        cache = Cache.Cache(tempDirectory, engine="sqlite")
+        cache.store("test", 1337)
+        cache.sync()
+        cache2 = Cache.Cache(tempDirectory, engine="sqlite")
+        self.assertEqual(cache2.read("test", inMemory=False), 1337)
+        cache2.close()
+        cache.close()
+
+    def test_sqlite_concurrent_write(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+
+        # Collected writes are not blocking other processes (which are not waiting for locks here)
+        with unittest.mock.patch.object(Cache.SqliteEngine, "writeTimeout", 0):
+            cache = Cache.Cache(tempDirectory, engine="sqlite")
+            cache2 = Cache.Cache(tempDirectory, engine="sqlite")
+            cache.store("k1", 1)
+            cache2.store("k2", 2)
+            cache2.sync()
+
+        self.assertEqual(cache.read("k2", inMemory=False), 2)
+
+        # Written after the batch time at the latest
+        with unittest.mock.patch.object(Cache.SqliteEngine, "batchTime", 0):
+            cache.store("k3", 3)
+
+        self.assertEqual(cache2.read("k1", inMemory=False), 1)
+        self.assertEqual(cache2.read("k3", inMemory=False), 3)
+        cache2.close()
+        cache.close()
+
+    def test_sqlite_clear(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        cache = Cache.Cache(tempDirectory, engine="sqlite")
+        cache.store("test", 1337)
+        cache.clear()
+        cache2 = Cache.Cache(tempDirectory, engine="sqlite")
+        self.assertEqual(cache2.read("test"), None)
+
+    def test_sqlite_recreate(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        with open(os.path.join(tempDirectory, "jasycache.sqlite"), "wb") as handle:
+            handle.write(b"no database" * 100)
+
+        cache = Cache.Cache(tempDirectory, engine="sqlite")
+        cache.store("test", 1337)
+        self.assertEqual(cache.read("test", inMemory=False), 1337)
+        cache.close()
+
+        # Databases failing again after being recreated are reported instead of retried forever
+        with unittest.mock.patch("sqlite3.connect", side_effect=sqlite3.DatabaseError("disk I/O error")) as connect:
+            self.assertRaises(IOError, Cache.Cache, tempDirectory, engine="sqlite")
+            self.assertEqual(connect.call_count, 2)
+
+    def test_contains(self):
+
+        for engine in ("shelve", "sqlite"):
+            tempDirectory = tempfile.TemporaryDirectory().name
+            os.makedirs(tempDirectory)
+            cache = Cache.Cache(tempDirectory, engine=engine)
+            cache.store("test", 1337, timestamp=42, inMemory=False)
+
+            # Only the validator is loaded
+            with unittest.mock.patch.object(Cache.engines[engine], "read", side_effect=AssertionError("Unexpected read")):
+                self.assertTrue(cache.contains("test"))
+                self.assertTrue(cache.contains("test", 42))
+                self.assertFalse(cache.contains("test", 43))
+                self.assertFalse(cache.contains("missing"))
+
+            cache.close()
+
+    def test_invalid_engine(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        self.assertRaises(Exception, Cache.Cache, tempDirectory, engine="unknown")
+
+    def test_lru_eviction(self):
+
+        store = Cache.LruStore(maxEntries=2)
+        store.set("a", 1)
+        store.set("b", 2)
+        self.assertEqual(store.get("a"), 1)
+        store.set("c", 3)
+        self.assertEqual("b" in store, False)
+        self.assertEqual(store.get("a"), 1)
+        self.assertEqual(store.get("c"), 3)
+        self.assertEqual(store.get("b"), None)
+        self.assertEqual(store.getStatistics()["evictions"], 1)
+        self.assertEqual(store.getStatistics()["hits"], 3)
+        self.assertEqual(store.getStatistics()["misses"], 1)
+
+    def test_lru_size_limit(self):
+
+        store = Cache.LruStore(maxSize=100)
+        store.set("a", "x", 60)
+        store.set("b", "y", 30)
+        store.set("c", "z", 30)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.size, 60)
+        self.assertEqual("a" in store, False)
+
+    def test_memory_limits(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        cache = Cache.Cache(tempDirectory, memory={"tree": {"entries": 1}})
+        cache.store("script:tree[a]", "a", transient=True)
+        cache.store("script:tree[b]", "b", transient=True)
+        cache.store("script:meta[a]", "meta")
+        self.assertEqual(cache.read("script:tree[a]"), None)
+        self.assertEqual(cache.read("script:tree[b]"), "b")
+        self.assertEqual(cache.read("script:meta[a]"), "meta")
+        self.assertEqual(cache.getMemoryStatistics()["tree"]["evictions"], 1)
+        self.assertEqual(cache.getMemoryStatistics()["default"]["entries"], 1)
+
+    def test_encode_decode(self):
+
+        small = {"a": 1}
+        large = ["value %s" % i for i in range(5000)]
+        self.assertEqual(Cache.encode(small)[:1], b"p")
+        self.assertEqual(Cache.decode(Cache.encode(small)), small)
+        self.assertEqual(Cache.encode(large)[:1], b"z")
+        self.assertEqual(Cache.decode(Cache.encode(large)), large)
+        self.assertEqual(Cache.decode(Cache.encode(large, "lzma")), large)
+        self.assertEqual(Cache.encode(large, None)[:1], b"p")
+
+    def test_encode_decode_tree(self):
+
+        tree = Parser.parse("var x = [1, 2, 3].map(function(value) { return value * 2; });", "test")
+        compact = CompactTree.fromNode(tree)
+
+        self.assertEqual(Cache.encode(tree)[:1], b"P")
+        self.assertEqual(Cache.decode(Cache.encode(tree)).toXml(), tree.toXml())
+        self.assertIsInstance(Cache.decode(Cache.encode(compact)), CompactTree.CompactTree)
+        self.assertEqual(Cache.decode(Cache.encode(compact, "lzma")).toNode().toXml(), tree.toXml())
+
+    def test_tree_close_and_reopen(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        tree = Parser.parse("var x = 1;\n" * 500, "test")
+        cache = Cache.Cache(tempDirectory)
+        cache.store("script:tree[test]", CompactTree.fromNode(tree))
+        cache.close()
+        cache2 = Cache.Cache(tempDirectory)
+        self.assertEqual(cache2.read("script:tree[test]").toNode().toXml(), tree.toXml())
+
+    def test_compressed_close_and_reopen(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        large = ["value %s" % i for i in range(5000)]
+        cache = Cache.Cache(tempDirectory)
+        cache.store("script:api[test]", large)
+        cache.store("script:meta[test]", large)
+        cache.close()
+        cache2 = Cache.Cache(tempDirectory)
+        self.assertEqual(cache2.read("script:api[test]"), large)
+        self.assertEqual(cache2.read("script:meta[test]"), large)
+
+    def test_gc_unknown(self):
+
+        for engine in ("shelve", "sqlite"):
+            tempDirectory = tempfile.TemporaryDirectory().name
+            os.makedirs(tempDirectory)
+            cache = Cache.Cache(tempDirectory, engine=engine)
+            cache.store("script:meta[foo]", 1)
+            cache.store("script:meta[bar]", 2)
+            count, size = cache.collectGarbage(isValid=lambda key: "foo" in key)
+            self.assertEqual(count, 1)
+            cache.close()
+            cache2 = Cache.Cache(tempDirectory, engine=engine)
+            self.assertEqual(cache2.read("script:meta[foo]"), 1)
+            self.assertEqual(cache2.read("script:meta[bar]"), None)
+            cache2.close()
+
+    def test_gc_size(self):
+
+        for engine in ("shelve", "sqlite"):
+            tempDirectory = tempfile.TemporaryDirectory().name
+            os.makedirs(tempDirectory)
+            cache = Cache.Cache(tempDirectory, engine=engine)
+            cache.store("a", "x" * 1000)
+            cache.store("b", "y" * 1000)
+            cache.collectGarbage(maxSize=1500)
+            cache.close()
+            cache2 = Cache.Cache(tempDirectory, engine=engine)
+            self.assertEqual(len([key for key in ("a", "b") if cache2.read(key) is not None]), 1)
+            cache2.close()
+
+    def test_gc_age(self):
+
+        for engine in ("shelve", "sqlite"):
+            tempDirectory = tempfile.TemporaryDirectory().name
+            os.makedirs(tempDirectory)
+            cache = Cache.Cache(tempDirectory, engine=engine)
+            cache.store("a", 1)
+            self.assertEqual(cache.collectGarbage(maxAge=60), (0, 0))
+            self.assertEqual(cache.collectGarbage(maxAge=-60)[0], 1)
+            cache.close()
+            cache2 = Cache.Cache(tempDirectory, engine=engine)
+            self.assertEqual(cache2.read("a"), None)
+            cache2.close()
+
+    def test_statistics(self):
+
+        tempDirectory = tempfile.TemporaryDirectory().name
+        os.makedirs(tempDirectory)
+        Cache.statistics.clear()
+        cache = Cache.Cache(tempDirectory)
+        cache.store("script:meta[a]", 1)
+        cache.read("script:meta[a]")
+        cache.read("script:meta[b]")
+        cache.store("script:tree[a]", 2, transient=True)
+        cache.close()
+        cache2 = Cache.Cache(tempDirectory)
+        cache2.read("script:meta[a]")
+
+        meta = Cache.statistics["script:meta"]
+        self.assertEqual(meta["reads"], 3)
+        self.assertEqual(meta["memoryHits"], 1)
+        self.assertEqual(meta["diskHits"], 1)
+        self.assertEqual(meta["misses"], 1)
+        self.assertEqual(meta["stores"], 1)
+        self.assertEqual(meta["bytesRead"] > 0, True)
+        self.assertEqual(meta["bytesWritten"], meta["bytesRead"])
+        self.assertEqual(Cache.statistics["script:tree"]["bytesWritten"], 0)
+
+        # Values found on disk are no misses of the in-memory pool
+        cache2.read("script:meta[a]")
+        cache2.read("script:meta[b]")
+        pool = cache2.getMemoryStatistics()["default"]
+        self.assertEqual(pool["hits"], 1)
+        self.assertEqual(pool["misses"], 1)
+        cache2.close()
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.ERROR)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+import fnmatch
+
+# Extend PYTHONPATH with local 'lib' folder
+if __name__ == "__main__":
+    jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
+    sys.path.insert(0, jasyroot)
+    print("Running from %s..." % jasyroot)
+
+import jasy.core.IdIndex as IdIndex
+
+
+ids = ["core.Main", "core.util.Array", "core.util.String", "corex.Other", "ui.Button", "ui/button.png", "ui/icon.png", "ui/icon.svg"]
+
+
+class Tests(unittest.TestCase):
+
+    def test_prefix(self):
+        self.assertEqual(IdIndex.getPrefix("core.*"), "core.")
+        self.assertEqual(IdIndex.getPrefix("ui/icon.?ng"), "ui/icon.")
+        self.assertEqual(IdIndex.getPrefix("[cu]*"), "")
+        self.assertEqual(IdIndex.getPrefix("core.Main"), "core.Main")
+
+    def test_range(self):
+        index = IdIndex.IdIndex(ids)
+        self.assertEqual(index.getRange("core."), ["core.Main", "core.util.Array", "core.util.String"])
+        self.assertEqual(index.getRange("ui/"), ["ui/button.png", "ui/icon.png", "ui/icon.svg"])
+        self.assertEqual(index.getRange("zzz"), [])
+
+    def test_match(self):
+        index = IdIndex.IdIndex(dict.fromkeys(ids))
+        self.assertEqual(index.match("core.*"), ["core.Main", "core.util.Array", "core.util.String"])
+        self.assertEqual(index.match("core*"), ["core.Main", "core.util.Array", "core.util.String", "corex.Other"])
+        self.assertEqual(index.match("ui/*.png"), ["ui/button.png", "ui/icon.png"])
+        self.assertEqual(index.match("ui.Button"), ["ui.Button"])
+        self.assertEqual(index.match("ui.Missing"), [])
+        self.assertIs(index.match("core.*"), index.match("core.*"))
+
+    def test_fnmatch(self):
+        index = IdIndex.IdIndex(ids)
+        for pattern in ("*", "*.png", "core.util.*", "ui/icon.???", "[cu]*.*n*", "ui?*"):
+            self.assertEqual(index.match(pattern), sorted(fnmatch.filter(ids, pattern)))
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
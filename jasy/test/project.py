@@ -5,6 +5,7 @@ import os
 import unittest
 import logging
 import tempfile
+import unittest.mock
 
 # Extend PYTHONPATH with local 'lib' folder
 jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
@@ -12,6 +13,7 @@ sys.path.insert(0, jasyroot)
 
 import jasy.core.Project as Project
 import jasy.core.Session as Session
+import jasy.item.Script
 
 
 class Tests(unittest.TestCase):
@@ -193,6 +195,149 @@ content: {
     def test_manual_class_fusion(self):
         self.assertEqual(self.createCaseOne().getScriptByName("myproject.Main").getText(), ";;")
 
+    def test_mtime_validation(self):
+        project = self.createCaseTwo()
+        item = project.getScriptByName("myproject.Main")
+        self.assertEqual(project.hasContentValidation(), False)
+        self.assertEqual(item.getValidator(), item.getModificationTime())
+
+    def test_content_validation(self):
+        path = os.path.join(tempfile.TemporaryDirectory().name, "myproject")
+        os.makedirs(os.path.join(path, "class"))
+        self.writeFile(path, "jasyproject.yaml", """name: myproject\ncache: {validation: content}""")
+        self.writeFile(os.path.join(path, "class"), "Main.js", ";")
+
+        project = Project.getProjectFromPath(path, Session.Session())
+        self.assertEqual(project.hasContentValidation(), True)
+
+        item = project.getScriptByName("myproject.Main")
+        digest = item.getValidator()
+        self.assertEqual(digest, item.getDigest())
+
+        # Touching the file keeps the digest
+        fullPath = os.path.join(path, "class", "Main.js")
+        os.utime(fullPath, (0, 0))
+        item.attach(fullPath)
+        self.assertEqual(item.getValidator(), digest)
+
+        # Changing the content modifies the digest
+        self.writeFile(os.path.join(path, "class"), "Main.js", "var x;")
+        item.attach(fullPath)
+        self.assertNotEqual(item.getValidator(), digest)
+
+    def test_collect_garbage(self):
+        project = self.createCaseTwo()
+        project.scan()
+        project.getCache().store("script:meta[myproject.Main]-None", 1)
+        project.getCache().store("script:meta[myproject.Removed]-None", 2)
+        count, size = project.collectGarbage()
+        self.assertEqual(count, 1)
+        self.assertEqual(project.getCache().read("script:meta[myproject.Main]-None"), 1)
+        self.assertEqual(project.getCache().read("script:meta[myproject.Removed]-None"), None)
+    def test_shared_cache(self):
+        sharedPath = tempfile.TemporaryDirectory().name
+
+        project = self.createCaseTwo()
+        project.getSession().setSharedCachePath(sharedPath)
+        item = project.getScriptByName("myproject.Main")
+        item.storeCache("script:fields[myproject.Main]", set(["debug"]))
+
+        # Other checkout of the same project with a fresh local cache
+        other = self.createCaseTwo()
+        other.getSession().setSharedCachePath(sharedPath)
+        otherItem = other.getScriptByName("myproject.Main")
+        self.assertEqual(other.getCache().read("script:fields[myproject.Main]"), None)
+        self.assertEqual(otherItem.readCache("script:fields[myproject.Main]"), set(["debug"]))
+        self.assertEqual(otherItem.getFields(), set(["debug"]))
+
+        # Different content is not shared
+        modified = self.createCaseTwo()
+        modified.getSession().setSharedCachePath(sharedPath)
+        self.writeFile(os.path.join(modified.getPath(), "source", "class"), "Main.js", "var x;")
+        modifiedItem = modified.getScriptByName("myproject.Main")
+        modifiedItem.attach(os.path.join(modified.getPath(), "source", "class", "Main.js"))
+        self.assertEqual(modifiedItem.readCache("script:fields[myproject.Main]"), None)
+
+    def test_directory_index(self):
+        project = self.createCaseTwo()
+        project.scan()
+        path = os.path.join(project.getPath(), "source", "class")
+
+        # Recently modified directories are not indexed
+        self.assertEqual(project.getCache().read("project[dirindex]"), None)
+        project.close()
+        os.utime(path, (0, 0))
+
+        other = Project.Project(project.getPath(), Session.Session())
+        other.scan()
+        self.assertEqual(other.getCache().read("project[dirindex]")[path], (0, [("Main.js", False)]))
+        other.close()
+
+        # Adding files modifies the directory
+        self.writeFile(path, "Add.js", ";")
+        modified = Project.Project(project.getPath(), Session.Session())
+        self.assertEqual(sorted(modified.getScripts()), ["myproject.Add", "myproject.Main"])
+
+    def test_registry(self):
+        project = self.createCaseTwo()
+        translationPath = os.path.join(project.getPath(), "source", "translation")
+        self.writeFile(translationPath, "de.po", 'msgid "Hello"\nmsgstr "Hallo"\n')
+        project.scan()
+        project.close()
+
+        # Unchanged translations are restored without parsing the file again
+        restored = Project.Project(project.getPath(), Session.Session())
+        with unittest.mock.patch("polib.pofile", side_effect=AssertionError("Unexpected parsing")):
+            restored.scan()
+
+        self.assertEqual(restored.getTranslations()["myproject.de"].getTable(), {"Hello": "Hallo"})
+        self.assertEqual(sorted(restored.getScripts()), ["myproject.Main"])
+        restored.close()
+
+        # Modified files are rebuilt
+        self.writeFile(translationPath, "de.po", 'msgid "Hello"\nmsgstr "Servus"\n')
+        modified = Project.Project(project.getPath(), Session.Session())
+        self.assertEqual(modified.getTranslations()["myproject.de"].getTable(), {"Hello": "Servus"})
+
+    def test_session_scan(self):
+        session = Session.Session()
+        first = self.createCaseTwo()
+        second = self.createCaseThree()
+        session.addProject(first)
+        session.addProject(second)
+        session.scan()
+
+        self.assertEqual(first.scanned, True)
+        self.assertEqual(second.scanned, True)
+        self.assertIn("myproject.Main", second.getScripts())
+
+    def test_session_warmup(self):
+        project = self.createCaseTwo()
+        classPath = os.path.join(project.getPath(), "source", "class")
+        for name in ("First", "Second", "Third", "Fourth"):
+            self.writeFile(classPath, "%s.js" % name, "/** #require(myproject.Main) */ var %s = 1;" % name.lower())
+
+        self.writeFile(classPath, "Broken.js", "var x = ;")
+
+        session = project.getSession()
+        session.addProject(project)
+        session.scan()
+
+        with unittest.mock.patch.object(Session, "parseWorkers", 2):
+            self.assertEqual(session.warmup(), 5)
+            self.assertEqual(session.warmup(), 0)
+
+            # Items are only checked once per session
+            with unittest.mock.patch.object(jasy.item.Script.ScriptItem, "getParseTask") as getParseTask:
+                self.assertEqual(session.warmup(), 0)
+                self.assertFalse(getParseTask.called)
+
+        scripts = project.getScripts()
+        self.assertIsNone(scripts["myproject.First"].getParseTask())
+        self.assertIsNotNone(scripts["myproject.Broken"].getParseTask())
+        self.assertEqual(scripts["myproject.Fourth"].getMetaData().requires, set(["myproject.Main"]))
+
+
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.ERROR)
     suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
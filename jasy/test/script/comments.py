@@ -11,7 +11,11 @@ if __name__ == "__main__":
     sys.path.insert(0, jasyroot)
     print("Running from %s..." % jasyroot)
 
+import pickle
+import unittest.mock
+
 import jasy.script.parse.Parser as Parser
+import jasy.script.api.Comment as Comment
 
 
 
@@ -664,6 +668,69 @@ class Tests(unittest.TestCase):
         self.assertEqual("xxx" in comment.tags["use"], False)
 
 
+    def test_doc_tags_lazy(self):
+
+        parsed = self.process('''
+
+        /**
+         * Hello World
+         *
+         * #require(foo.Bar)
+         */
+
+        /**
+         * Without {tags} and {#links}
+         */
+
+        // #require(single.Line)
+
+        ''')
+
+        withTags, withoutTags, single = parsed.comments
+
+        with unittest.mock.patch.object(Comment.Comment, "_Comment__process") as process:
+            self.assertEqual(withoutTags.getTags(), None)
+            self.assertEqual(single.getTags(), None)
+            self.assertEqual(withoutTags.hasTag("require"), False)
+            self.assertFalse(process.called)
+
+        self.assertEqual(withTags.getTags(), {"require": set(["foo.Bar"])})
+        self.assertEqual(withTags.hasTag("require"), True)
+        self.assertEqual(withoutTags.text, "Without tags and links")
+
+
+    def test_doc_tags_before_end(self):
+
+        parsed = self.process('''
+
+        /**#require(foo.Bar)*/
+
+        /** #asset(a/*)*/
+
+        ''')
+
+        require, asset = parsed.comments
+        self.assertEqual(require.getTags(), {"require": set(["foo.Bar"])})
+        self.assertEqual(asset.getTags(), {"asset": set(["a/*"])})
+
+
+    def test_lazy_pickle(self):
+
+        parsed = self.process('''
+
+        /**
+         * Hello World
+         *
+         * #deprecated
+         */
+
+        ''')
+
+        restored = pickle.loads(pickle.dumps(parsed))
+        self.assertEqual(restored.comments[0].text, "Hello World")
+        self.assertEqual(restored.comments[0].tags, {"deprecated": True})
+
+
 
     def test_doc_tags_clean(self):
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+import pickle
+
+# Extend PYTHONPATH with local 'lib' folder
+if __name__ == "__main__":
+    jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir, os.pardir))
+    sys.path.insert(0, jasyroot)
+    print("Running from %s..." % jasyroot)
+
+import jasy.parse.CompactTree as CompactTree
+import jasy.script.parse.Parser as Parser
+import jasy.script.parse.ScopeScanner as ScopeScanner
+import jasy.script.parse.Node as Node
+import jasy.style.parse.Node as StyleNode
+import jasy.script.output.Compressor as Compressor
+import jasy.script.output.Optimization as Optimization
+
+
+code = '''
+/**
+ * Doc comment
+ * #require(foo.Bar)
+ */
+core.Class("foo.Main", {
+  members: {
+    // Inline comment
+    run: function(config, value) {
+      var list = [1, , "two", 3.5, true, null];
+      for (var i = 0; i < list.length; i++) {
+        if (!list[i] && value) {
+          value += list[i] ? -1 : /re+/g.test(config);
+        }
+      }
+
+      try { config.x = { get y() { return 1; } }; } catch (ex) {}
+      return value;
+    }
+  }
+});
+'''
+
+
+class Tests(unittest.TestCase):
+
+    def process(self, source=code):
+        tree = Parser.parse(source, "test")
+        ScopeScanner.scan(tree)
+        return tree
+
+    def test_roundtrip(self):
+        tree = self.process()
+        restored = CompactTree.fromNode(tree).toNode()
+
+        self.assertEqual(restored.toXml(), tree.toXml())
+        self.assertEqual(Compressor.Compressor().compress(restored), Compressor.Compressor().compress(tree))
+        self.assertEqual(restored[0].comments[0].getTags(), {"require": set(["foo.Bar"])})
+
+    def test_optimize(self):
+        expected = self.process()
+        Optimization.Optimization("declarations", "blocks", "variables", "privates").apply(expected)
+
+        restored = CompactTree.fromNode(self.process()).toNode()
+        ScopeScanner.scan(restored)
+        Optimization.Optimization("declarations", "blocks", "variables", "privates").apply(restored)
+
+        self.assertEqual(Compressor.Compressor().compress(restored), Compressor.Compressor().compress(expected))
+
+    def test_origin(self):
+        tree = self.process()
+        restored = CompactTree.fromNode(tree).toNode()
+
+        self.assertIsInstance(restored.tokenizer, CompactTree.Origin)
+        self.assertIsNone(restored.tokenizer.source)
+        self.assertEqual(restored.tokenizer.fileId, "test")
+
+        created = Node.Node(restored[0].tokenizer, "semicolon")
+        self.assertEqual(created.line, tree.tokenizer.token.line)
+        restored.append(created)
+
+    def test_accessors(self):
+        tree = self.process()
+        compact = CompactTree.fromNode(tree)
+
+        self.assertEqual(compact.getType(), "script")
+        self.assertEqual([compact.getType(child) for child in compact.getChildren()], ["semicolon"])
+
+        arrays = compact.findAll("array_init")
+        self.assertEqual(len(arrays), 1)
+        self.assertEqual([compact.getType(child) for child in compact.getChildren(arrays[0])], ["number", None, "string", "number", "true", "null"])
+        self.assertEqual(compact.getAttribute(compact.getChildren(arrays[0])[3], "value"), "3.5")
+
+        loop = compact.findAll("for")[0]
+        self.assertEqual([compact.getRelation(child) for child in compact.getChildren(loop)], ["setup", "condition", "update", "body"])
+        self.assertEqual(compact.getLine(loop), 11)
+
+        self.assertIs(compact.getScope(0), tree.scope)
+        self.assertEqual(compact.getComments(compact.getChildren()[0])[0].variant, "doc")
+
+    def test_subtree(self):
+        tree = self.process()
+        compact = CompactTree.fromNode(tree)
+
+        function = compact.findAll("function")[0]
+        node = compact.toNode(function)
+
+        self.assertEqual(node.type, "function")
+        self.assertFalse(hasattr(node, "parent"))
+        self.assertFalse(hasattr(node, "rel"))
+        self.assertEqual(node.params.rel, "params")
+        self.assertEqual(len(node.body), 4)
+
+    def test_pickle(self):
+        # Not scanned as the order of set based scope data is not stable after unpickling
+        tree = Parser.parse(code, "test")
+        compact = CompactTree.fromNode(tree)
+        restored = pickle.loads(pickle.dumps(compact))
+
+        self.assertEqual(restored.toNode().toXml(), tree.toXml())
+        self.assertLess(len(pickle.dumps(compact)), len(pickle.dumps(tree)))
+
+    def test_clone(self):
+        tree = self.process()
+        copied = tree.clone()
+
+        self.assertEqual(copied.toXml(), tree.toXml())
+        self.assertFalse(hasattr(copied, "parent"))
+        self.assertIsNot(copied.scope, tree.scope)
+        self.assertEqual(copied.scope.export(), tree.scope.export())
+
+        expression = copied[0].expression
+        self.assertIs(expression.parent, copied[0])
+        self.assertEqual(expression.rel, "expression")
+        self.assertIsNot(expression, tree[0].expression)
+
+        # Modifying the copy must not change the original
+        Optimization.Optimization("declarations", "blocks", "variables", "privates").apply(copied)
+        self.assertNotEqual(Compressor.Compressor().compress(copied), Compressor.Compressor().compress(tree))
+        self.assertEqual(tree.toXml(), self.process().toXml())
+
+    def test_source(self):
+        tree = Parser.parse("var answer = 42;")
+        self.assertEqual(tree[0][0].getSource(), "answer = 42")
+
+        restored = CompactTree.fromNode(tree).toNode()
+        with self.assertRaisesRegex(Exception, "Source not available for restored trees"):
+            restored[0][0].getSource()
+
+        with self.assertRaisesRegex(Exception, "Could not find source for node 'var'"):
+            Node.Node(None, "var").getSource()
+
+    def test_clone_inherited(self):
+        # Slots which are only defined by AbstractNode
+        node = StyleNode.Node(None, "increment")
+        node.postfix = True
+        node.values = {"color": "red"}
+        node.append(StyleNode.Node(None, "variable"), "rules")
+
+        copied = node.clone()
+        self.assertIs(copied.postfix, True)
+        self.assertEqual(copied.values, {"color": "red"})
+        self.assertIsNot(copied.values, node.values)
+        self.assertEqual(copied.rules.type, "variable")
+
+    def test_clone_scope(self):
+        tree = Parser.parse("function outer(a) { return a; }")
+        ScopeScanner.scan(tree)
+
+        copied = tree.clone()
+        body = copied[0].body
+        self.assertEqual(body.scope.export(), tree[0].body.scope.export())
+
+        # Marking the copy does not affect the original
+        ScopeScanner.markDirty(body[0])
+        self.assertTrue(body.scope.dirty)
+        self.assertFalse(tree[0].body.scope.dirty)
+        self.assertFalse(tree.scope.dirty)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -4,6 +4,7 @@ import sys
 import os
 import unittest
 import logging
+import io
 
 # Extend PYTHONPATH with local 'lib' folder
 if __name__ == "__main__":
@@ -311,6 +312,24 @@ class Tests(unittest.TestCase):
     def test_while(self):
         self.assertEqual(self.process('while (true) { x++; }'), 'while(true){x++}')
 
+    def test_write(self):
+        code = 'var x = 1; function f(a) { for (var i in a) while (i--); return -a; } if (x) f(x); else { x - -1; }'
+        tree = Parser.parse(code)
+
+        handle = io.StringIO()
+        Compressor.Compressor().write(tree, handle)
+        self.assertEqual(handle.getvalue(), self.process(code))
+
+        handle = io.StringIO()
+        Compressor.Compressor().write(tree[1], handle)
+        self.assertEqual(handle.getvalue(), Compressor.Compressor().compress(tree[1]))
+
+    def test_nested_compress(self):
+        compressor = Compressor.Compressor()
+        tree = Parser.parse('x = {"a": 1, "b-c": 2, 3: 4, "if": 5}; y - -z;')
+        self.assertEqual(compressor.compress(tree), 'x={a:1,"b-c":2,3:4,"if":5};y- -z;')
+        self.assertEqual(compressor.compress(tree[1]), 'y- -z;')
+
 
 
 if __name__ == '__main__':
@@ -12,6 +12,8 @@ if __name__ == "__main__":
     print("Running from %s..." % jasyroot)
 
 import jasy.script.parse.Parser as Parser
+import jasy.style.Engine as StyleEngine
+import jasy.parse.CompactTree as CompactTree
 from jasy.core.MetaData import MetaData
 
 
@@ -143,6 +145,47 @@ class Tests(unittest.TestCase):
         self.assertEqual(meta.assets, set(["projectx/some/local/url.png"]))
 
 
+    def test_compact(self):
+
+        tree = Parser.parse('''
+
+        /**
+         * #require(my.other.Class) #load(some.Loaded)
+         */
+        var x = function() {
+          /** #asset(projectx/*) #optional(no.dep.to.Class) */
+          return 1;
+        };
+
+        ''')
+
+        meta = MetaData(CompactTree.fromNode(tree))
+        expected = MetaData(tree)
+
+        self.assertEqual(meta.requires, set(["my.other.Class", "some.Loaded"]))
+        self.assertEqual(meta.breaks, set(["some.Loaded"]))
+        self.assertEqual(meta.optionals, set(["no.dep.to.Class"]))
+        self.assertEqual(meta.assets, set(["projectx/*"]))
+
+        for name in MetaData.__slots__:
+            self.assertEqual(getattr(meta, name), getattr(expected, name))
+
+
+    def test_compact_style(self):
+
+        tree = StyleEngine.getTree('''
+        @require foo.Bar;
+        @break foo.Baz;
+        @asset "foo/*.png";
+        ''', "test")
+
+        meta = MetaData(CompactTree.fromNode(tree))
+
+        self.assertEqual(meta.requires, set(["foo.Bar"]))
+        self.assertEqual(meta.breaks, set(["foo.Baz"]))
+        self.assertEqual(meta.assets, set(["foo/*.png"]))
+
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.ERROR)
@@ -13,7 +13,10 @@ if __name__ == "__main__":
 
 import jasy.script.parse.Parser as Parser
 import jasy.script.output.Compressor as Compressor
+import jasy.script.parse.ScopeScanner as ScopeScanner
+import jasy.script.output.Optimization as Optimization
 import jasy.script.optimize.CryptPrivates as CryptPrivates
+import jasy.script.optimize.LocalVariables as LocalVariables
 
 
 
@@ -138,6 +141,31 @@ class Tests(unittest.TestCase):
             'var source={__kZWNQ:123,__k0dQT:456};var target={__kZWNQ:789};for(var key in source){target[key]=source[key]}'
         )
 
+    def test_combined_with_variables(self):
+        code = '''
+            var Foo = function(__local) {
+              var value = __local.x;
+              this.__field = value;
+              return { __other: this.__field, get: function(__local) { return __local + this.__other; } };
+            };
+            '''
+
+        node = Parser.parse(code, "test.js")
+        ScopeScanner.scan(node)
+        Optimization.Optimization("variables", "privates").apply(node)
+
+        expected = Parser.parse(code, "test.js")
+        ScopeScanner.scan(expected)
+        LocalVariables.optimize(expected)
+        CryptPrivates.optimize(expected, "test.js")
+
+        self.assertEqual(Compressor.Compressor().compress(node), Compressor.Compressor().compress(expected))
+        self.assertEqual(Compressor.Compressor().compress(node), 'var Foo=function(b){var a=b.x;this.__OiK6I=a;return{__OJHUm:this.__OiK6I,get:function(a){return a+this.__OJHUm}}};')
+
+    def test_unknown(self):
+        node = Parser.parse('this.__known = 1; this.__unknown();')
+        self.assertRaises(CryptPrivates.Error, CryptPrivates.optimize, node)
+
 
 
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+
+# Extend PYTHONPATH with local 'lib' folder
+if __name__ == "__main__":
+    jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir, os.pardir))
+    sys.path.insert(0, jasyroot)
+    print("Running from %s..." % jasyroot)
+
+import jasy.script.tokenize.Tokenizer as Tokenizer
+import jasy.script.parse.Parser as Parser
+
+
+corpus = [
+    "",
+    "x",
+    "var a = 1, b = 2.5, c = .5, d = 1e3, e = 2.5E-3, f = 1.e2, g = 0, h = 0x1F, i = 0755, j = 0.5e+1;",
+    "k = 08;",
+    "a >>>= b; a >>= 1; a <<= 2; a === b; a !== b; a != b; a && b || c; a &= b; a ^= b; a |= b; ~a; a %= 2; a--; ++a;",
+    "var s = 'single' + \"double\" + 'esc\\'aped' + \"new\\nline\" + '\\\\' + \"\";",
+    "if (a) { b(); } else { c[0] = d ? e : f; }",
+    "var r = /ab+c/gi.test(x) / 2;",
+    "1..toString(); x.y.z; 1.2.toFixed();",
+    "\t\xA0 var\t x = 1;\n\n\n   y = 2;",
+    "// Leading comment\n\n/* Block comment */\nvar x; // Trailing\n\n\n\n/**\n * Doc comment\n *\n * @param a {String} Text\n */\nfunction f(a) { return a; }",
+    "   /* one */ /* two */\n  /* three\n  lines */ x;",
+    "/* escaped *\\/ slash */ y; /**/ z; /***/ w; // end without newline",
+    "function g() {\n  // inner\n  return 1;\n}\n",
+    "a = b\n/hi/g.exec(c)",
+    "function h() { let x = yield; for (var k in o) { continue; } }"
+]
+
+
+def getTokens(engine, source):
+    tokenizer = Tokenizer.engines[engine](source, "test")
+    result = []
+
+    while True:
+        tokenType = tokenizer.get()
+        token = tokenizer.token
+        result.append((tokenType, token.start, token.end, token.line, getattr(token, "value", None), getattr(token, "assignOp", None)))
+
+        comments = tokenizer.getComments()
+        if comments:
+            result.append([vars(comment) for comment in comments])
+
+        if tokenType == "end":
+            return result
+
+
+class Tests(unittest.TestCase):
+
+    def tearDown(self):
+        Tokenizer.setEngine("regex")
+
+    def test_tokens(self):
+        for source in corpus:
+            if "/hi/" in source or "/ab+c/" in source:
+                continue
+
+            self.assertEqual(getTokens("regex", source), getTokens("classic", source), source)
+
+    def test_trees(self):
+        for source in corpus:
+            if "08" in source:
+                continue
+
+            Tokenizer.setEngine("classic")
+            expected = Parser.parse(source).toXml()
+            Tokenizer.setEngine("regex")
+            self.assertEqual(Parser.parse(source).toXml(), expected, source)
+
+    def test_comments(self):
+        source = corpus[10]
+        Tokenizer.setEngine("classic")
+        expected = Parser.parse(source)[1].comments
+        Tokenizer.setEngine("regex")
+        comments = Parser.parse(source)[1].comments
+
+        self.assertEqual([vars(comment) for comment in comments], [vars(comment) for comment in expected])
+        self.assertEqual(comments[0].variant, "doc")
+
+    def test_unterminated(self):
+        self.assertRaises(Tokenizer.ParseError, getTokens, "regex", "x; /* open")
+        self.assertRaises(Tokenizer.ParseError, getTokens, "regex", "x = 'open")
+        self.assertRaises(Tokenizer.ParseError, getTokens, "regex", "x = 1e+;")
+
+    def test_engine(self):
+        Tokenizer.setEngine("classic")
+        self.assertIsInstance(Tokenizer.createTokenizer("x"), Tokenizer.Tokenizer)
+        self.assertNotIsInstance(Tokenizer.createTokenizer("x"), Tokenizer.RegexTokenizer)
+
+        Tokenizer.setEngine("regex")
+        self.assertIsInstance(Tokenizer.createTokenizer("x"), Tokenizer.RegexTokenizer)
+
+        self.assertRaises(ValueError, Tokenizer.setEngine, "unknown")
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -152,6 +152,21 @@ class Tests(unittest.TestCase):
         )
 
 
+    def test_collect(self):
+        node = Parser.parse('''
+        tr("Hello World");
+        this.trc("Chat (noum)", "Chat");
+        trn("You have got a new mail", "You have got new mails", count);
+        tr("Hello World");
+        ''')
+
+        self.assertEqual(TranslationOptimizer.collectTranslations(node), {
+            "Hello World": [2, 5],
+            "Chat[C:Chat (noum)]": [3],
+            "You have got a new mail[N:You have got new mails]": [4]
+        })
+
+
     def test_marktr(self):
         self.assertEqual(self.process(
             '''
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+
+# Extend PYTHONPATH with local 'lib' folder
+if __name__ == "__main__":
+    jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir, os.pardir))
+    sys.path.insert(0, jasyroot)
+    print("Running from %s..." % jasyroot)
+
+import jasy.parse.CompactTree as CompactTree
+import jasy.parse.TreeCodec as TreeCodec
+import jasy.script.parse.Parser as Parser
+import jasy.script.parse.ScopeScanner as ScopeScanner
+import jasy.script.output.Compressor as Compressor
+import jasy.style.Engine as StyleEngine
+
+
+code = '''
+/** Doc comment #require(foo.Bar) */
+var values = [1, , -2, 3.25, 1e300, "text \\u00fc", true, null, 0x1F];
+
+function run(config) {
+  // Inline comment
+  for (var key in config) {
+    values.push(config[key] > 2147483648 ? key : -key);
+  }
+}
+'''
+
+
+class Tests(unittest.TestCase):
+
+    def test_varints(self):
+        data = bytearray()
+        values = [0, 1, 127, 128, 300, 16384, 2 ** 40, 5]
+        TreeCodec.writeVarints(data, values)
+        self.assertEqual(TreeCodec.readVarints(bytes(data), 0), (values, len(data)))
+
+        self.assertEqual(TreeCodec.unzigzag(TreeCodec.zigzag([0, -1, 1, -2, 2, -300])), [0, -1, 1, -2, 2, -300])
+
+    def test_columns(self):
+        for values in ([], [1, 2, 3], [0, 255, 256], [70000, 1], [2 ** 40]):
+            data = bytearray()
+            TreeCodec.writeColumn(data, values)
+            column, pos = TreeCodec.readColumn(bytes(data), 0, "Q")
+            self.assertEqual(list(column), values)
+            self.assertEqual(pos, len(data))
+
+    def test_compact(self):
+        tree = Parser.parse(code, "test")
+        ScopeScanner.scan(tree)
+        compact = CompactTree.fromNode(tree)
+
+        decoded = TreeCodec.decode(TreeCodec.encode(compact))
+        self.assertIsInstance(decoded, CompactTree.CompactTree)
+
+        for name in ("strings", "values", "types", "sizes", "lines", "starts", "ends", "rels", "flags", "attrOffsets", "attrNames", "attrValues"):
+            self.assertEqual(getattr(decoded, name), getattr(compact, name), name)
+
+        self.assertEqual(decoded.fileId, "test")
+        self.assertEqual(decoded.token.line, compact.token.line)
+        self.assertEqual(Compressor.Compressor().compress(decoded.toNode()), Compressor.Compressor().compress(tree))
+        self.assertEqual(decoded.toNode()[0].comments[0].getTags(), {"require": set(["foo.Bar"])})
+
+    def test_node(self):
+        tree = Parser.parse(code, "test")
+        decoded = TreeCodec.decode(TreeCodec.encode(tree))
+        self.assertEqual(decoded.toXml(), tree.toXml())
+
+    def test_style(self):
+        tree = StyleEngine.getTree("$width = 10px;\n.box{ width: @expr($width * 2); color: red; &:hover{ color: #fff; } }", "test")
+        decoded = TreeCodec.decode(TreeCodec.encode(tree))
+        self.assertEqual(decoded.toXml(), tree.toXml())
+
+        StyleEngine.reduceTree(tree)
+        StyleEngine.reduceTree(decoded)
+        self.assertEqual(StyleEngine.compressTree(decoded), StyleEngine.compressTree(tree))
+
+    def test_invalid(self):
+        self.assertRaises(TreeCodec.CodecError, TreeCodec.decode, b"XX\x01\x00")
+        self.assertRaises(TreeCodec.CodecError, TreeCodec.decode, b"JT\x63\x00")
+        self.assertRaises(TreeCodec.CodecError, TreeCodec.encode, "no tree")
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
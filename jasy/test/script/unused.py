@@ -15,6 +15,7 @@ import jasy.script.parse.Parser as Parser
 import jasy.script.parse.ScopeScanner as ScopeScanner
 import jasy.script.output.Compressor as Compressor
 import jasy.script.clean.Unused as Unused
+import jasy.parse.CompactTree as CompactTree
 
 
 
@@ -455,7 +456,74 @@ class Tests(unittest.TestCase):
             'var a=function d(){d()};'
         )
 
+    def getScopes(self, node, result):
+        if node.type == "script":
+            result.append(node.scope.export())
 
+        for child in node:
+            if child is not None:
+                self.getScopes(child, result)
+
+        return result
+
+    def test_incremental_scan(self):
+        node = Parser.parse(
+            '''
+            function a(x, y) {
+              var u = 1;
+              function inner(p, q) { var w = function named(k) { return 2; }; return p; }
+              return function() { return x + inner(1); };
+            }
+            ''')
+
+        ScopeScanner.scan(node)
+        other = node[0].body[2].value.body
+        otherScope = other.scope
+
+        Unused.cleanup(node)
+        self.assertEqual(Compressor.Compressor().compress(node), 'function a(x){function inner(p){return p}return function(){return x+inner(1)}}')
+
+        # Scopes without modifications are not scanned again
+        self.assertIs(other.scope, otherScope)
+
+        fresh = node.clone()
+        ScopeScanner.scan(fresh)
+        self.assertEqual(self.getScopes(node, []), self.getScopes(fresh, []))
+
+    def test_mark_dirty(self):
+        node = Parser.parse('function a(x) { function b() { return x; } return b; }')
+        ScopeScanner.scan(node)
+        inner = node[0].body[0].body
+
+        self.assertIs(ScopeScanner.update(node), node.scope)
+        ScopeScanner.markDirty(inner[0])
+        self.assertTrue(inner.scope.dirty)
+        self.assertTrue(node[0].body.scope.dirty)
+        self.assertTrue(node.scope.dirty)
+
+        data = ScopeScanner.update(node)
+        self.assertIs(data, node.scope)
+        self.assertFalse(node.scope.dirty)
+        self.assertFalse(inner.scope.dirty)
+
+    def test_snapshot_scopes(self):
+        node = Parser.parse('function a(x, y) { var u = 1; return function() { return x; }; }')
+        ScopeScanner.scan(node)
+        snapshot = CompactTree.fromNode(node)
+
+        # Every tree restored from the snapshot (e.g. one per permutation) starts with clean scopes
+        for permutation in range(2):
+            tree = snapshot.toNode()
+            other = tree[0].body[1].value.body
+            otherScope = other.scope
+            self.assertFalse(tree.scope.dirty)
+            self.assertFalse(otherScope.dirty)
+
+            Unused.cleanup(tree)
+            self.assertEqual(Compressor.Compressor().compress(tree), 'function a(x){return function(){return x}}')
+            self.assertIs(other.scope, otherScope)
+
+        self.assertFalse(snapshot.getScope(0).dirty)
 
 
 
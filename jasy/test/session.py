@@ -6,6 +6,7 @@ import unittest
 import logging
 import pkg_resources
 import tempfile
+import unittest.mock
 
 # Extend PYTHONPATH with local 'lib' folder
 jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
@@ -14,6 +15,10 @@ sys.path.insert(0, jasyroot)
 import jasy.core.Project as Project
 import jasy.core.Session as Session
 import jasy.core.Profile as Profile
+import jasy.script.Resolver as ScriptResolver
+import jasy.abstract.Sorter as Sorter
+import jasy.script.output.Compressor as Compressor
+import jasy.item.Script as ScriptItem
 
 globProject = None
 
@@ -235,6 +240,141 @@ def add(number):
             counter += 1
         self.assertEqual(counter, 24)
 
+    def test_compression_key(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        self.writeFile(classPath, "Debug.js", 'if (jasy.Env.isSet("debug")) { log(1); }')
+        session.addProject(project)
+
+        profile = Profile.Profile(session)
+        main = project.getScriptByName("myproject.Main")
+        debug = project.getScriptByName("myproject.Debug")
+
+        mainKeys = set()
+        debugKeys = set()
+        for permutation in profile.permutate():
+            mainKeys.add(main.getCompressionKey(profile))
+            debugKeys.add(debug.getCompressionKey(profile))
+            self.assertEqual(debug.getCompressed(profile), "{log(1)}" if permutation.get("debug") else "")
+
+        self.assertEqual(len(mainKeys), 1)
+        self.assertEqual(len(debugKeys), 2)
+
+    def test_fields_and_translations(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        self.writeFile(classPath, "Main.js", 'if (jasy.Env.isSet("debug")) { log("Hello"); }')
+        session.addProject(project)
+
+        main = project.getScriptByName("myproject.Main")
+
+        # Both are collected in the same traversal of the tree
+        self.assertEqual(main.getFields(), set(["debug"]))
+        with unittest.mock.patch("jasy.script.util.walk", side_effect=AssertionError("Unexpected traversal")):
+            self.assertEqual(main.getTranslations(), {})
+
+    def test_compressed_with_map(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        self.writeFile(classPath, "Main.js", "var value = 1;\nlog(value);")
+        session.addProject(project)
+
+        profile = Profile.Profile(session)
+        main = project.getScriptByName("myproject.Main")
+
+        # Code and map are created in a single pass and both are cached afterwards
+        with unittest.mock.patch.object(Compressor.Compressor, "compressWithMap", autospec=True, side_effect=Compressor.Compressor.compressWithMap) as compress:
+            compressed, sourceMap = main.getCompressedWithMap(profile)
+            self.assertEqual(main.getCompressed(profile), compressed)
+            self.assertIs(main.getSourceMap(profile), sourceMap)
+            self.assertEqual(compress.call_count, 1)
+
+        self.assertTrue(sourceMap.getMappings())
+
+    def test_dependency_graph(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        os.makedirs(os.path.join(classPath, "ui"))
+        self.writeFile(classPath, "Main.js", "myproject.ui.Button.create();")
+        self.writeFile(classPath, "ui.js", "myproject.ui = {};")
+        self.writeFile(os.path.join(classPath, "ui"), "Button.js", "/** #require(myproject.ui) */ myproject.ui.Button = {};")
+        session.addProject(project)
+
+        profile = Profile.Profile(session)
+        scripts = project.getScripts()
+        main = scripts["myproject.Main"]
+        ui = scripts["myproject.ui"]
+        button = scripts["myproject.ui.Button"]
+
+        # Resolvers of the same items are sharing the graph
+        resolver = ScriptResolver.Resolver(profile).add(main)
+        graph = resolver.getGraph()
+        self.assertIs(ScriptResolver.Resolver(profile).getGraph(), graph)
+
+        self.assertEqual(resolver.getIncluded(), set([main, ui, button]))
+        self.assertEqual(graph.getClosure([main], profile.getCurrentPermutation()), set([main, ui, button]))
+        self.assertEqual(resolver.getSorted(), [ui, button, main])
+
+        # Longest package name wins but falls back to shorter ones when resolving against fewer items
+        self.assertEqual(graph.getDependencies(main), set([button]))
+        self.assertEqual(graph.getDependencies(main, items={"myproject.ui": ui}), set([ui]))
+
+    def test_dependency_graph_virtual(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        self.writeFile(classPath, "Main.js", "myproject.Base.create();")
+        self.writeFile(classPath, "Base.js", "myproject.Base = {};")
+        session.addProject(project)
+
+        profile = Profile.Profile(session)
+        main = project.getScriptByName("myproject.Main")
+        base = project.getScriptByName("myproject.Base")
+
+        # Generated items are resolved without recomputing the edges of all other items
+        graphs = set()
+        with unittest.mock.patch.object(ScriptItem.ScriptItem, "getEdges", autospec=True, side_effect=ScriptItem.ScriptItem.getEdges) as getEdges:
+            for count in range(3):
+                bootItem = session.getVirtualItem("jasy.generated.BootCode", ScriptItem.ScriptItem, "myproject.Main.init(%s);" % count, ".js")
+                resolver = ScriptResolver.Resolver(profile).add(main).add(bootItem)
+                self.assertEqual(resolver.getIncluded(), set([bootItem, main, base]))
+                self.assertEqual(resolver.getSorted(), [base, main, bootItem])
+                graphs.add(resolver.getGraph())
+                self.assertEqual(getEdges.call_count, 3 + count)
+
+        self.assertEqual(len(graphs), 1)
+
+    def test_sorter(self):
+        session = Session.Session()
+        project = self.createProject(session, [])
+        classPath = os.path.join(project.getPath(), "source", "class")
+        self.writeFile(classPath, "Main.js", "/** #require(myproject.B) #require(myproject.A) */")
+        self.writeFile(classPath, "A.js", "/** #require(myproject.Base) #require(myproject.B) #break(myproject.B) */")
+        self.writeFile(classPath, "B.js", "/** #require(myproject.Base) #require(myproject.A) */")
+        self.writeFile(classPath, "Base.js", "")
+        self.writeFile(classPath, "C.js", "/** #require(myproject.D) */")
+        self.writeFile(classPath, "D.js", "/** #require(myproject.C) */")
+        self.writeFile(classPath, "E.js", "/** #require(myproject.F) */")
+        self.writeFile(classPath, "F.js", "/** #require(myproject.E) */")
+        session.addProject(project)
+
+        profile = Profile.Profile(session)
+
+        # Breaks are loaded as soon as possible after the item
+        resolver = ScriptResolver.Resolver(profile).add("myproject.Main")
+        self.assertEqual([item.getId() for item in resolver.getSorted()], ["myproject.Base", "myproject.A", "myproject.B", "myproject.Main"])
+
+        # All circular dependencies are reported at once
+        resolver = ScriptResolver.Resolver(profile).add("myproject.C").add("myproject.E")
+        with self.assertRaises(Sorter.SorterError) as context:
+            resolver.getSorted()
+
+        self.assertEqual(str(context.exception), "Circular Dependency: myproject.C >> myproject.D >> myproject.C, myproject.E >> myproject.F >> myproject.E")
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.ERROR)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+import json
+
+# Extend PYTHONPATH with local 'lib' folder
+if __name__ == "__main__":
+    jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
+    sys.path.insert(0, jasyroot)
+    print("Running from %s..." % jasyroot)
+
+import jasy.core.SourceMap as SourceMap
+import jasy.core.Permutation as Permutation
+import jasy.script.parse.Parser as Parser
+import jasy.script.output.Compressor as ScriptCompressor
+import jasy.style.Engine as StyleEngine
+
+
+class Tests(unittest.TestCase):
+
+    def test_vlq(self):
+        for value in (0, 1, -1, 15, -16, 16, 1000, -123456):
+            self.assertEqual(SourceMap.decodeVlq(SourceMap.encodeVlq(value)), [value])
+
+        self.assertEqual(SourceMap.encodeVlq(0), "A")
+        self.assertEqual(SourceMap.encodeVlq(-1), "D")
+        self.assertEqual(SourceMap.encodeVlq(16), "gB")
+
+    def test_columns(self):
+        offsets = SourceMap.getLineOffsets("ab\ncde\n\nf")
+        self.assertEqual(offsets, [0, 3, 7, 8])
+        self.assertEqual(SourceMap.getColumn(offsets, 2, 5), 2)
+        self.assertEqual(SourceMap.getColumn(offsets, 4, 8), 0)
+        self.assertEqual(SourceMap.getColumn(offsets, 1, 5), 0)
+        self.assertEqual(SourceMap.getColumn(offsets, 9, 5), 0)
+
+    def test_columns_astral(self):
+        self.assertEqual(SourceMap.getLength("a\U0001F600b"), 4)
+        self.assertEqual(SourceMap.getLength("a\u00e9b"), 3)
+
+        offsets = SourceMap.getLineOffsets("\U0001F600\nx\U0001F600\U0001F600y")
+        self.assertEqual(offsets, [0, 2])
+        self.assertEqual(SourceMap.getColumn(offsets, 2, 2), 0)
+        self.assertEqual(SourceMap.getColumn(offsets, 2, 3), 1)
+        self.assertEqual(SourceMap.getColumn(offsets, 2, 5), 5)
+
+    def test_export(self):
+        sourceMap = SourceMap.SourceMap()
+        sourceMap.addMapping(0, 0, "a.js", 0, 0)
+        sourceMap.addMapping(0, 10, "b.js", 4, 2)
+        sourceMap.addMapping(2, 3, "a.js", 1, 0)
+        sourceMap.setContent("a.js", "x")
+
+        data = json.loads(sourceMap.export("out/bundle.js"))
+        self.assertEqual(data["version"], 3)
+        self.assertEqual(data["file"], "bundle.js")
+        self.assertEqual(data["sources"], ["a.js", "b.js"])
+        self.assertEqual(data["sourcesContent"], ["x", None])
+        self.assertEqual(SourceMap.decodeMappings(data["mappings"]), [(0, 0, 0, 0, 0), (0, 10, 1, 4, 2), (2, 3, 0, 1, 0)])
+
+    def test_stitch(self):
+        first = SourceMap.SourceMap()
+        first.addMapping(0, 0, "a.js", 0)
+        second = SourceMap.SourceMap()
+        second.addMapping(0, 0, "b.js", 3)
+        second.addMapping(1, 2, "b.js", 4)
+
+        result = SourceMap.stitch([("// a\n", None), ("abc;", first), ("x", None), ("def;\nghi;", second)])
+        self.assertEqual(result.getMappings(), [(1, 0, "a.js", 0, 0), (1, 5, "b.js", 3, 0), (2, 2, "b.js", 4, 0)])
+
+        result = SourceMap.stitch([("\U0001F600;", None), ("abc;", first), ("\n\U0001F600", None), ("def;\nghi;", second)])
+        self.assertEqual(result.getMappings(), [(0, 3, "a.js", 0, 0), (1, 2, "b.js", 3, 0), (2, 2, "b.js", 4, 0)])
+
+    def test_script(self):
+        code = 'var x = 1;\nfunction f(a) {\n  return a + 1;\n}\nif (x) {\n  f(x);\n}'
+        tree = Parser.parse(code, "test.js")
+
+        compressed, sourceMap = ScriptCompressor.Compressor().compressWithMap(tree, SourceMap.getLineOffsets(code))
+        self.assertEqual(compressed, ScriptCompressor.Compressor().compress(tree))
+
+        mappings = sourceMap.getMappings()
+        self.assertIn((0, 0, "test.js", 0, 0), mappings)
+        self.assertIn((0, compressed.index("function"), "test.js", 1, 0), mappings)
+        self.assertIn((0, compressed.index("return"), "test.js", 2, 2), mappings)
+        self.assertIn((0, compressed.index("if"), "test.js", 4, 0), mappings)
+        self.assertIn((0, compressed.rindex("f(x)"), "test.js", 5, 2), mappings)
+
+    def test_script_astral(self):
+        code = 'var s = "\U0001F600"; f(s);\nvar t = "\U0001F600\U0001F600"; g(t);'
+        tree = Parser.parse(code, "test.js")
+
+        compressed, sourceMap = ScriptCompressor.Compressor().compressWithMap(tree, SourceMap.getLineOffsets(code))
+        mappings = sourceMap.getMappings()
+        self.assertIn((0, SourceMap.getLength(compressed[:compressed.index("f(s)")]), "test.js", 0, 14), mappings)
+        self.assertIn((0, SourceMap.getLength(compressed[:compressed.index("g(t)")]), "test.js", 1, 16), mappings)
+
+    def test_style(self):
+        code = '.a {\n  color: red;\n}\n\n.b {\n  width: 10px;\n}'
+
+        tree = StyleEngine.getTree(code, "test.css")
+        tree = StyleEngine.permutateTree(tree, Permutation.Permutation({}))
+        tree = StyleEngine.reduceTree(tree)
+
+        compressed, sourceMap = StyleEngine.compressTreeWithMap(tree, getLineOffsets=lambda fileName: SourceMap.getLineOffsets(code))
+        self.assertEqual(compressed, StyleEngine.compressTree(tree))
+        self.assertNotIn("\x00", compressed)
+
+        mappings = sourceMap.getMappings()
+        self.assertIn((0, 0, "test.css", 0, 0), mappings)
+        self.assertIn((0, compressed.index(".b"), "test.css", 4, 0), mappings)
+
+    def test_style_astral(self):
+        code = '.a {\n  content: "\U0001F600";\n}\n.b {\n  width: 10px;\n}'
+
+        tree = StyleEngine.getTree(code, "test.css")
+        tree = StyleEngine.permutateTree(tree, Permutation.Permutation({}))
+        tree = StyleEngine.reduceTree(tree)
+
+        compressed, sourceMap = StyleEngine.compressTreeWithMap(tree, getLineOffsets=lambda fileName: SourceMap.getLineOffsets(code))
+        self.assertIn("\U0001F600", compressed)
+        self.assertIn((0, compressed.index(".b") + 1, "test.css", 3, 0), sourceMap.getMappings())
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
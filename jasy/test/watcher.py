@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import unittest
+import logging
+import tempfile
+import unittest.mock
+
+# Extend PYTHONPATH with local 'lib' folder
+jasyroot = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]), os.pardir, os.pardir, os.pardir))
+sys.path.insert(0, jasyroot)
+
+import jasy.core.Project as Project
+import jasy.core.Session as Session
+import jasy.core.Watcher as Watcher
+
+
+class Tests(unittest.TestCase):
+
+    def writeFile(self, path, fileName, content):
+        handle = open(os.path.join(path, fileName), mode="w", encoding="utf-8")
+        handle.write(content)
+        handle.close()
+
+    def createProject(self):
+        path = os.path.join(tempfile.TemporaryDirectory().name, "myproject")
+        os.makedirs(os.path.join(path, "class"))
+        os.makedirs(os.path.join(path, "style"))
+        self.writeFile(path, "jasyproject.yaml", "name: myproject")
+        self.writeFile(os.path.join(path, "class"), "Main.js", ";")
+        self.writeFile(os.path.join(path, "class"), "Other.js", ";")
+        self.writeFile(os.path.join(path, "style"), "Base.style", "$color = red;")
+        self.writeFile(os.path.join(path, "style"), "Main.style", "@include \"myproject.Base\";\nbody{ color: $color; }")
+
+        session = Session.Session()
+        project = Project.getProjectFromPath(path, session)
+        session.addProject(project)
+        session.scan()
+
+        return session, project
+
+    def test_refresh_unmodified(self):
+        session, project = self.createProject()
+        self.assertEqual(session.refresh(), [])
+
+    def test_refresh_modified(self):
+        session, project = self.createProject()
+        item = project.getScriptByName("myproject.Main")
+        item.getMetaData()
+
+        self.writeFile(os.path.join(project.getPath(), "class"), "Main.js", "var x = 1;")
+        os.utime(os.path.join(project.getPath(), "class", "Main.js"), (1, 1))
+
+        self.assertEqual(session.refresh(), [item])
+        self.assertIs(project.getScriptByName("myproject.Main"), item)
+        self.assertEqual(item.getModificationTime(), 1)
+        self.assertEqual(item.getText(), "var x = 1;")
+
+    def test_refresh_added_removed(self):
+        session, project = self.createProject()
+        other = project.getScriptByName("myproject.Other")
+
+        os.remove(os.path.join(project.getPath(), "class", "Other.js"))
+        self.writeFile(os.path.join(project.getPath(), "class"), "Added.js", ";")
+
+        modified = session.refresh([os.path.join(project.getPath(), "class")])
+        self.assertIn(other, modified)
+        self.assertEqual(sorted(project.getScripts()), ["myproject.Added", "myproject.Main"])
+
+    def test_refresh_limited_to_paths(self):
+        session, project = self.createProject()
+        os.utime(os.path.join(project.getPath(), "class", "Main.js"), (1, 1))
+        self.assertEqual(session.refresh([tempfile.gettempdir()]), [])
+        self.assertEqual(len(session.refresh([project.getPath()])), 1)
+
+    def test_refresh_paths(self):
+        session, project = self.createProject()
+        classPath = os.path.join(project.getPath(), "class")
+        main = project.getScriptByName("myproject.Main")
+        other = project.getScriptByName("myproject.Other")
+
+        # Only the given files are checked
+        os.utime(os.path.join(classPath, "Main.js"), (1, 1))
+        os.utime(os.path.join(classPath, "Other.js"), (1, 1))
+        with unittest.mock.patch("os.scandir", side_effect=AssertionError("Unexpected listing")):
+            self.assertEqual(session.refresh([os.path.join(classPath, "Main.js")]), [main])
+
+        self.assertEqual(session.refresh([os.path.join(classPath, "Other.js")]), [other])
+
+        # Added and removed files
+        os.remove(os.path.join(classPath, "Other.js"))
+        self.writeFile(classPath, "Added.js", ";")
+        modified = session.refresh([os.path.join(classPath, "Other.js"), os.path.join(classPath, "Added.js")])
+        self.assertEqual(sorted([item.getId() for item in modified]), ["myproject.Added", "myproject.Other"])
+        self.assertEqual(sorted(project.getScripts()), ["myproject.Added", "myproject.Main"])
+
+        # Hidden files and files outside of the scanned directories are ignored
+        self.writeFile(classPath, ".Hidden.js", ";")
+        self.writeFile(project.getPath(), "Unknown.js", ";")
+        self.assertEqual(session.refresh([os.path.join(classPath, ".Hidden.js"), os.path.join(project.getPath(), "Unknown.js")]), [])
+
+        # New directories are collected completely
+        os.makedirs(os.path.join(classPath, "ui"))
+        self.writeFile(os.path.join(classPath, "ui"), "Button.js", ";")
+        self.assertEqual([item.getId() for item in session.refresh([os.path.join(classPath, "ui")])], ["myproject.ui.Button"])
+
+    def test_refresh_dependents(self):
+        session, project = self.createProject()
+        base = project.getStyles()["myproject.Base"]
+        main = project.getStyles()["myproject.Main"]
+        self.assertEqual(main.getIncludes(None), ["myproject.Base"])
+
+        os.utime(os.path.join(project.getPath(), "style", "Base.style"), (1, 1))
+        self.assertEqual(session.refresh(), [base, main])
+
+    def test_refresh_translations(self):
+        session, project = self.createProject()
+        translationPath = os.path.join(project.getPath(), "translation")
+        os.makedirs(translationPath)
+        self.writeFile(translationPath, "de.po", 'msgid "Hello"\nmsgstr "Hallo"\n')
+        session.refresh()
+
+        self.assertEqual(list(session.getTranslationBundle("de").getTable().values()), ["Hallo"])
+
+        self.writeFile(translationPath, "de.po", 'msgid "Hello"\nmsgstr "Servus"\n')
+        os.utime(os.path.join(translationPath, "de.po"), (1, 1))
+        session.refresh([os.path.join(translationPath, "de.po")])
+
+        self.assertEqual(list(session.getTranslationBundle("de").getTable().values()), ["Servus"])
+
+    def test_discard(self):
+        session, project = self.createProject()
+        cache = project.getCache()
+        cache.store("script:tree[myproject.Main]", "main", transient=True)
+        cache.store("script:tree[myproject.Other]", "other", transient=True)
+
+        cache.discard(["myproject.Main"])
+        self.assertEqual(cache.read("script:tree[myproject.Main]"), None)
+        self.assertEqual(cache.read("script:tree[myproject.Other]"), "other")
+
+    def test_polling_observer(self):
+        session, project = self.createProject()
+        observer = Watcher.PollingObserver([project.getPath()], interval=0.01)
+        self.assertEqual(observer.wait(0), set())
+
+        path = os.path.join(project.getPath(), "class", "Main.js")
+        os.utime(path, (1, 1))
+        self.assertEqual(observer.wait(0), set([path]))
+        observer.close()
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "requires inotify")
+    def test_inotify_observer(self):
+        session, project = self.createProject()
+        observer = Watcher.InotifyObserver([project.getPath()])
+        self.assertEqual(observer.wait(0), set())
+
+        self.writeFile(os.path.join(project.getPath(), "class"), "Main.js", "var x;")
+        self.assertIn(os.path.join(project.getPath(), "class", "Main.js"), observer.wait(1))
+        observer.close()
+
+    def test_watcher(self):
+        session, project = self.createProject()
+        watcher = Watcher.Watcher(session, polling=True, interval=0.01, delay=0)
+        self.assertEqual(watcher.wait(0), [])
+
+        os.utime(os.path.join(project.getPath(), "class", "Main.js"), (1, 1))
+        self.assertEqual(watcher.wait(0), [project.getScriptByName("myproject.Main")])
+        watcher.close()
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.ERROR)
+    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)